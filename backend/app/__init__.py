@@ -1,5 +1,5 @@
 import os
-from flask import Flask
+from flask import Flask, has_app_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -12,6 +12,17 @@ db = SQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 celery_app = Celery(__name__, broker=Config.CELERY_BROKER_URL, backend=Config.CELERY_RESULT_BACKEND)
+# Set at import time: `celery beat -A app.celery_app` never calls create_app
+celery_app.conf.beat_schedule = {
+    'drain-embedding-queue': {
+        'task': 'tasks.drain_embedding_queue',
+        'schedule': Config.EMBED_DRAIN_INTERVAL,
+    },
+    'refresh-related-contents': {
+        'task': 'tasks.refresh_related_contents',
+        'schedule': Config.RELATED_REFRESH_INTERVAL,
+    },
+}
 
 
 def create_app(config_class=Config):
@@ -42,8 +53,31 @@ def create_app(config_class=Config):
         from app.models import User
         return User.query.get(user_id)
 
-    # Configure Celery
-    celery_app.conf.update(app.config)
+    # Configure Celery (map CELERY_* config onto Celery's lowercase setting names;
+    # passing app.config straight through mixes old and new keys, which Celery rejects)
+    celery_app.conf.update(
+        broker_url=app.config.get('CELERY_BROKER_URL'),
+        result_backend=app.config.get('CELERY_RESULT_BACKEND'),
+        task_serializer=app.config.get('CELERY_TASK_SERIALIZER', 'json'),
+        result_serializer=app.config.get('CELERY_RESULT_SERIALIZER', 'json'),
+        accept_content=app.config.get('CELERY_ACCEPT_CONTENT', ['json']),
+        timezone=app.config.get('CELERY_TIMEZONE', 'UTC'),
+        enable_utc=app.config.get('CELERY_ENABLE_UTC', True),
+        task_always_eager=app.config.get('CELERY_TASK_ALWAYS_EAGER', False),
+        task_eager_propagates=app.config.get('CELERY_TASK_EAGER_PROPAGATES', False),
+    )
+
+    class FlaskTask(celery_app.Task):
+        """Run every task inside the application context"""
+
+        def __call__(self, *args, **kwargs):
+            # Eager tasks already run inside the caller's context (and session)
+            if has_app_context():
+                return self.run(*args, **kwargs)
+            with app.app_context():
+                return self.run(*args, **kwargs)
+
+    celery_app.Task = FlaskTask
 
     # Register API blueprints
     from app.api import content_bp, media_bp, tags_bp, search_bp, webhooks_bp
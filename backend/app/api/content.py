@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from datetime import datetime
 
 from app import db
@@ -11,7 +11,15 @@ from app.models import (
     MediaContent,
 )
 from app.utils import render_markdown
+from app.utils.preview import MAX_KNOWN_BLOCKS, render_preview
 from app.utils.api_access import enforce_read_only_in_public_mode
+from app.utils.pagination import TOTAL_MODES, InvalidCursor, count_total, keyset_paginate
+from app.tasks.embeddings import mark_embedding_dirty
+from app.tasks.near_duplicates import schedule_near_duplicate_index
+from app.tasks.related import mark_listing_contents_dirty, mark_related_dirty
+from app.services.near_duplicates import content_duplicates, remove_content, text_duplicates
+from app.services.related import related_contents
+from app.utils.api_access import caller_visibility
 from flask_login import current_user
 
 content_bp = Blueprint('content', __name__)
@@ -79,10 +87,11 @@ def create_content():
             if not primary_exists and idx == 0:
                 translation.is_primary = True
             translation.generate_slug()
-            translation.rendered_html = render_markdown(markdown)
+            translation.refresh_derived_fields()
             db.session.add(translation)
             db.session.flush()
             _snapshot_translation_version(translation, user.id if user else None)
+            mark_embedding_dirty('article_translation', translation.id)
 
     # Handle media creation for video/audio when metadata is provided
     if data['type'] in ('video', 'audio') and data.get('media'):
@@ -133,9 +142,44 @@ def create_content():
         if tag:
             content.tags.append(tag)
 
+    if content.tags:
+        db.session.flush()
+        mark_related_dirty(content.id)
+
+    # Near-duplicate check against the index; the new texts are indexed once
+    # committed
+    near_duplicates = []
+    if current_app.config.get('NEAR_DUPLICATE_CHECK_ON_CREATE', True):
+        seen = set()
+        for trans_data in translations if data['type'] == 'article' else []:
+            for duplicate in text_duplicates(trans_data.get('markdown', ''), limit=5, exclude_content_id=content.id):
+                if (duplicate.owner_type, duplicate.owner_id) not in seen:
+                    seen.add((duplicate.owner_type, duplicate.owner_id))
+                    near_duplicates.append(_near_duplicate_dict(duplicate, trans_data.get('language')))
+        if near_duplicates and data.get('reject_duplicates'):
+            db.session.rollback()
+            return jsonify({'error': 'Near-duplicate content exists', 'near_duplicates': near_duplicates}), 409
+
     db.session.commit()
+    for translation in content.translations:
+        schedule_near_duplicate_index('article_translation', translation.id)
+
+    result = content.to_dict(include_translations=True, language=request.args.get('lang'))
+    result['near_duplicates'] = near_duplicates
+    return jsonify(result), 201
+
 
-    return jsonify(content.to_dict(include_translations=True, language=request.args.get('lang'))), 201
+def _near_duplicate_dict(duplicate, language=None):
+    item = duplicate.content.to_dict(include_translations=True, language=language or duplicate.language)
+    item['similarity'] = round(duplicate.similarity, 4)
+    item['match'] = {
+        'owner_type': duplicate.owner_type,
+        'owner_id': duplicate.owner_id,
+        'language': duplicate.language,
+        'matched_owner_type': duplicate.matched_owner_type,
+        'matched_owner_id': duplicate.matched_owner_id,
+    }
+    return item
 
 
 @content_bp.route('', methods=['GET'])
@@ -143,6 +187,10 @@ def list_contents():
     """
     List contents with optional filters
     GET /api/contents?type=article&lang=en&tags=python,flask&page=1&per_page=20
+    GET /api/contents?cursor=&per_page=20 (keyset mode; follow next_cursor)
+
+    total=exact|estimate|none controls the reported total; it defaults to
+    exact in page mode and none in cursor mode.
     """
     # Parse query parameters
     content_type = request.args.get('type')
@@ -150,6 +198,11 @@ def list_contents():
     tags_param = request.args.get('tags')
     page = int(request.args.get('page', 1))
     per_page = min(int(request.args.get('per_page', 20)), 100)
+    cursor = request.args.get('cursor')
+    total_mode = request.args.get('total', 'exact' if cursor is None else 'none')
+
+    if total_mode not in TOTAL_MODES:
+        return jsonify({'error': f"total must be one of {', '.join(TOTAL_MODES)}"}), 400
 
     # Build query
     query = Content.query
@@ -162,17 +215,33 @@ def list_contents():
         tag_keys = tags_param.split(',')
         # Will implement after tags are set up
 
+    if cursor is not None:
+        try:
+            result = keyset_paginate(
+                query, [Content.updated_at, Content.id], cursor, per_page, total=total_mode
+            )
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'items': [c.to_dict(include_translations=True, language=language) for c in result.items],
+            'total': result.total,
+            'per_page': per_page,
+            'next_cursor': result.next_cursor
+        }), 200
+
     # Paginate
-    pagination = query.order_by(Content.updated_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    pagination = query.order_by(Content.updated_at.desc(), Content.id.desc()).paginate(
+        page=page, per_page=per_page, error_out=False, count=False
     )
+    pagination.total = count_total(query, total_mode)
 
     return jsonify({
         'items': [c.to_dict(include_translations=True, language=language) for c in pagination.items],
         'total': pagination.total,
         'page': page,
         'per_page': per_page,
-        'pages': pagination.pages
+        'pages': pagination.pages if pagination.total is not None else None
     }), 200
 
 
@@ -188,6 +257,56 @@ def get_content(content_id):
     return jsonify(content.to_dict(include_translations=True, language=language)), 200
 
 
+@content_bp.route('/<content_id>/related', methods=['GET'])
+def get_related_contents(content_id):
+    """
+    Related content from the precomputed neighbor lists
+    GET /api/contents/{id}/related?lang=en&limit=10
+
+    Anonymous callers and the public service only see public content.
+    """
+    language = request.args.get('lang', 'en')
+    limit = min(int(request.args.get('limit', 10)), current_app.config.get('RELATED_NEIGHBORS', 20))
+
+    content = Content.query.get_or_404(content_id)
+    items = []
+    for related, neighbor in related_contents(content.id, language, limit, caller_visibility()):
+        item = related.to_dict(include_translations=True, language=language)
+        item['score'] = round(float(neighbor.score), 6)
+        item['method'] = neighbor.method
+        items.append(item)
+
+    return jsonify({
+        'items': items,
+        'content_id': content.id,
+        'language': language
+    }), 200
+
+
+@content_bp.route('/<content_id>/duplicates', methods=['GET'])
+def get_near_duplicates(content_id):
+    """
+    Likely near duplicates of a content item's texts, from the MinHash index
+    GET /api/contents/{id}/duplicates?threshold=0.7&limit=20
+
+    Includes other translations of the same item that were copied without
+    being translated. Anonymous callers and the public service only see
+    public content.
+    """
+    try:
+        threshold = float(request.args['threshold']) if 'threshold' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'threshold must be a number'}), 400
+    limit = min(int(request.args.get('limit', 20)), 100)
+
+    content = Content.query.get_or_404(content_id)
+    duplicates = content_duplicates(content.id, threshold, limit, caller_visibility())
+    return jsonify({
+        'items': [_near_duplicate_dict(duplicate) for duplicate in duplicates],
+        'content_id': content.id
+    }), 200
+
+
 @content_bp.route('/<content_id>', methods=['PUT'])
 def update_content(content_id):
     """
@@ -239,6 +358,7 @@ def update_content(content_id):
 
             if tag:
                 content.tags.append(tag)
+        mark_related_dirty(content.id)
 
     content.updated_at = datetime.utcnow()
     db.session.commit()
@@ -253,6 +373,8 @@ def delete_content(content_id):
     DELETE /api/contents/{id}
     """
     content = Content.query.get_or_404(content_id)
+    mark_listing_contents_dirty(content.id)
+    remove_content(content.id)
     db.session.delete(content)
     db.session.commit()
 
@@ -293,13 +415,14 @@ def create_translation(content_id):
         is_primary=data.get('is_primary', False)
     )
     translation.generate_slug()
+    translation.refresh_derived_fields()
 
     db.session.add(translation)
     db.session.flush()
     _snapshot_translation_version(translation, current_user.id if hasattr(current_user, 'id') and current_user.is_authenticated else None)
+    mark_embedding_dirty('article_translation', translation.id)
     db.session.commit()
-
-    # TODO: Enqueue embedding generation task
+    schedule_near_duplicate_index('article_translation', translation.id)
 
     return jsonify(translation.to_dict()), 201
 
@@ -329,7 +452,7 @@ def update_translation(content_id, language):
 
     if 'markdown' in data:
         translation.markdown = data['markdown']
-        translation.rendered_html = render_markdown(data['markdown'])
+        translation.refresh_derived_fields()
 
     if 'is_primary' in data:
         translation.is_primary = data['is_primary']
@@ -338,9 +461,13 @@ def update_translation(content_id, language):
 
     _snapshot_translation_version(translation, current_user.id if hasattr(current_user, 'id') and current_user.is_authenticated else None)
 
-    db.session.commit()
+    # Autosaves land here: repeated saves coalesce into one embedding run
+    if 'title' in data or 'markdown' in data:
+        mark_embedding_dirty('article_translation', translation.id)
 
-    # TODO: Enqueue re-embedding task
+    db.session.commit()
+    if 'markdown' in data:
+        schedule_near_duplicate_index('article_translation', translation.id)
 
     return jsonify(translation.to_dict()), 200
 
@@ -371,6 +498,7 @@ def manage_content_tags(content_id):
             if tag and tag in content.tags:
                 content.tags.remove(tag)
 
+    mark_related_dirty(content.id)
     db.session.commit()
 
     return jsonify(content.to_dict(include_translations=True)), 200
@@ -380,11 +508,24 @@ def manage_content_tags(content_id):
 def render_markdown_api():
     """
     Render markdown to HTML (utility for previews)
+    Body: {"markdown": "...", "mode": "full" | "blocks", "known_blocks": ["hash", ...]}
+
+    In "blocks" mode only the HTML of blocks missing from known_blocks is
+    returned, alongside the ordered list of block hashes for the document.
     """
     data = request.get_json() or {}
     markdown = data.get('markdown', '')
     if markdown is None:
         markdown = ''
+
+    if data.get('mode') == 'blocks':
+        known_blocks = data.get('known_blocks') or []
+        if not isinstance(known_blocks, list) or not all(isinstance(h, str) for h in known_blocks):
+            return jsonify({'error': 'known_blocks must be a list of strings'}), 400
+        if len(known_blocks) > MAX_KNOWN_BLOCKS:
+            return jsonify({'error': f'known_blocks holds at most {MAX_KNOWN_BLOCKS} hashes'}), 400
+        return jsonify(render_preview(markdown, known_blocks))
+
     html = render_markdown(markdown)
     return jsonify({'rendered_html': html})
 
@@ -441,12 +582,15 @@ def revert_translation_version(content_id, language, version_id):
 
     translation.title = version.title
     translation.markdown = version.markdown
-    translation.rendered_html = version.rendered_html
+    # Re-render rather than copying the snapshot's HTML, which may come from an older renderer
+    translation.refresh_derived_fields()
     translation.updated_at = datetime.utcnow()
 
     actor_id = current_user.id if hasattr(current_user, 'id') and current_user.is_authenticated else None
     _snapshot_translation_version(translation, actor_id)
+    mark_embedding_dirty('article_translation', translation.id)
     db.session.commit()
+    schedule_near_duplicate_index('article_translation', translation.id)
 
     return jsonify({"status": "reverted", "translation_id": translation.id, "version_applied": version.version_number}), 200
 
@@ -462,6 +606,7 @@ def _snapshot_translation_version(translation, user_id=None):
         title=translation.title,
         markdown=translation.markdown,
         rendered_html=translation.rendered_html,
+        renderer_version=translation.renderer_version,
         created_by_id=user_id
     )
     db.session.add(version)
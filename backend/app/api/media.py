@@ -3,6 +3,8 @@ from werkzeug.utils import secure_filename
 from app import db
 from app.models import Content, MediaContent, Transcript, User, ArticleTranslation, Tag
 from app.utils.api_access import enforce_read_only_in_public_mode
+from app.tasks.embeddings import mark_embedding_dirty
+from app.tasks.near_duplicates import schedule_near_duplicate_index
 from flask_login import current_user
 import os
 import uuid
@@ -106,6 +108,7 @@ def upload_media():
             is_primary=True
         )
         translation.generate_slug()
+        translation.refresh_derived_fields()
         db.session.add(translation)
 
         # Handle tags
@@ -133,6 +136,7 @@ def upload_media():
             pass  # Ignore tag errors
 
         # Handle transcript
+        transcript = None
         if transcript_text:
             transcript = Transcript(
                 media_id=media.id,
@@ -142,7 +146,14 @@ def upload_media():
             )
             db.session.add(transcript)
 
+        db.session.flush()
+        mark_embedding_dirty('article_translation', translation.id)
+        if transcript:
+            mark_embedding_dirty('transcript', transcript.id)
         db.session.commit()
+        schedule_near_duplicate_index('article_translation', translation.id)
+        if transcript:
+            schedule_near_duplicate_index('transcript', transcript.id)
 
         # TODO: If auto_transcript is True, enqueue transcription task
 
@@ -209,9 +220,10 @@ def create_transcript(media_id):
             is_primary=data.get('is_primary', False)
         )
         db.session.add(transcript)
+        db.session.flush()
 
+    mark_embedding_dirty('transcript', transcript.id)
     db.session.commit()
-
-    # TODO: Enqueue embedding generation task
+    schedule_near_duplicate_index('transcript', transcript.id)
 
     return jsonify(transcript.to_dict()), 201
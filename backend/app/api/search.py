@@ -1,6 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from app import db
-from app.models import Content, ArticleTranslation, Embedding
+from app.models import Content, ArticleTranslation, Embedding, SearchLog
+from app.services import hybrid, semantic
+from app.services.query_cache import normalize_query
+from app.services.search import apply_text_search
+from app.utils.api_access import caller_visibility
+from app.utils.pagination import TOTAL_MODES, InvalidCursor, count_total, keyset_paginate
 
 search_bp = Blueprint('search', __name__)
 
@@ -10,6 +15,15 @@ def search():
     """
     Search content (keyword and semantic)
     GET /api/search?q=python&lang=en&type=article&tags=backend&page=1
+    GET /api/search?q=python&cursor= (keyset mode; follow next_cursor)
+    GET /api/search?q=python&mode=hybrid&rrf_k=60&keyword_weight=1&semantic_weight=1
+
+    total=exact|estimate|none controls the reported total; it defaults to
+    exact in page mode and none in cursor mode.
+
+    mode=hybrid fuses keyword and semantic retrieval (see
+    app.services.hybrid); it pages over the fused candidates and applies the
+    same visibility rules as semantic search.
     """
     query_text = request.args.get('q', '')
     language = request.args.get('lang', 'en')
@@ -17,70 +31,177 @@ def search():
     tags_param = request.args.get('tags')
     page = int(request.args.get('page', 1))
     per_page = min(int(request.args.get('per_page', 20)), 100)
+    cursor = request.args.get('cursor')
+    total_mode = request.args.get('total', 'exact' if cursor is None else 'none')
+    mode = request.args.get('mode', 'keyword')
 
     if not query_text:
         return jsonify({'error': 'Query parameter q is required'}), 400
+    if total_mode not in TOTAL_MODES:
+        return jsonify({'error': f"total must be one of {', '.join(TOTAL_MODES)}"}), 400
+    if mode not in ('keyword', 'hybrid'):
+        return jsonify({'error': 'mode must be keyword or hybrid'}), 400
 
-    # For now, implement simple keyword search
-    # TODO: Implement semantic search with embeddings
+    if mode == 'hybrid':
+        return _hybrid_search(query_text, language, content_type, page, per_page)
 
     # Build query
     query = Content.query
+    rank = None
 
     if content_type:
         query = query.filter_by(type=content_type)
 
     # For articles, search in translations
     if not content_type or content_type == 'article':
-        query = query.join(ArticleTranslation).filter(
-            db.or_(
-                ArticleTranslation.title.ilike(f'%{query_text}%'),
-                ArticleTranslation.markdown.ilike(f'%{query_text}%')
-            ),
-            ArticleTranslation.language == language
-        )
+        query = query.join(ArticleTranslation).filter(ArticleTranslation.language == language)
+        query, rank = apply_text_search(query, query_text, language)
 
     # TODO: Add tag filtering
     if tags_param:
         tag_keys = tags_param.split(',')
         # Implement tag filtering
 
+    # Most relevant first where the database can rank matches; id breaks ties
+    # so the ordering doubles as a keyset
+    order_by = [Content.updated_at, Content.id]
+    if rank is not None:
+        order_by.insert(0, rank)
+
+    if cursor is not None:
+        try:
+            result = keyset_paginate(query, order_by, cursor, per_page, total=total_mode)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+
+        items = [c.to_dict(include_translations=True, language=language) for c in result.items]
+        if not cursor:
+            _log_search(query_text, language, 'keyword', result.total)
+        return jsonify({
+            'items': items,
+            'total': result.total,
+            'per_page': per_page,
+            'next_cursor': result.next_cursor,
+            'query': query_text
+        }), 200
+
     # Paginate
-    pagination = query.distinct().order_by(Content.updated_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    pagination = query.order_by(*[column.desc() for column in order_by]).paginate(
+        page=page, per_page=per_page, error_out=False, count=False
     )
+    pagination.total = count_total(query, total_mode)
 
+    items = [c.to_dict(include_translations=True, language=language) for c in pagination.items]
+    if page == 1:
+        _log_search(query_text, language, 'keyword', pagination.total)
     return jsonify({
-        'items': [c.to_dict(include_translations=True, language=language) for c in pagination.items],
+        'items': items,
         'total': pagination.total,
         'page': page,
         'per_page': per_page,
-        'pages': pagination.pages,
+        'pages': pagination.pages if pagination.total is not None else None,
         'query': query_text
     }), 200
 
 
+def _hybrid_search(query_text, language, content_type, page, per_page):
+    """mode=hybrid branch of search()"""
+    config = current_app.config
+    try:
+        rrf_k = int(request.args.get('rrf_k', config.get('HYBRID_RRF_K', 60)))
+        weights = {
+            name: float(request.args[f'{name}_weight'])
+            for name in hybrid.RETRIEVERS if f'{name}_weight' in request.args
+        }
+    except ValueError:
+        return jsonify({'error': 'rrf_k must be an integer and weights numbers'}), 400
+
+    fused = hybrid.hybrid_search(
+        query_text, language, config.get('HYBRID_CANDIDATES', 100), caller_visibility(), rrf_k, weights
+    )
+
+    query = Content.query.filter(Content.id.in_([r.content_id for r in fused])).options(Content.listing_options())
+    if content_type:
+        query = query.filter(Content.type == content_type)
+    contents = {content.id: content for content in query}
+    fused = [r for r in fused if r.content_id in contents]
+
+    items = []
+    for result in fused[(page - 1) * per_page:page * per_page]:
+        item = contents[result.content_id].to_dict(include_translations=True, language=language)
+        item['score'] = round(result.score, 6)
+        item['scores'] = result.breakdown
+        items.append(item)
+
+    if page == 1:
+        _log_search(query_text, language, 'hybrid', len(fused))
+
+    return jsonify({
+        'items': items,
+        'total': len(fused),
+        'page': page,
+        'per_page': per_page,
+        'pages': (len(fused) + per_page - 1) // per_page,
+        'query': query_text,
+        'mode': 'hybrid'
+    }), 200
+
+
+def _log_search(query_text, language, mode, result_count):
+    """
+    Record a search in search_log; a failed write never fails the search.
+    Commits, so call it after the response items are serialized.
+    """
+    if not current_app.config.get('SEARCH_LOG_ENABLED', True):
+        return
+    db.session.add(SearchLog(
+        query_text=normalize_query(query_text)[:500],
+        language=language,
+        mode=mode,
+        result_count=result_count,
+    ))
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
 @search_bp.route('/semantic', methods=['POST'])
 def semantic_search():
     """
     Semantic search using vector embeddings
     POST /api/search/semantic
-    Body: {"query": "machine learning tutorial", "lang": "en", "limit": 10}
+    Body: {"query": "machine learning tutorial", "lang": "en", "limit": 10,
+           "owner_types": ["article_translation", "transcript"]}
+
+    Anonymous callers and the public service only see public content.
     """
-    data = request.get_json()
+    data = request.get_json() or {}
     query_text = data.get('query')
     language = data.get('lang', 'en')
     limit = min(int(data.get('limit', 10)), 50)
+    owner_types = tuple(data.get('owner_types') or semantic.CONTENT_OWNER_TYPES)
 
     if not query_text:
         return jsonify({'error': 'Query is required'}), 400
-
-    # TODO: Implement semantic search
-    # 1. Generate embedding for query
-    # 2. Search using pgvector similarity
-    # 3. Group by content_id and rank
-
+    if not set(owner_types) <= set(semantic.CONTENT_OWNER_TYPES):
+        return jsonify({'error': f"owner_types must be among {', '.join(semantic.CONTENT_OWNER_TYPES)}"}), 400
+
+    results = semantic.semantic_search(query_text, language, limit, owner_types, caller_visibility())
+
+    items = []
+    for result in results:
+        item = result.content.to_dict(include_translations=True, language=language)
+        item['score'] = round(float(result.score), 6)
+        item['match'] = {
+            'owner_type': result.hit.owner_type,
+            'owner_id': result.hit.owner_id,
+            'chunk_index': result.hit.chunk_index,
+        }
+        items.append(item)
+
+    _log_search(query_text, language, 'semantic', len(items))
     return jsonify({
-        'message': 'Semantic search not yet implemented',
-        'items': []
+        'items': items,
+        'query': query_text
     }), 200
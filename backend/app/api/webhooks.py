@@ -3,6 +3,7 @@ from app import db
 from app.models import Webhook, WebhookEvent
 import secrets
 from app.utils.api_access import enforce_read_only_in_public_mode
+from app.utils.pagination import TOTAL_MODES, InvalidCursor, count_total, keyset_paginate
 
 webhooks_bp = Blueprint('webhooks', __name__)
 
@@ -107,20 +108,43 @@ def get_webhook_events(webhook_id):
     """
     Get webhook delivery history
     GET /api/webhooks/{id}/events?page=1
+    GET /api/webhooks/{id}/events?cursor= (keyset mode; follow next_cursor)
     """
     webhook = Webhook.query.get_or_404(webhook_id)
 
     page = int(request.args.get('page', 1))
     per_page = min(int(request.args.get('per_page', 20)), 100)
+    cursor = request.args.get('cursor')
+    total_mode = request.args.get('total', 'exact' if cursor is None else 'none')
 
-    pagination = WebhookEvent.query.filter_by(webhook_id=webhook_id)\
-        .order_by(WebhookEvent.created_at.desc())\
-        .paginate(page=page, per_page=per_page, error_out=False)
+    if total_mode not in TOTAL_MODES:
+        return jsonify({'error': f"total must be one of {', '.join(TOTAL_MODES)}"}), 400
+
+    query = WebhookEvent.query.filter_by(webhook_id=webhook_id)
+
+    if cursor is not None:
+        try:
+            result = keyset_paginate(
+                query, [WebhookEvent.created_at, WebhookEvent.id], cursor, per_page, total=total_mode
+            )
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'items': [e.to_dict() for e in result.items],
+            'total': result.total,
+            'per_page': per_page,
+            'next_cursor': result.next_cursor
+        }), 200
+
+    pagination = query.order_by(WebhookEvent.created_at.desc(), WebhookEvent.id.desc())\
+        .paginate(page=page, per_page=per_page, error_out=False, count=False)
+    pagination.total = count_total(query, total_mode)
 
     return jsonify({
         'items': [e.to_dict() for e in pagination.items],
         'total': pagination.total,
         'page': page,
         'per_page': per_page,
-        'pages': pagination.pages
+        'pages': pagination.pages if pagination.total is not None else None
     }), 200
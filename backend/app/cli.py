@@ -1,10 +1,13 @@
 """
 Flask CLI commands for administrative tasks
 """
+import os
 import click
 from flask import Flask
+from sqlalchemy import update
 from app import db
-from app.models import User
+from app.models import User, ArticleTranslation
+from app.utils.markdown_renderer import compute_listing_fields, convert_markdown
 
 
 def register_commands(app: Flask):
@@ -53,3 +56,296 @@ def register_commands(app: Flask):
             admin = '(Admin)' if user.is_admin else ''
             click.echo(f'{user.email:30s} | {user.name:20s} | {status} {admin}')
         click.echo('-' * 80)
+
+    @app.cli.command('backfill-listing-fields')
+    @click.option('--batch-size', default=500, show_default=True, help='Rows per batch')
+    @click.option('--all', 'refresh_all', is_flag=True, help='Recompute rows that already have values')
+    def backfill_listing_fields(batch_size, refresh_all):
+        """Populate excerpt, word count, read time and TOC on article translations"""
+        query = db.session.query(
+            ArticleTranslation.id,
+            ArticleTranslation.markdown,
+            ArticleTranslation.updated_at,
+        )
+        if not refresh_all:
+            query = query.filter(ArticleTranslation.word_count.is_(None))
+
+        last_id = ''
+        total = 0
+        while True:
+            rows = (
+                query.filter(ArticleTranslation.id > last_id)
+                .order_by(ArticleTranslation.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                # Uncached: a full pass would evict the live working set
+                _, toc = convert_markdown(row.markdown)
+                updates.append({
+                    'id': row.id,
+                    'toc_json': toc,
+                    'updated_at': row.updated_at,  # not an edit; keep the original timestamp
+                    **compute_listing_fields(row.markdown),
+                })
+
+            # ORM bulk UPDATE by primary key: one executemany per batch
+            db.session.execute(update(ArticleTranslation), updates)
+            db.session.commit()
+
+            last_id = rows[-1].id
+            total += len(rows)
+            click.echo(f'Backfilled {total} translation(s)...')
+
+        click.echo(f'Done. {total} translation(s) updated.')
+
+    @app.cli.command('rerender')
+    @click.option('--table', 'tables', multiple=True,
+                  type=click.Choice(['article_translation', 'article_translation_version']),
+                  help='Limit to one table (repeatable). Default: both')
+    @click.option('--workers', default=os.cpu_count() or 1, show_default=True,
+                  help='Render processes (1 renders in-process)')
+    @click.option('--batch-size', default=200, show_default=True, help='Rows per batch')
+    @click.option('--checkpoint', default='.rerender-checkpoint.json', show_default=True,
+                  help='Checkpoint file used to resume an interrupted run')
+    @click.option('--all', 'rerender_all', is_flag=True,
+                  help='Re-render rows that are already current')
+    def rerender_html(tables, workers, batch_size, checkpoint, rerender_all):
+        """Re-render stored HTML after a markdown/codehilite config change"""
+        from app.services.rerender import rerender
+
+        def progress(table, rows, rate):
+            click.echo(f'{table}: {rows} rows ({rate:.1f} rows/s)')
+
+        report = rerender(
+            tables=tables or None,
+            workers=workers,
+            batch_size=batch_size,
+            checkpoint_path=checkpoint,
+            only_stale=not rerender_all,
+            progress=progress,
+        )
+
+        for table, stats in report.items():
+            click.echo(f"Done {table}: {stats['rows']} rows in {stats['seconds']}s "
+                       f"({stats['rows_per_second']} rows/s)")
+
+    @app.cli.command('embed-backfill')
+    @click.option('--owner-type', 'owner_types', multiple=True,
+                  type=click.Choice(['article_translation', 'transcript']),
+                  help='Limit to one owner type (repeatable). Default: both')
+    @click.option('--workers', default=os.cpu_count() or 1, show_default=True,
+                  help='Chunking processes (1 chunks in-process)')
+    @click.option('--batch-size', default=100, show_default=True, help='Owners per batch')
+    @click.option('--rate', default=0.0, show_default=True,
+                  help='Maximum chunks embedded per second (0: no limit)')
+    @click.option('--checkpoint', default='.embed-backfill-checkpoint.json', show_default=True,
+                  help='Checkpoint file used to resume an interrupted run')
+    def embed_backfill(owner_types, workers, batch_size, rate, checkpoint):
+        """Embed translations and transcripts that have no current-model embeddings"""
+        from app.services.embed_backfill import backfill
+
+        def progress(owner_type, owners, chunks, rate):
+            click.echo(f'{owner_type}: {owners} owners, {chunks} chunks ({rate:.1f} chunks/s)')
+
+        report = backfill(
+            owner_types=owner_types or None,
+            workers=workers,
+            batch_size=batch_size,
+            checkpoint_path=checkpoint,
+            rate=rate,
+            progress=progress,
+        )
+
+        for owner_type, stats in report.items():
+            click.echo(f"Done {owner_type}: {stats['owners']} owners, {stats['chunks']} chunks "
+                       f"in {stats['seconds']}s ({stats['chunks_per_second']} chunks/s)")
+
+    @app.cli.command('vector-index-save')
+    @click.option('--model', default=None,
+                  help='Embedding model to snapshot. Default: the search model')
+    def vector_index_save(model):
+        """Snapshot stored embeddings into the numpy vector index sidecar"""
+        from app.services.embeddings import get_search_provider
+        from app.services.semantic import VECTOR_INDEXES
+
+        index = VECTOR_INDEXES['numpy']
+        model = model or get_search_provider().model
+        path = index.sidecar_path(model)
+        if not path:
+            click.echo('Error: VECTOR_INDEX_PATH is not set.')
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Always rebuilt from the table, never from an older snapshot
+        if os.path.exists(f'{path}.npy'):
+            os.remove(f'{path}.npy')
+        # Snapshots hold full precision; quantized and truncated stores are built from them
+        store = index.load(model, lossy=False)
+        store.save(path)
+        click.echo(f'Saved {len(store)} vector(s) for {model} to {path}.npy')
+
+    def _model_hnsw_indexes(conn, model):
+        """Names of the HNSW indexes built for model"""
+        from sqlalchemy import text
+        from app.services.semantic import hnsw_index_name
+
+        prefix = hnsw_index_name(model, 0).rsplit('_', 1)[0]
+        return conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = 'embedding' AND indexname LIKE :pattern"),
+            {'pattern': prefix.replace('_', '\\_') + '\\_%'},
+        ).scalars().all()
+
+    @app.cli.command('pgvector-index')
+    @click.option('--model', default=None, help='Embedding model to index. Default: the search model')
+    @click.option('--first-pass', type=int, default=None,
+                  help='Leading dimensions to index. Default: VECTOR_FIRST_PASS_DIMENSIONS, else all')
+    @click.option('--quantized/--full', default=None,
+                  help='Index halfvec or float32 vectors. Default: VECTOR_QUANTIZED')
+    def pgvector_index(model, first_pass, quantized):
+        """Build a model's HNSW index and drop the model's other ones"""
+        from sqlalchemy import select, text
+        from app import db
+        from app.models import Embedding
+        from app.services.embeddings import get_search_provider
+        from app.services.semantic import hnsw_index_ddl, hnsw_index_name
+
+        if db.engine.dialect.name != 'postgresql':
+            click.echo('Error: HNSW indexes need PostgreSQL with pgvector.')
+            return
+        provider = get_search_provider()
+        model = model or provider.model
+        dimensions = db.session.scalar(select(Embedding.dim).where(Embedding.model == model).limit(1))
+        if dimensions is None:
+            if model != provider.model:
+                click.echo(f'Error: no embeddings stored for {model}.')
+                return
+            dimensions = provider.dimensions
+        if first_pass is None:
+            first_pass = app.config.get('VECTOR_FIRST_PASS_DIMENSIONS') or dimensions
+        first_pass = min(first_pass, dimensions)
+        if quantized is None:
+            quantized = app.config.get('VECTOR_QUANTIZED', False)
+
+        name = hnsw_index_name(model, first_pass, quantized)
+        click.echo(f'Building {name} for {model}, this can take a while...')
+        with db.engine.begin() as conn:
+            conn.execute(text(hnsw_index_ddl(model, dimensions, first_pass, quantized)))
+            # Only one index per model is searched; keeping others defeats the point
+            dropped = [other for other in _model_hnsw_indexes(conn, model) if other != name]
+            for other in dropped:
+                conn.execute(text(f'DROP INDEX IF EXISTS {other}'))
+        click.echo(f"Done. Dropped {len(dropped)} other index(es) of {model}.")
+
+    @app.cli.command('embedding-models')
+    def embedding_models():
+        """List stored embedding models with their dimensions and coverage"""
+        from sqlalchemy import distinct, func, select
+        from app import db
+        from app.models import Embedding
+        from app.services.embeddings import get_embedding_provider, get_search_provider
+
+        rows = db.session.execute(
+            select(
+                Embedding.model, Embedding.dim, Embedding.owner_type,
+                func.count(), func.count(distinct(Embedding.owner_id)),
+            )
+            .group_by(Embedding.model, Embedding.dim, Embedding.owner_type)
+            .order_by(Embedding.model, Embedding.owner_type)
+        ).all()
+        if not rows:
+            click.echo('No embeddings stored.')
+            return
+
+        roles = {get_embedding_provider().model: 'write'}
+        search_model = get_search_provider().model
+        roles[search_model] = 'write, search' if search_model in roles else 'search'
+        for model, dim, owner_type, count, owners in rows:
+            role = f' [{roles[model]}]' if model in roles else ''
+            click.echo(f'{model} ({dim} dims){role}: {owner_type} {count} chunk(s) of {owners} owner(s)')
+
+    @app.cli.command('embedding-prune')
+    @click.option('--model', required=True, help='Embedding model to delete')
+    @click.option('--batch-size', default=5000, show_default=True, help='Rows deleted per transaction')
+    def embedding_prune(model, batch_size):
+        """Delete a retired model's embeddings and indexes after a cut-over"""
+        from sqlalchemy import delete, select, text
+        from app import db
+        from app.models import Embedding
+        from app.services.embeddings import get_write_providers
+        from app.services.semantic import VECTOR_INDEXES
+
+        if model in {provider.model for provider in get_write_providers()}:
+            click.echo(f'Error: {model} is still written or searched; switch the provider settings first.')
+            return
+
+        deleted = 0
+        while True:
+            # Bulk deletes in short transactions keep locks and WAL bursts small
+            with db.engine.begin() as conn:
+                ids = select(Embedding.id).where(Embedding.model == model).limit(batch_size)
+                count = conn.execute(delete(Embedding).where(Embedding.id.in_(ids.scalar_subquery()))).rowcount
+            deleted += count
+            if count < batch_size:
+                break
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.begin() as conn:
+                for name in _model_hnsw_indexes(conn, model):
+                    conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+        VECTOR_INDEXES['numpy'].invalidate(model)
+        click.echo(f'Deleted {deleted} embedding(s) of {model}.')
+
+    @app.cli.command('related-rebuild')
+    @click.option('--batch-size', default=100, show_default=True, help='Content items per transaction')
+    def related_rebuild(batch_size):
+        """Recompute the related-content neighbor lists of every content item"""
+        from app.services.related import rebuild_related
+
+        def progress(done, total):
+            click.echo(f'{done}/{total} content item(s)')
+
+        report = rebuild_related(batch_size=batch_size, progress=progress)
+        click.echo(f"Done. {report['contents']} item(s): {report['embedding']} list(s) from embeddings, "
+                   f"{report['tags']} from tags.")
+
+    @app.cli.command('near-duplicates-index')
+    @click.option('--owner-type', 'owner_types', multiple=True,
+                  type=click.Choice(['article_translation', 'transcript']),
+                  help='Limit to these owner types (repeatable). Default: all')
+    @click.option('--batch-size', default=500, show_default=True, help='Owners per transaction')
+    @click.option('--all', 'rebuild', is_flag=True, help='Drop the index and rebuild it from scratch')
+    def near_duplicates_index(owner_types, batch_size, rebuild):
+        """Index MinHash signatures of new or changed translations and transcripts"""
+        from app.services.near_duplicates import index_all
+
+        def progress(owner_type, done):
+            click.echo(f'{owner_type}: {done} owner(s)')
+
+        report = index_all(owner_types or ('article_translation', 'transcript'), rebuild, batch_size, progress)
+        click.echo(f"Done. {report['indexed']} indexed, {report['unchanged']} unchanged, "
+                   f"{report['removed']} removed.")
+
+    @app.cli.command('query-cache-warm')
+    @click.option('--limit', default=500, show_default=True, help='Number of top queries to embed')
+    @click.option('--days', default=30, show_default=True, help='Search log window in days')
+    def query_cache_warm(limit, days):
+        """Pre-embed the most frequent logged searches into the query-embedding cache"""
+        from datetime import datetime, timedelta
+        from app.models import SearchLog
+        from app.services import query_cache
+
+        if not app.config.get('QUERY_EMBEDDING_CACHE_REDIS_ENABLED'):
+            click.echo('Warning: QUERY_EMBEDDING_CACHE_REDIS_ENABLED is off; '
+                       'only this process would be warmed.')
+
+        # Keyword-only searches never embed their query
+        top = SearchLog.top_queries(
+            limit, since=datetime.utcnow() - timedelta(days=days), modes=('hybrid', 'semantic')
+        )
+        report = query_cache.warm([(text, language) for text, language, _ in top])
+        click.echo(f"Done. {len(top)} top query(ies): {report['embedded']} embedded, "
+                   f"{report['cached']} already cached.")
@@ -28,6 +28,18 @@ class Config:
     # Redis
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
+    # Rendered markdown cache (in-process LRU + Redis)
+    RENDER_CACHE_MAX_BYTES = int(os.getenv('RENDER_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    RENDER_CACHE_REDIS_ENABLED = os.getenv('RENDER_CACHE_REDIS_ENABLED', 'true').lower() == 'true'
+    RENDER_CACHE_TTL = int(os.getenv('RENDER_CACHE_TTL', 7 * 24 * 3600))
+
+    # Language detection for code blocks without a language:
+    # guess (Pygments, slow) | heuristic (first lines only) | off (plain text)
+    MARKDOWN_GUESS_LANG = os.getenv('MARKDOWN_GUESS_LANG', 'guess').lower()
+
+    # Full-text search backend: auto | postgres | sqlite_fts | like
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto').lower()
+
     # Celery
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1')
@@ -63,8 +75,81 @@ class Config:
     ALLOWED_PUBLICATION_EXTENSIONS = {'pdf', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'txt', 'rtf', 'odt', 'ods', 'odp'}
 
     # Embedding model
-    EMBEDDING_MODEL = 'text-embedding-3-small'
-    EMBEDDING_DIMENSIONS = 1536
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+    EMBEDDING_DIMENSIONS = int(os.getenv('EMBEDDING_DIMENSIONS', 1536))
+    # Embedding provider: local (deterministic, offline) or openai (EMBEDDING_MODEL)
+    EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'local')
+    # Texts per provider call, calls in flight, retries and first backoff (seconds)
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 128))
+    EMBEDDING_MAX_CONCURRENCY = int(os.getenv('EMBEDDING_MAX_CONCURRENCY', 4))
+    EMBEDDING_MAX_RETRIES = int(os.getenv('EMBEDDING_MAX_RETRIES', 5))
+    EMBEDDING_RETRY_BACKOFF = float(os.getenv('EMBEDDING_RETRY_BACKOFF', 1.0))
+    EMBEDDING_REQUEST_TIMEOUT = int(os.getenv('EMBEDDING_REQUEST_TIMEOUT', 30))
+    # Provider, model and dimensions searches use; empty or 0 means the same
+    # as the write settings above. Pointing these at the old model while the
+    # write settings name a new one cuts over online (writes embed with both)
+    EMBEDDING_SEARCH_PROVIDER = os.getenv('EMBEDDING_SEARCH_PROVIDER', '')
+    EMBEDDING_SEARCH_MODEL = os.getenv('EMBEDDING_SEARCH_MODEL', '')
+    EMBEDDING_SEARCH_DIMENSIONS = int(os.getenv('EMBEDDING_SEARCH_DIMENSIONS', 0))
+    # OpenAI-compatible embeddings endpoint
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+    # Chunking for article/transcript embeddings: target tokens per chunk and overlap
+    EMBEDDING_CHUNK_TOKENS = int(os.getenv('EMBEDDING_CHUNK_TOKENS', 400))
+    EMBEDDING_CHUNK_OVERLAP = int(os.getenv('EMBEDDING_CHUNK_OVERLAP', 50))
+    # Mark translations and transcripts for re-embedding when they are written
+    EMBED_ON_WRITE = os.getenv('EMBED_ON_WRITE', 'true').lower() == 'true'
+    # Dirty owners are embedded after this many seconds without a write, or
+    # at the latest this long after their first unembedded write
+    EMBED_QUIET_SECONDS = int(os.getenv('EMBED_QUIET_SECONDS', 60))
+    EMBED_MAX_DELAY_SECONDS = int(os.getenv('EMBED_MAX_DELAY_SECONDS', 600))
+    # Beat interval and owners claimed per run of the drain task
+    EMBED_DRAIN_INTERVAL = int(os.getenv('EMBED_DRAIN_INTERVAL', 30))
+    EMBED_DRAIN_BATCH_SIZE = int(os.getenv('EMBED_DRAIN_BATCH_SIZE', 200))
+
+    # Vector index for semantic search: auto|pgvector|numpy
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'auto')
+    # numpy index: optional sidecar snapshot directory and reload interval (seconds)
+    VECTOR_INDEX_PATH = os.getenv('VECTOR_INDEX_PATH', '')
+    VECTOR_INDEX_TTL = int(os.getenv('VECTOR_INDEX_TTL', 300))
+    # Search compact vectors (pgvector halfvec index, numpy int8) and re-rank
+    # this many candidates per result with the full-precision vectors
+    VECTOR_QUANTIZED = os.getenv('VECTOR_QUANTIZED', 'false').lower() == 'true'
+    VECTOR_RERANK_FACTOR = int(os.getenv('VECTOR_RERANK_FACTOR', 4))
+    # Search only the leading dimensions of Matryoshka embeddings, then re-rank
+    # with all of them; 0 searches every dimension
+    VECTOR_FIRST_PASS_DIMENSIONS = int(os.getenv('VECTOR_FIRST_PASS_DIMENSIONS', 0))
+
+    # Related content: neighbors kept per content item and language, and the
+    # beat interval and items claimed per run of the incremental refresh
+    RELATED_NEIGHBORS = int(os.getenv('RELATED_NEIGHBORS', 20))
+    RELATED_REFRESH_INTERVAL = int(os.getenv('RELATED_REFRESH_INTERVAL', 300))
+    RELATED_REFRESH_BATCH_SIZE = int(os.getenv('RELATED_REFRESH_BATCH_SIZE', 100))
+
+    # Near-duplicate detection: words per shingle, LSH bands x rows per band
+    # (rebuild the index after changing them), the estimated Jaccard
+    # similarity reported as a duplicate, and the check in create_content
+    NEAR_DUPLICATE_SHINGLE_SIZE = int(os.getenv('NEAR_DUPLICATE_SHINGLE_SIZE', 5))
+    NEAR_DUPLICATE_BANDS = int(os.getenv('NEAR_DUPLICATE_BANDS', 16))
+    NEAR_DUPLICATE_ROWS = int(os.getenv('NEAR_DUPLICATE_ROWS', 8))
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', 0.7))
+    NEAR_DUPLICATE_CHECK_ON_CREATE = os.getenv('NEAR_DUPLICATE_CHECK_ON_CREATE', 'true').lower() == 'true'
+
+    # Hybrid search (mode=hybrid): RRF rank offset, retriever weights,
+    # candidates per retriever and retriever threads
+    HYBRID_RRF_K = int(os.getenv('HYBRID_RRF_K', 60))
+    HYBRID_KEYWORD_WEIGHT = float(os.getenv('HYBRID_KEYWORD_WEIGHT', 1.0))
+    HYBRID_SEMANTIC_WEIGHT = float(os.getenv('HYBRID_SEMANTIC_WEIGHT', 1.0))
+    HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', 100))
+    HYBRID_SEARCH_WORKERS = int(os.getenv('HYBRID_SEARCH_WORKERS', 4))
+    # HNSW candidate list size per query (recall vs. latency)
+    HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', 100))
+
+    # Query-embedding cache: LRU entries per worker, shared Redis tier and its TTL
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', 2048))
+    QUERY_EMBEDDING_CACHE_REDIS_ENABLED = os.getenv('QUERY_EMBEDDING_CACHE_REDIS_ENABLED', 'true').lower() == 'true'
+    QUERY_EMBEDDING_CACHE_TTL = int(os.getenv('QUERY_EMBEDDING_CACHE_TTL', 30 * 24 * 3600))
+    # Record searches in search_log (feeds query-cache-warm)
+    SEARCH_LOG_ENABLED = os.getenv('SEARCH_LOG_ENABLED', 'true').lower() == 'true'
 
     # Supported languages
     SUPPORTED_LANGUAGES = ['en', 'de', 'es', 'fr', 'it', 'pt', 'ru', 'zh', 'ja', 'ko']
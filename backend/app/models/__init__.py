@@ -2,8 +2,11 @@ from .content import Content
 from .article import ArticleTranslation, ArticleTranslationVersion
 from .media import MediaContent, Transcript
 from .tag import Tag, TagLabel, ContentTag
-from .embedding import Embedding
+from .embedding import Embedding, EmbeddingDirty
 from .webhook import Webhook, WebhookEvent
+from .search_log import SearchLog
+from .related import ContentNeighbor, ContentNeighborDirty
+from .near_duplicate import NearDuplicateSignature, NearDuplicateBucket
 from .user import User
 
 __all__ = [
@@ -16,7 +19,13 @@ __all__ = [
     'TagLabel',
     'ContentTag',
     'Embedding',
+    'EmbeddingDirty',
     'Webhook',
     'WebhookEvent',
+    'SearchLog',
+    'ContentNeighbor',
+    'ContentNeighborDirty',
+    'NearDuplicateSignature',
+    'NearDuplicateBucket',
     'User',
 ]
@@ -2,7 +2,14 @@ import uuid
 from datetime import datetime
 from slugify import slugify
 from app import db
+from app.utils.markdown_renderer import (
+    RENDERER_FINGERPRINT,
+    compute_listing_fields,
+    render_markdown,
+    render_markdown_with_toc,
+)
 from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
 
 
 class ArticleTranslation(db.Model):
@@ -19,6 +26,16 @@ class ArticleTranslation(db.Model):
     slug = db.Column(db.String(600), nullable=False)
     markdown = db.Column(db.Text, nullable=False)
     rendered_html = db.Column(db.Text)
+    renderer_version = db.Column(db.String(32))  # RENDERER_FINGERPRINT that produced rendered_html
+    # Denormalized listing fields, computed on write so list views can skip markdown
+    excerpt = db.Column(db.Text)
+    word_count = db.Column(db.Integer)
+    read_time_minutes = db.Column(db.Integer)
+    toc_json = db.Column(db.JSON)
+    # Tag text for full-text search, maintained by app.services.search. On
+    # PostgreSQL a generated, GIN-indexed search_vector column is built from
+    # title, search_tags and markdown (see migration e4f7a1c9b362).
+    search_tags = db.Column(db.Text)
     is_primary = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -54,6 +71,49 @@ class ArticleTranslation(db.Model):
                 counter += 1
             self.slug = slug
 
+    @property
+    def is_render_stale(self):
+        """True when rendered_html is missing or came from another renderer config"""
+        return self.rendered_html is None or self.renderer_version != RENDERER_FINGERPRINT
+
+    @property
+    def display_excerpt(self):
+        """
+        Stored excerpt, or '' for rows not yet backfilled by
+        backfill-listing-fields; listings defer markdown, so computing it here
+        would load every row's markdown one query at a time
+        """
+        return self.excerpt or ''
+
+    def refresh_derived_fields(self):
+        """Recompute rendered HTML, TOC and listing fields as part of an edit"""
+        html, toc = render_markdown_with_toc(self.markdown)
+        self.rendered_html = html
+        self.renderer_version = RENDERER_FINGERPRINT
+        self.toc_json = toc
+        for name, value in compute_listing_fields(self.markdown).items():
+            setattr(self, name, value)
+        return html
+
+    def backfill_rendered_html(self):
+        """
+        Render and persist HTML for an unchanged translation.
+        Unlike render(), this is not an edit, so updated_at is left untouched.
+        """
+        html = render_markdown(self.markdown)
+        db.session.execute(
+            db.update(ArticleTranslation)
+            .where(ArticleTranslation.id == self.id)
+            .values(
+                rendered_html=html,
+                renderer_version=RENDERER_FINGERPRINT,
+                updated_at=ArticleTranslation.updated_at,
+            )
+        )
+        set_committed_value(self, 'rendered_html', html)
+        set_committed_value(self, 'renderer_version', RENDERER_FINGERPRINT)
+        return html
+
     def to_dict(self):
         """Serialize to dictionary"""
         return {
@@ -84,6 +144,7 @@ class ArticleTranslationVersion(db.Model):
     title = db.Column(db.String(500), nullable=False)
     markdown = db.Column(db.Text, nullable=False)
     rendered_html = db.Column(db.Text)
+    renderer_version = db.Column(db.String(32))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     created_by_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=True)
 
@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
 from app import db
+from sqlalchemy.orm import selectinload
 
 
 class Content(db.Model):
@@ -23,9 +24,35 @@ class Content(db.Model):
     media = db.relationship('MediaContent', back_populates='content', uselist=False, cascade='all, delete-orphan')
     tags = db.relationship('Tag', secondary='content_tag', back_populates='contents')
 
+    # Keyset pagination indexes (see app.utils.pagination)
+    __table_args__ = (
+        db.Index('idx_content_updated_id', 'updated_at', 'id'),
+        db.Index('idx_content_created_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Content {self.id} type={self.type}>'
 
+    @staticmethod
+    def listing_options():
+        """
+        Loader option for list views: eager-load translations without their
+        large text columns (markdown, rendered_html, toc_json).
+        """
+        from .article import ArticleTranslation
+        return selectinload(Content.translations).load_only(
+            ArticleTranslation.content_id,
+            ArticleTranslation.language,
+            ArticleTranslation.title,
+            ArticleTranslation.slug,
+            ArticleTranslation.is_primary,
+            ArticleTranslation.excerpt,
+            ArticleTranslation.word_count,
+            ArticleTranslation.read_time_minutes,
+            ArticleTranslation.created_at,
+            ArticleTranslation.updated_at,
+        )
+
     def to_dict(self, include_translations=False, language=None):
         """Serialize content to dictionary"""
         data = {
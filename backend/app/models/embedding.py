@@ -15,16 +15,19 @@ class Embedding(db.Model):
     owner_type = db.Column(db.Enum('article_translation', 'transcript', 'tag', name='embedding_owner_type'), nullable=False)
     owner_id = db.Column(db.String(36), nullable=False)  # Foreign key to owner
     language = db.Column(db.String(10), nullable=False)
-    model = db.Column(db.String(100), nullable=False)  # e.g., "text-embedding-3-small"
+    model = db.Column(db.String(100), nullable=False)  # e.g., "text-embedding-3-small@1536"
     dim = db.Column(db.Integer, nullable=False)  # Embedding dimensions
     chunk_index = db.Column(db.Integer, default=0, nullable=False)  # For chunked content
-    vector = db.Column(Vector(1536))  # pgvector column - adjust dimension as needed
+    content_hash = db.Column(db.String(64))  # sha256 of the embedded text; unchanged chunks are not re-embedded
+    vector = db.Column(Vector())  # pgvector column; any dimension, models of different sizes share the table
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Indexes for efficient querying
     __table_args__ = (
         db.Index('idx_embedding_owner', 'owner_type', 'owner_id'),
         db.Index('idx_embedding_language', 'language'),
+        db.Index('idx_embedding_model_language', 'model', 'language', 'owner_type'),
+        # HNSW vector indexes are per model and PostgreSQL-only, see app.services.semantic
     )
 
     def __repr__(self):
@@ -40,5 +43,30 @@ class Embedding(db.Model):
             'model': self.model,
             'dim': self.dim,
             'chunk_index': self.chunk_index,
+            'content_hash': self.content_hash,
             'created_at': self.created_at.isoformat(),
         }
+
+
+class EmbeddingDirty(db.Model):
+    """
+    Owners whose text changed since they were last embedded.
+
+    Writes mark an owner dirty instead of enqueueing a job per save; the
+    drain_embedding_queue beat task embeds owners once they have been quiet
+    for a while, so a burst of autosaves costs one embedding run.
+    """
+    __tablename__ = 'embedding_dirty'
+
+    owner_type = db.Column(db.String(20), primary_key=True)  # article_translation, transcript
+    owner_id = db.Column(db.String(36), primary_key=True)
+    dirty_since = db.Column(db.DateTime, nullable=False)  # first write not yet embedded
+    marked_at = db.Column(db.DateTime, nullable=False)  # latest write
+
+    # Indexes
+    __table_args__ = (
+        db.Index('idx_embedding_dirty_marked', 'marked_at'),
+    )
+
+    def __repr__(self):
+        return f'<EmbeddingDirty {self.owner_type} {self.owner_id}>'
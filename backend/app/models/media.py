@@ -26,6 +26,11 @@ class MediaContent(db.Model):
     content = db.relationship('Content', back_populates='media')
     transcripts = db.relationship('Transcript', back_populates='media', cascade='all, delete-orphan')
 
+    # Keyset pagination index (see app.utils.pagination)
+    __table_args__ = (
+        db.Index('idx_media_content_created_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<MediaContent {self.id} kind={self.kind}>'
 
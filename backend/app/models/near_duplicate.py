@@ -0,0 +1,46 @@
+from datetime import datetime
+from app import db
+
+
+class NearDuplicateSignature(db.Model):
+    """
+    MinHash signature of an article translation or transcript, see
+    app.services.near_duplicates.
+    """
+    __tablename__ = 'near_duplicate_signature'
+
+    owner_type = db.Column(db.String(20), primary_key=True)  # article_translation, transcript
+    owner_id = db.Column(db.String(36), primary_key=True)
+    content_id = db.Column(db.String(36), db.ForeignKey('content.id', ondelete='CASCADE'), nullable=False)
+    language = db.Column(db.String(10), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256 of the indexed text; unchanged text is skipped
+    signature = db.Column(db.LargeBinary, nullable=False)  # uint32 MinHash values
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Indexes
+    __table_args__ = (
+        db.Index('idx_near_duplicate_signature_content', 'content_id'),
+    )
+
+    def __repr__(self):
+        return f'<NearDuplicateSignature {self.owner_type} {self.owner_id}>'
+
+
+class NearDuplicateBucket(db.Model):
+    """
+    LSH bucket membership: one row per band of a signature. Owners sharing
+    a bucket are near-duplicate candidates.
+    """
+    __tablename__ = 'near_duplicate_bucket'
+
+    bucket = db.Column(db.String(16), primary_key=True)  # hash of the band number and its rows
+    owner_type = db.Column(db.String(20), primary_key=True)
+    owner_id = db.Column(db.String(36), primary_key=True)
+
+    # Indexes
+    __table_args__ = (
+        db.Index('idx_near_duplicate_bucket_owner', 'owner_type', 'owner_id'),
+    )
+
+    def __repr__(self):
+        return f'<NearDuplicateBucket {self.bucket} {self.owner_type} {self.owner_id}>'
@@ -0,0 +1,54 @@
+from datetime import datetime
+from app import db
+
+
+class ContentNeighbor(db.Model):
+    """
+    Precomputed related content: the nearest neighbors of a content item in
+    one language, best first.
+
+    Built by the refresh_related_contents task (see app.services.related)
+    so pages never compute similarity per view.
+    """
+    __tablename__ = 'content_neighbor'
+
+    content_id = db.Column(db.String(36), db.ForeignKey('content.id', ondelete='CASCADE'), primary_key=True)
+    language = db.Column(db.String(10), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 0 = most similar
+    neighbor_id = db.Column(db.String(36), db.ForeignKey('content.id', ondelete='CASCADE'), nullable=False)
+    score = db.Column(db.Float, nullable=False)  # cosine similarity or tag Jaccard
+    method = db.Column(db.String(20), nullable=False)  # embedding, tags
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Indexes
+    __table_args__ = (
+        # Lists that mention a changed content item are refreshed with it
+        db.Index('idx_content_neighbor_neighbor', 'neighbor_id'),
+    )
+
+    def __repr__(self):
+        return f'<ContentNeighbor {self.content_id} {self.language}#{self.rank} -> {self.neighbor_id}>'
+
+    def to_dict(self):
+        """Serialize to dictionary"""
+        return {
+            'neighbor_id': self.neighbor_id,
+            'rank': self.rank,
+            'score': self.score,
+            'method': self.method,
+            'computed_at': self.computed_at.isoformat(),
+        }
+
+
+class ContentNeighborDirty(db.Model):
+    """
+    Content items whose embeddings or tags changed since their neighbor
+    lists were computed; drained by the refresh_related_contents beat task.
+    """
+    __tablename__ = 'content_neighbor_dirty'
+
+    content_id = db.Column(db.String(36), primary_key=True)
+    marked_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ContentNeighborDirty {self.content_id}>'
@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import func
+from app import db
+
+
+class SearchLog(db.Model):
+    """
+    One row per search request (first page only), used to find the most
+    frequent queries, e.g. for warming the query-embedding cache.
+    """
+    __tablename__ = 'search_log'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    query_text = db.Column(db.String(500), nullable=False)  # normalize_query() output
+    language = db.Column(db.String(10), nullable=False)
+    mode = db.Column(db.String(20), nullable=False)  # keyword, hybrid, semantic
+    result_count = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Indexes
+    __table_args__ = (
+        db.Index('idx_search_log_created', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<SearchLog {self.query_text!r} lang={self.language}>'
+
+    @classmethod
+    def top_queries(cls, limit=500, since=None, modes=None):
+        """
+        Most frequent (query, language) pairs.
+
+        Args:
+            limit (int): Number of pairs to return
+            since (datetime): Only count searches after this time
+            modes (iterable): Only count searches in these modes
+
+        Returns:
+            list: (query, language, count) tuples, most frequent first
+        """
+        count = func.count(cls.id)
+        query = db.session.query(cls.query_text, cls.language, count)
+        if since is not None:
+            query = query.filter(cls.created_at >= since)
+        if modes is not None:
+            query = query.filter(cls.mode.in_(list(modes)))
+        query = query.group_by(cls.query_text, cls.language).order_by(count.desc(), cls.query_text).limit(limit)
+        return [(text, language, n) for text, language, n in query]
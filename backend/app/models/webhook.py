@@ -59,6 +59,7 @@ class WebhookEvent(db.Model):
     __table_args__ = (
         db.Index('idx_webhook_event_status', 'status'),
         db.Index('idx_webhook_event_type', 'event_type'),
+        db.Index('idx_webhook_event_webhook_created_id', 'webhook_id', 'created_at', 'id'),
     )
 
     def __repr__(self):
@@ -0,0 +1,260 @@
+"""
+Streaming, token-aware chunking of article markdown and transcripts.
+
+Embedding models accept a bounded number of tokens, and retrieval works
+best on passages of a few hundred tokens that start and end at natural
+breaks. The chunkers read their input in fixed-size blocks and yield each
+Chunk as soon as it is complete. No token list is built, so memory stays at
+one block plus one chunk however long the document is.
+
+A chunk ends at the best break among its last tokens, preferring a blank
+line, then a line break or sentence end, then a word boundary; a word is
+only split when nothing else fits. In markdown, headings always start a new
+chunk (and set Chunk.heading), and blank lines inside fenced code are not
+preferred breaks. Consecutive chunks of a section share overlap_tokens
+tokens of context.
+
+Tokens are approximated as word pieces of up to four characters plus
+punctuation marks. That over-counts prose a little compared with BPE
+tokenizers, which keeps chunks under model limits without shipping one.
+Chunk indexes and hashes depend only on the text and the two sizes, so
+re-chunking unchanged text reproduces them.
+"""
+import hashlib
+import re
+from collections import namedtuple
+
+
+Chunk = namedtuple('Chunk', 'chunk_index text token_count content_hash heading')
+
+TOKEN_RE = re.compile(r'\w{1,4}|[^\w\s]')
+
+_MARKDOWN_RE = re.compile(
+    r'(?P<fence>^[ \t]*(?:```|~~~)[^\n]*)'
+    r'|(?P<heading>^#{1,6}[ \t][^\n]*)'
+    r'|(?P<paragraph>\n[ \t]*\n)'
+    r'|(?P<line>\n)'
+    r'|(?P<token>\w{1,4}|[^\w\s])',
+    re.MULTILINE,
+)
+
+_TEXT_RE = re.compile(
+    r'(?P<paragraph>\n[ \t]*\n)'
+    r'|(?P<line>\n)'
+    r'|(?P<token>\w{1,4}|[^\w\s])'
+)
+
+# Characters read per block
+BLOCK_SIZE = 64 * 1024
+
+# Input without whitespace is scanned anyway once this much is pending
+MAX_PENDING = 1024 * 1024
+
+# How good a place the gap before a token is for ending a chunk
+MID_WORD, WORD_BREAK, LINE_BREAK, PARAGRAPH_BREAK = range(4)
+
+_SENTENCE_END = frozenset('.!?')
+
+
+def count_tokens(text):
+    """Approximate token count of text"""
+    return sum(1 for _ in TOKEN_RE.finditer(text))
+
+
+def embedding_inputs(chunks, prefix=''):
+    """
+    Yield (chunk, text, content_hash) per chunk, where text is what gets
+    embedded: the chunk with prefix (e.g. the article title) prepended
+    """
+    for chunk in chunks:
+        text = prefix + chunk.text
+        yield chunk, text, hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def chunk_markdown(source, target_tokens=400, overlap_tokens=50):
+    """
+    Split markdown into chunks at heading, paragraph and sentence breaks.
+
+    Args:
+        source: A string, a file-like object with read(), or an iterable of
+            string blocks
+        target_tokens (int): Maximum tokens per chunk
+        overlap_tokens (int): Tokens repeated from the end of the previous
+            chunk of the same section; under half of target_tokens
+
+    Yields:
+        Chunk: (chunk_index, text, token_count, content_hash, heading)
+    """
+    return _Chunker(_MARKDOWN_RE, target_tokens, overlap_tokens).run(_blocks(source))
+
+
+def chunk_text(source, target_tokens=400, overlap_tokens=50):
+    """
+    Split plain text (transcripts) into chunks at paragraph, line and
+    sentence breaks; arguments as for chunk_markdown
+    """
+    return _Chunker(_TEXT_RE, target_tokens, overlap_tokens).run(_blocks(source))
+
+
+def _blocks(source):
+    if isinstance(source, str):
+        return (source[i:i + BLOCK_SIZE] for i in range(0, len(source), BLOCK_SIZE))
+    if hasattr(source, 'read'):
+        return iter(lambda: source.read(BLOCK_SIZE), '')
+    return iter(source)
+
+
+def _safe_end(buf, start):
+    """End of the part of buf that can be scanned before more input arrives"""
+    # Tokens and line breaks never straddle the start of the last whitespace
+    # run, so everything before it can be scanned now
+    end = max(buf.rfind(' '), buf.rfind('\t'), buf.rfind('\n'))
+    while end > start and buf[end - 1].isspace():
+        end -= 1
+    # Headings and fences are recognized from a line's first word and the
+    # gap after it, so never stop between the two
+    line_start = buf.rfind('\n', 0, end) + 1
+    if end > start and not any(c.isspace() for c in buf[line_start:end].lstrip(' \t')):
+        end = line_start - 1
+        while end > start and buf[end - 1].isspace():
+            end -= 1
+    if end <= start:
+        return len(buf) if len(buf) - start > MAX_PENDING else start
+    return end
+
+
+class _Chunker:
+    """State of one streaming chunking pass"""
+
+    def __init__(self, pattern, target_tokens, overlap_tokens):
+        if target_tokens < 1:
+            raise ValueError('target_tokens must be positive')
+        if not 0 <= overlap_tokens < max(target_tokens // 2, 1):
+            raise ValueError('overlap_tokens must be at least 0 and under half of target_tokens')
+        self.pattern = pattern
+        self.target = target_tokens
+        self.overlap = overlap_tokens
+        self.buf = ''
+        self.base = 0  # absolute offset of buf[0]
+        self.window = []  # (start, end, tokens, break level) per token, absolute offsets
+        self.total = 0  # tokens in window
+        self.fresh = 0  # tokens in window not yet part of an emitted chunk
+        self.pending = MID_WORD  # break level implied by breaks since the last token
+        self.prev_end = 0
+        self.prev_char = ''
+        self.in_fence = False
+        self.heading = None
+        self.index = 0
+        self.ready = []  # chunks completed during the current scan
+
+    def run(self, blocks):
+        scanned = 0
+        for block in blocks:
+            self.buf += block
+            scanned = yield from self._scan(scanned, final=False)
+        yield from self._scan(scanned, final=True)
+        self._flush()
+        yield from self.ready
+
+    def _scan(self, scanned, final):
+        buf, base = self.buf, self.base
+        end = len(buf) if final else _safe_end(buf, scanned - base)
+        for match in self.pattern.finditer(buf, scanned - base, end):
+            # A heading or fence line cut off by the end of the input so far
+            # is scanned again once its line is complete
+            if not final and match.end() == end and match.lastgroup in ('heading', 'fence'):
+                end = match.start()
+                break
+            self._feed(match.lastgroup, match.start() + base, match.end() + base, match.group())
+            if self.ready:
+                yield from self.ready
+                self.ready.clear()
+        scanned = base + end
+
+        # Keep the unemitted window, and one character before the scan
+        # position so '^' still only matches at line starts
+        keep = max(min(self.window[0][0] if self.window else scanned, scanned - 1), base)
+        self.buf = buf[keep - base:]
+        self.base = keep
+        return scanned
+
+    def _feed(self, kind, start, end, text):
+        if kind == 'paragraph':
+            self.pending = WORD_BREAK if self.in_fence else PARAGRAPH_BREAK
+        elif kind == 'line':
+            self.pending = max(self.pending, WORD_BREAK if self.in_fence else LINE_BREAK)
+        elif kind == 'heading' and not self.in_fence:
+            self._flush()
+            self.heading = text.lstrip('#').strip()
+            self._add(start, end, count_tokens(text), PARAGRAPH_BREAK, text)
+        elif kind == 'fence':
+            opening = not self.in_fence
+            level = PARAGRAPH_BREAK if opening else max(self.pending, WORD_BREAK)
+            self.in_fence = opening
+            self._add(start, end, count_tokens(text), level, text)
+            if not opening:
+                self.pending = PARAGRAPH_BREAK
+        else:
+            level = self.pending
+            if start > self.prev_end:
+                level = max(level, LINE_BREAK if self.prev_char in _SENTENCE_END else WORD_BREAK)
+            self._add(start, end, count_tokens(text) if kind == 'heading' else 1, level, text)
+
+    def _add(self, start, end, tokens, level, text):
+        self.window.append((start, end, tokens, level))
+        self.total += tokens
+        self.fresh += tokens
+        self.pending = MID_WORD
+        self.prev_end = end
+        self.prev_char = text[-1]
+        while self.total > self.target and len(self.window) > 1:
+            self.ready.append(self._cut())
+
+    def _cut(self):
+        """Emit a chunk from the head of the window, keeping the overlap"""
+        window = self.window
+        min_tokens = max(self.target // 2, 1)
+        best, best_level, fit = None, MID_WORD, 1
+        count = 0
+        for c in range(1, len(window)):
+            count += window[c - 1][2]
+            if count > self.target:
+                break
+            fit = c
+            # Later cuts win ties, so chunks stay close to the target size
+            if count >= min_tokens and window[c][3] >= best_level and window[c][3] > MID_WORD:
+                best, best_level = c, window[c][3]
+        cut = best or fit
+
+        chunk = self._emit(window[:cut])
+
+        start, count = cut, 0
+        while start > 0 and count + window[start - 1][2] <= self.overlap:
+            start -= 1
+            count += window[start][2]
+        while start < cut and window[start][3] == MID_WORD:
+            start += 1
+
+        self.window = window[start:]
+        self.total = sum(entry[2] for entry in self.window)
+        self.fresh = sum(entry[2] for entry in window[cut:])
+        return chunk
+
+    def _flush(self):
+        """Emit the rest of the window as a chunk, unless it is only overlap"""
+        if self.fresh:
+            self.ready.append(self._emit(self.window))
+        self.window = []
+        self.total = self.fresh = 0
+
+    def _emit(self, entries):
+        text = self.buf[entries[0][0] - self.base:entries[-1][1] - self.base]
+        chunk = Chunk(
+            self.index,
+            text,
+            sum(entry[2] for entry in entries),
+            hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            self.heading,
+        )
+        self.index += 1
+        return chunk
@@ -0,0 +1,276 @@
+"""
+Bulk embedding of article translations and transcripts.
+
+Owners without embeddings for the current model are streamed from a
+server-side cursor in id order, chunked in a process pool, embedded through
+the provider's batched, concurrent embed_stream and written one owner batch
+per transaction. On PostgreSQL (psycopg2) rows are written with a binary
+COPY, elsewhere with a single executemany INSERT; neither builds ORM objects.
+Progress is checkpointed per owner type and model so an interrupted run
+resumes where it stopped.
+
+Rows written here bypass the session, so in-process numpy vector stores of
+the model are dropped afterwards and reload on next use.
+"""
+import io
+import json
+import os
+import struct
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import and_, exists, insert, select
+
+from app import db
+from app.models import ArticleTranslation, Embedding, Transcript
+from app.services.chunking import chunk_markdown, chunk_text, embedding_inputs
+from app.services.embeddings import get_embedding_provider
+from app.services.semantic import VECTOR_INDEXES
+
+
+OWNER_TYPES = ('article_translation', 'transcript')
+
+# Columns written per embedding row, in COPY order
+COLUMNS = (
+    'id', 'owner_type', 'owner_id', 'language', 'model', 'dim',
+    'chunk_index', 'content_hash', 'vector', 'created_at',
+)
+
+_COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+_POSTGRES_EPOCH = datetime(2000, 1, 1)
+
+
+def _source_query(owner_type):
+    if owner_type == 'article_translation':
+        table = ArticleTranslation.__table__
+        return table, select(table.c.id, table.c.language, table.c.markdown, table.c.title)
+    table = Transcript.__table__
+    return table, select(table.c.id, table.c.language, table.c.text)
+
+
+def chunk_batch(owner_type, rows, target_tokens, overlap_tokens):
+    """
+    Chunk a list of owner rows. Runs inside worker processes.
+
+    Returns:
+        list: (owner_id, language, chunk_index, text, content_hash) per chunk
+    """
+    chunks = []
+    for owner_id, language, source, *title in rows:
+        if owner_type == 'article_translation':
+            # Embedded with the title for context, as embed_article_translation does
+            inputs = embedding_inputs(chunk_markdown(source, target_tokens, overlap_tokens), f'{title[0]}\n\n')
+        else:
+            inputs = embedding_inputs(chunk_text(source, target_tokens, overlap_tokens))
+        chunks.extend(
+            (owner_id, language, chunk.chunk_index, text, content_hash)
+            for chunk, text, content_hash in inputs
+        )
+    return chunks
+
+
+def load_checkpoint(path, model):
+    """Return {owner_type: last_id} from a checkpoint written for model"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('model') != model:
+        return {}
+    return data.get('owners', {})
+
+
+def save_checkpoint(path, model, owners):
+    if not path:
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'model': model, 'owners': owners}, f)
+    os.replace(tmp_path, path)
+
+
+def stream_owners(owner_type, model, after_id='', batch_size=100):
+    """Yield lists of owner rows without embeddings for model, in id order"""
+    table, query = _source_query(owner_type)
+    embedded = exists().where(and_(
+        Embedding.owner_type == owner_type,
+        Embedding.owner_id == table.c.id,
+        Embedding.model == model,
+    ))
+    query = query.where(table.c.id > after_id, ~embedded).order_by(table.c.id)
+
+    with db.engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.partitions(batch_size):
+            yield [tuple(row) for row in partition]
+
+
+def _copy_field(value):
+    if value is None:
+        return struct.pack('>i', -1)
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    elif isinstance(value, int):
+        value = struct.pack('>i', value)
+    elif isinstance(value, datetime):
+        delta = value - _POSTGRES_EPOCH
+        value = struct.pack('>q', (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds)
+    else:
+        # pgvector binary format: int16 dim, int16 unused, big-endian float4s
+        vector = np.asarray(value, dtype='>f4')
+        value = struct.pack('>hh', len(vector), 0) + vector.tobytes()
+    return struct.pack('>i', len(value)) + value
+
+
+def copy_payload(rows):
+    """Encode embedding rows (dicts keyed by COLUMNS) as PostgreSQL binary COPY data"""
+    buffer = io.BytesIO()
+    buffer.write(_COPY_SIGNATURE)
+    field_count = struct.pack('>h', len(COLUMNS))
+    for row in rows:
+        buffer.write(field_count)
+        for column in COLUMNS:
+            buffer.write(_copy_field(row[column]))
+    buffer.write(struct.pack('>h', -1))
+    buffer.seek(0)
+    return buffer
+
+
+def write_embeddings(rows):
+    """Insert embedding rows in one transaction: binary COPY on psycopg2, else executemany"""
+    with db.engine.begin() as conn:
+        if conn.dialect.name == 'postgresql' and conn.dialect.driver == 'psycopg2':
+            cursor = conn.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY embedding ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+                    copy_payload(rows),
+                )
+            finally:
+                cursor.close()
+        else:
+            conn.execute(insert(Embedding.__table__), rows)
+
+
+class _RateLimit:
+    """Spaces out items so no more than rate pass per second on average"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.started = time.monotonic()
+        self.count = 0
+
+    def throttle(self, items):
+        for item in items:
+            if self.rate:
+                delay = self.started + self.count / self.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.count += 1
+            yield item
+
+
+def _submit(executor, owner_type, batch, sizes):
+    if executor is None:
+        future = Future()
+        future.set_result(chunk_batch(owner_type, batch, *sizes))
+        return future
+    return executor.submit(chunk_batch, owner_type, batch, *sizes)
+
+
+def backfill(owner_types=None, workers=None, batch_size=100, checkpoint_path=None,
+             rate=0, progress=None):
+    """
+    Embed every owner that has no embeddings for the current model.
+
+    Args:
+        owner_types (list): Names from OWNER_TYPES (default: all)
+        workers (int): Chunking processes; 0 or 1 chunks in-process
+        batch_size (int): Owners per chunk/write batch
+        checkpoint_path (str): File used to resume an interrupted run
+        rate (float): Maximum chunks embedded per second; 0 for no limit
+        progress (callable): Called with (owner_type, owners_done, chunks_done,
+            chunks_per_second)
+
+    Returns:
+        dict: {owner_type: {'owners': int, 'chunks': int, 'seconds': float,
+        'chunks_per_second': float}}
+    """
+    owner_types = list(owner_types or OWNER_TYPES)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    config = current_app.config
+    sizes = (config.get('EMBEDDING_CHUNK_TOKENS', 400), config.get('EMBEDDING_CHUNK_OVERLAP', 50))
+    provider = get_embedding_provider()
+    model = provider.model
+    checkpoint = load_checkpoint(checkpoint_path, model)
+    limit = _RateLimit(rate)
+    # Chunk the next batches while the current one is embedded
+    max_in_flight = max(2, workers * 2)
+    report = {}
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for owner_type in owner_types:
+            started = time.monotonic()
+            owners = chunks = 0
+            pending = deque()
+
+            def drain_one():
+                nonlocal owners, chunks
+                batch, future = pending.popleft()
+                created_at = datetime.utcnow()
+                rows = [
+                    {
+                        'id': str(uuid.uuid4()),
+                        'owner_type': owner_type,
+                        'owner_id': owner_id,
+                        'language': language,
+                        'model': model,
+                        'dim': provider.dimensions,
+                        'chunk_index': chunk_index,
+                        'content_hash': content_hash,
+                        'vector': vector,
+                        'created_at': created_at,
+                    }
+                    for (owner_id, language, chunk_index, _, content_hash), vector
+                    in provider.embed_stream(limit.throttle(future.result()), lambda chunk: chunk[3])
+                ]
+                if rows:
+                    write_embeddings(rows)
+                owners += len(batch)
+                chunks += len(rows)
+                checkpoint[owner_type] = batch[-1][0]
+                save_checkpoint(checkpoint_path, model, checkpoint)
+                if progress:
+                    elapsed = time.monotonic() - started
+                    progress(owner_type, owners, chunks, chunks / elapsed if elapsed else 0.0)
+
+            for batch in stream_owners(owner_type, model, checkpoint.get(owner_type, ''), batch_size):
+                pending.append((batch, _submit(executor, owner_type, batch, sizes)))
+                while len(pending) >= max_in_flight:
+                    drain_one()
+            while pending:
+                drain_one()
+
+            elapsed = time.monotonic() - started
+            report[owner_type] = {
+                'owners': owners,
+                'chunks': chunks,
+                'seconds': round(elapsed, 3),
+                'chunks_per_second': round(chunks / elapsed, 1) if elapsed else 0.0,
+            }
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        VECTOR_INDEXES['numpy'].invalidate(model)
+
+    # A completed run leaves nothing to resume
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return report
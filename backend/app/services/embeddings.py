@@ -0,0 +1,355 @@
+"""
+Text embedding providers.
+
+A provider turns text into L2-normalized float32 vectors of a fixed
+dimension. Stored embeddings record the provider's model key, and queries
+are only compared with vectors of the same key. The key names the dimension
+too (local-hash-<dim>, <model>@<dim>): a model shortened to another
+dimension produces different vectors and needs its own index.
+
+Providers embed in batches of EMBEDDING_BATCH_SIZE texts per call, with up
+to EMBEDDING_MAX_CONCURRENCY calls in flight; one request per chunk is what
+makes backfills slow. Transient failures (rate limits, server errors,
+timeouts) are retried EMBEDDING_MAX_RETRIES times with jittered exponential
+backoff starting at EMBEDDING_RETRY_BACKOFF seconds.
+
+The provider is chosen by the EMBEDDING_PROVIDER setting:
+
+* local - a deterministic feature-hashing embedder: word and character
+  trigram features are projected onto EMBEDDING_DIMENSIONS buckets with a
+  hashed sign, i.e. a sparse random projection. It needs no network or model
+  download, so tests and air-gapped installs get working, if only lexical,
+  semantic search.
+* openai - the OpenAI embeddings API (or a compatible server at
+  OPENAI_BASE_URL) with EMBEDDING_MODEL, requested as base64 float32.
+
+Embeddings of several models live side by side, told apart by
+Embedding.model. New text is embedded with the EMBEDDING_PROVIDER /
+EMBEDDING_MODEL / EMBEDDING_DIMENSIONS profile; searches use the
+EMBEDDING_SEARCH_* profile, which defaults to the same. Setting the search
+profile to the old model while the write profile names a new one is an
+online cut-over: writes embed with both, embed-backfill fills in the new
+model, and clearing the search profile switches searches over.
+"""
+import base64
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+import requests
+from flask import current_app
+
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class EmbeddingError(Exception):
+    """An embedding request failed"""
+
+
+class TransientEmbeddingError(EmbeddingError):
+    """An embedding request failed in a way worth retrying"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingProvider:
+    """Interface for embedding providers"""
+
+    name = None
+
+    def __init__(self, dimensions, batch_size=128, max_concurrency=1, max_retries=3, retry_backoff=1.0):
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def settings(cls, config):
+        """Constructor arguments taken from the app config"""
+        return {
+            'dimensions': config['EMBEDDING_DIMENSIONS'],
+            'batch_size': config.get('EMBEDDING_BATCH_SIZE', 128),
+            'max_concurrency': config.get('EMBEDDING_MAX_CONCURRENCY', 1),
+            'max_retries': config.get('EMBEDDING_MAX_RETRIES', 3),
+            'retry_backoff': config.get('EMBEDDING_RETRY_BACKOFF', 1.0),
+        }
+
+    @property
+    def model(self):
+        """Model key stored in Embedding.model, naming the dimensions as well"""
+        raise NotImplementedError
+
+    def embed_batch(self, texts):
+        """
+        Embed one batch of at most batch_size texts with a single call.
+
+        Raises TransientEmbeddingError for failures worth retrying.
+
+        Returns:
+            numpy.ndarray: float32 array of shape (len(texts), dimensions)
+        """
+        raise NotImplementedError
+
+    def embed(self, texts):
+        """
+        Embed a list of texts.
+
+        Args:
+            texts (list): Strings to embed
+
+        Returns:
+            numpy.ndarray: float32 array of shape (len(texts), dimensions),
+            each row L2-normalized
+        """
+        vectors = [vector for _, vector in self.embed_stream(texts)]
+        if not vectors:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return np.stack(vectors)
+
+    def embed_query(self, text):
+        """Embed a single search query; returns a 1-D float32 array"""
+        return self.embed([text])[0]
+
+    def embed_stream(self, items, text_of=None):
+        """
+        Embed an iterable lazily, batch by batch.
+
+        Items are read batch_size at a time, so a long stream is never held
+        in memory; up to max_concurrency batches are in flight at once.
+
+        Args:
+            items (iterable): Texts, or objects text_of maps to a text
+            text_of (callable): Text for an item; default: the item itself
+
+        Yields:
+            tuple: (item, normalized float32 vector), in input order
+        """
+        text_of = text_of or (lambda item: item)
+        items = iter(items)
+        in_flight = deque()
+        while True:
+            while len(in_flight) < self.max_concurrency:
+                batch = list(islice(items, self.batch_size))
+                if not batch:
+                    break
+                in_flight.append((batch, self._submit([text_of(item) for item in batch])))
+            if not in_flight:
+                return
+            batch, result = in_flight.popleft()
+            yield from zip(batch, result() if callable(result) else result.result())
+
+    def _submit(self, texts):
+        if self.max_concurrency <= 1:
+            # Deferred, so a failing batch raises where it is consumed
+            return lambda: self._embed_with_retry(texts)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix=f'embed-{self.name}',
+                )
+        return self._executor.submit(self._embed_with_retry, texts)
+
+    def _embed_with_retry(self, texts):
+        attempt = 0
+        while True:
+            try:
+                vectors = self.embed_batch(texts)
+                break
+            except TransientEmbeddingError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+                time.sleep(max(delay, e.retry_after or 0))
+                attempt += 1
+
+        vectors = _normalize_rows(vectors)
+        if vectors.shape != (len(texts), self.dimensions):
+            raise EmbeddingError(
+                f'{self.name} returned shape {vectors.shape}, expected ({len(texts)}, {self.dimensions})'
+            )
+        return vectors
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic feature-hashing embedder.
+
+    Each lower-cased word and each character trigram of a word is hashed to
+    a bucket and a sign; a text's vector is the normalized sum of its
+    features. Texts sharing words or word stems end up close, which is
+    enough to exercise the whole semantic search path offline.
+    """
+
+    name = 'local'
+
+    # Trigrams carry less weight than whole words
+    TRIGRAM_WEIGHT = 0.5
+
+    @classmethod
+    def settings(cls, config):
+        # CPU-bound Python; threads would only contend for the GIL
+        return {**super().settings(config), 'max_concurrency': 1}
+
+    @property
+    def model(self):
+        return f'local-hash-{self.dimensions}'
+
+    def _features(self, text):
+        for word in _TOKEN_RE.findall(text.lower()):
+            yield word, 1.0
+            padded = f'<{word}>'
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], self.TRIGRAM_WEIGHT
+
+    def _embed_one(self, text):
+        buckets, weights = [], []
+        for feature, weight in self._features(text):
+            h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+            buckets.append(h % self.dimensions)
+            weights.append(weight if h >> 63 else -weight)
+
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        np.add.at(vector, np.asarray(buckets, dtype=np.intp), np.asarray(weights, dtype=np.float32))
+        return vector
+
+    def embed_batch(self, texts):
+        return np.stack([self._embed_one(text) for text in texts])
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI-compatible /embeddings API"""
+
+    name = 'openai'
+
+    # Status codes worth retrying: rate limits and server-side failures
+    RETRY_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+    def __init__(self, dimensions, model, api_key, base_url='https://api.openai.com/v1', timeout=30, **kwargs):
+        super().__init__(dimensions, **kwargs)
+        self._model = model
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._session = None
+
+    @classmethod
+    def settings(cls, config):
+        return {
+            **super().settings(config),
+            'model': config['EMBEDDING_MODEL'],
+            'api_key': config.get('OPENAI_API_KEY', ''),
+            'base_url': config.get('OPENAI_BASE_URL') or 'https://api.openai.com/v1',
+            'timeout': config.get('EMBEDDING_REQUEST_TIMEOUT', 30),
+        }
+
+    @property
+    def model(self):
+        return f'{self._model}@{self.dimensions}'
+
+    @property
+    def session(self):
+        # One pooled HTTP session per provider; requests sessions are safe
+        # for concurrent simple requests
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers['Authorization'] = f'Bearer {self.api_key}'
+        return self._session
+
+    def embed_batch(self, texts):
+        payload = {'model': self._model, 'input': texts, 'encoding_format': 'base64'}
+        # text-embedding-3 models can shorten their output server-side
+        if self._model.startswith('text-embedding-3'):
+            payload['dimensions'] = self.dimensions
+
+        try:
+            response = self.session.post(f'{self.base_url}/embeddings', json=payload, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise TransientEmbeddingError(str(e)) from e
+
+        if response.status_code in self.RETRY_STATUS:
+            try:
+                retry_after = float(response.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                retry_after = None
+            raise TransientEmbeddingError(
+                f'embedding request failed with {response.status_code}', retry_after=retry_after
+            )
+        if response.status_code != 200:
+            raise EmbeddingError(f'embedding request failed with {response.status_code}: {response.text[:200]}')
+
+        data = sorted(response.json()['data'], key=lambda item: item['index'])
+        return np.stack([
+            np.frombuffer(base64.b64decode(item['embedding']), dtype='<f4') for item in data
+        ])
+
+
+EMBEDDING_PROVIDERS = {
+    provider.name: provider
+    for provider in (LocalEmbeddingProvider, OpenAIEmbeddingProvider)
+}
+
+# Provider instances per (name, settings)
+_providers = {}
+
+
+def get_embedding_provider(name=None, model=None, dimensions=None):
+    """
+    Return the provider that embeds new text: the one named by
+    EMBEDDING_PROVIDER, or by name. model and dimensions override
+    EMBEDDING_MODEL and EMBEDDING_DIMENSIONS; the local provider has no
+    model setting and ignores model.
+    """
+    name = name or current_app.config.get('EMBEDDING_PROVIDER', 'local')
+    try:
+        provider_class = EMBEDDING_PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER '{name}'") from None
+
+    settings = provider_class.settings(current_app.config)
+    if model and 'model' in settings:
+        settings['model'] = model
+    if dimensions:
+        settings['dimensions'] = dimensions
+    key = (name, tuple(sorted(settings.items())))
+    provider = _providers.get(key)
+    if provider is None:
+        provider = _providers[key] = provider_class(**settings)
+    return provider
+
+
+def get_search_provider():
+    """Return the provider whose embeddings searches compare against"""
+    config = current_app.config
+    return get_embedding_provider(
+        config.get('EMBEDDING_SEARCH_PROVIDER') or None,
+        config.get('EMBEDDING_SEARCH_MODEL') or None,
+        config.get('EMBEDDING_SEARCH_DIMENSIONS') or None,
+    )
+
+
+def get_write_providers():
+    """Providers new text is embedded with: the write profile, plus the search profile during a cut-over"""
+    providers = [get_embedding_provider()]
+    search = get_search_provider()
+    if search.model != providers[0].model:
+        providers.append(search)
+    return providers
@@ -0,0 +1,159 @@
+"""
+Hybrid keyword + semantic search with reciprocal rank fusion.
+
+Keyword search finds exact terms (product codes, names) that embeddings
+blur; semantic search finds paraphrases and other-language wording that
+keywords miss. Both retrievers run concurrently, each in its own thread,
+app context and database session, and return ranked content ids. The lists
+are fused with reciprocal rank fusion:
+
+    score(d) = sum over retrievers r of weight_r / (k + rank_r(d))
+
+RRF only looks at ranks, so the incomparable raw scores (ts_rank_cd or
+bm25 against cosine similarity) need no normalization. Each fused result
+keeps its per-retriever rank and raw score for display and debugging.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app import db
+from app.models import ArticleTranslation, Content
+from app.services import semantic
+from app.services.search import apply_text_search
+
+
+RETRIEVERS = ('keyword', 'semantic')
+
+FusedResult = namedtuple('FusedResult', 'content_id score breakdown')
+
+_executor = None
+
+
+def reciprocal_rank_fusion(rankings, k=60, weights=None):
+    """
+    Fuse ranked lists with reciprocal rank fusion.
+
+    Args:
+        rankings (dict): {retriever: [(content_id, raw_score), ...]}, best
+            first; duplicate ids within a list keep their first rank
+        k (int): Rank offset; larger values flatten the head of each list
+        weights (dict): {retriever: weight}, default 1.0 each
+
+    Returns:
+        list: FusedResult tuples, best first; breakdown maps each retriever
+        that found the item to {'rank', 'score'}
+    """
+    weights = weights or {}
+    fused = {}
+    for name, ranking in rankings.items():
+        weight = weights.get(name, 1.0)
+        seen = set()
+        for content_id, raw_score in ranking:
+            if content_id in seen:
+                continue
+            seen.add(content_id)
+            rank = len(seen)
+            entry = fused.setdefault(content_id, [0.0, {}])
+            entry[0] += weight / (k + rank)
+            entry[1][name] = {'rank': rank, 'score': raw_score}
+
+    results = [FusedResult(content_id, score, breakdown) for content_id, (score, breakdown) in fused.items()]
+    # Ties (equal fused score) keep the order in which items were first seen
+    results.sort(key=lambda result: -result.score)
+    return results
+
+
+def keyword_ranking(query_text, language, limit, visibility=None):
+    """Content ids ranked by the full-text backend: [(content_id, rank value or None)]"""
+    query = db.session.query(Content.id).join(ArticleTranslation).filter(
+        ArticleTranslation.language == language
+    )
+    if visibility is not None:
+        query = query.filter(Content.visibility.in_(list(visibility)))
+    query, rank = apply_text_search(query, query_text, language)
+
+    if rank is None:
+        rows = query.order_by(Content.updated_at.desc()).limit(limit)
+        return [(content_id, None) for content_id, in rows]
+    rows = query.add_columns(rank.label('rank')).order_by(rank.desc(), Content.updated_at.desc()).limit(limit)
+    return [(content_id, float(score)) for content_id, score in rows]
+
+
+def semantic_ranking(query_text, language, limit, visibility=None):
+    """Content ids ranked by max chunk similarity: [(content_id, similarity)]"""
+    results = semantic.semantic_search(query_text, language, limit, visibility=visibility)
+    return [(result.content.id, float(result.score)) for result in results]
+
+
+def _can_run_concurrently(engine):
+    # Every connection to an in-memory SQLite database opens a new, empty
+    # database, so worker threads would not see the caller's data
+    return not (engine.dialect.name == 'sqlite' and engine.url.database in (None, '', ':memory:'))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get('HYBRID_SEARCH_WORKERS', 4),
+            thread_name_prefix='hybrid-search',
+        )
+    return _executor
+
+
+def run_retrievers(calls):
+    """
+    Run retriever calls concurrently, each in its own app context.
+
+    Args:
+        calls (dict): {name: (function, args)}
+
+    Returns:
+        dict: {name: result}
+    """
+    if len(calls) < 2 or not _can_run_concurrently(db.engine):
+        return {name: function(*args) for name, (function, args) in calls.items()}
+
+    app = current_app._get_current_object()
+
+    def run(function, args):
+        # A fresh app context gets its own scoped session, removed on exit
+        with app.app_context():
+            return function(*args)
+
+    futures = {name: _get_executor().submit(run, function, args) for name, (function, args) in calls.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def hybrid_search(query_text, language, limit=50, visibility=None, k=None, weights=None):
+    """
+    Rank content by fusing keyword and semantic retrieval.
+
+    Args:
+        query_text (str): User query
+        language (str): Language to search in
+        limit (int): Candidates taken from each retriever (and fused results returned)
+        visibility (iterable): Allowed Content.visibility values, or None for all
+        k (int): RRF rank offset, default HYBRID_RRF_K
+        weights (dict): {'keyword': w, 'semantic': w}, default from
+            HYBRID_KEYWORD_WEIGHT / HYBRID_SEMANTIC_WEIGHT
+
+    Returns:
+        list: FusedResult tuples, best first
+    """
+    config = current_app.config
+    if k is None:
+        k = config.get('HYBRID_RRF_K', 60)
+    weights = {
+        'keyword': config.get('HYBRID_KEYWORD_WEIGHT', 1.0),
+        'semantic': config.get('HYBRID_SEMANTIC_WEIGHT', 1.0),
+        **(weights or {}),
+    }
+
+    rankings = run_retrievers({
+        'keyword': (keyword_ranking, (query_text, language, limit, visibility)),
+        'semantic': (semantic_ranking, (query_text, language, limit, visibility)),
+    })
+    return reciprocal_rank_fusion(rankings, k, weights)[:limit]
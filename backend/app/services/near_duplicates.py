@@ -0,0 +1,331 @@
+"""
+Near-duplicate detection with MinHash signatures and LSH buckets.
+
+Article translations and transcripts are reduced to sets of word shingles
+(NEAR_DUPLICATE_SHINGLE_SIZE consecutive case-folded words). A MinHash
+signature of NEAR_DUPLICATE_BANDS * NEAR_DUPLICATE_ROWS values estimates
+the Jaccard similarity of two shingle sets as the fraction of positions
+where the signatures agree.
+
+The signature is cut into bands of NEAR_DUPLICATE_ROWS values and each band
+is hashed to a bucket key in near_duplicate_bucket. Two texts become
+candidates when they share a bucket in any band, which is likely above a
+similarity of about (1 / bands) ** (1 / rows) (0.71 with 16 x 8) and
+unlikely below it. Only candidates are verified against
+NEAR_DUPLICATE_THRESHOLD, so a lookup reads a few index entries instead of
+comparing the text with the whole corpus.
+
+Copies within one content item count too: a "translation" pasted from
+another language of the same article is reported like any other copy.
+Changing the shingle size or the band layout invalidates stored
+signatures; `flask near-duplicates-index --all` rebuilds them.
+"""
+import hashlib
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, select
+
+from app import db
+from app.models import (
+    ArticleTranslation, Content, MediaContent, NearDuplicateBucket, NearDuplicateSignature, Transcript,
+)
+
+
+WORD_RE = re.compile(r'\w+')
+
+# Permutations are multiply-shift hashes of 64-bit shingle hashes: the high
+# 32 bits of (a * x + b) mod 2 ** 64 with a random odd a. The seed is fixed,
+# stored signatures depend on it.
+_SEED = 20261018
+
+# Shingles hashed and permuted at a time, so a long transcript needs
+# _BLOCK_SIZE x permutations uint64 values of scratch space, not one row per
+# shingle
+_BLOCK_SIZE = 4096
+
+NearDuplicate = namedtuple(
+    'NearDuplicate', 'content owner_type owner_id language matched_owner_type matched_owner_id similarity'
+)
+
+
+def _layout():
+    config = current_app.config
+    return config.get('NEAR_DUPLICATE_BANDS', 16), config.get('NEAR_DUPLICATE_ROWS', 8)
+
+
+@lru_cache(maxsize=4)
+def _permutations(count):
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=count, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=count, dtype=np.uint64, endpoint=True)
+    # Shared between calls
+    a.flags.writeable = False
+    b.flags.writeable = False
+    return a, b
+
+
+def shingles(text, size=None):
+    """Set of size-word shingles of text, case-folded; short texts are one shingle"""
+    size = size or current_app.config.get('NEAR_DUPLICATE_SHINGLE_SIZE', 5)
+    words = WORD_RE.findall((text or '').casefold())
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set, permutations):
+    """MinHash signature (uint32 array of length permutations) of a non-empty shingle set"""
+    a, b = _permutations(permutations)
+    signature = np.full(permutations, np.iinfo(np.uint64).max, dtype=np.uint64)
+    values = np.empty((_BLOCK_SIZE, permutations), dtype=np.uint64)
+    remaining = iter(shingle_set)
+    while True:
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+             for s in islice(remaining, _BLOCK_SIZE)),
+            dtype=np.uint64,
+        )
+        if not len(hashes):
+            break
+        block = values[:len(hashes)]
+        # uint64 arithmetic wraps, which is the mod 2 ** 64
+        np.multiply(hashes[:, None], a[None, :], out=block)
+        np.add(block, b[None, :], out=block)
+        np.right_shift(block, np.uint64(32), out=block)
+        np.minimum(signature, block.min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+
+def band_keys(signature, bands, rows):
+    """One bucket key per band; the band number is hashed in, so equal rows in different bands never collide"""
+    return [
+        hashlib.blake2b(
+            signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8, salt=band.to_bytes(2, 'little'),
+        ).hexdigest()
+        for band in range(bands)
+    ]
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(signature == other))
+
+
+def text_signature(text):
+    """(signature, content_hash) of text, or (None, content_hash) when it has no words"""
+    bands, rows = _layout()
+    shingle_set = shingles(text)
+    content_hash = hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+    if not shingle_set:
+        return None, content_hash
+    return minhash(shingle_set, bands * rows), content_hash
+
+
+def _owner(owner_type, owner_id):
+    """(content_id, language, text) of an article translation or transcript, or None"""
+    if owner_type == 'article_translation':
+        row = db.session.execute(
+            select(ArticleTranslation.content_id, ArticleTranslation.language, ArticleTranslation.markdown)
+            .where(ArticleTranslation.id == owner_id)
+        ).first()
+    else:
+        row = db.session.execute(
+            select(MediaContent.content_id, Transcript.language, Transcript.text)
+            .join(MediaContent, MediaContent.id == Transcript.media_id)
+            .where(Transcript.id == owner_id)
+        ).first()
+    return tuple(row) if row else None
+
+
+def index_owner(owner_type, owner_id):
+    """
+    Store the owner's signature and bucket keys, replacing older ones; an
+    unchanged text is skipped and a deleted owner is dropped from the index.
+    Runs in the caller's transaction.
+
+    Returns:
+        str: 'indexed', 'unchanged' or 'removed'
+    """
+    owner = _owner(owner_type, owner_id)
+    existing = db.session.get(NearDuplicateSignature, (owner_type, owner_id))
+    signature, content_hash = text_signature(owner[2]) if owner else (None, None)
+    if existing is not None and owner is not None and existing.content_hash == content_hash:
+        return 'unchanged'
+
+    db.session.execute(delete(NearDuplicateBucket).where(
+        NearDuplicateBucket.owner_type == owner_type, NearDuplicateBucket.owner_id == owner_id,
+    ))
+    if signature is None:
+        if existing is not None:
+            db.session.delete(existing)
+        return 'removed'
+
+    content_id, language, _ = owner
+    if existing is None:
+        existing = NearDuplicateSignature(owner_type=owner_type, owner_id=owner_id)
+        db.session.add(existing)
+    existing.content_id = content_id
+    existing.language = language
+    existing.content_hash = content_hash
+    existing.signature = signature.tobytes()
+    existing.computed_at = datetime.utcnow()
+    db.session.add_all(
+        NearDuplicateBucket(bucket=key, owner_type=owner_type, owner_id=owner_id)
+        for key in band_keys(signature, *_layout())
+    )
+    return 'indexed'
+
+
+def remove_content(content_id):
+    """
+    Drop the signatures and bucket rows of a content item's texts, e.g.
+    before it is deleted. Runs in the caller's transaction.
+
+    Returns:
+        int: Number of owners removed
+    """
+    owners = db.session.execute(
+        select(NearDuplicateSignature.owner_type, NearDuplicateSignature.owner_id)
+        .where(NearDuplicateSignature.content_id == content_id)
+    ).all()
+    for owner_type in {owner_type for owner_type, _ in owners}:
+        db.session.execute(delete(NearDuplicateBucket).where(
+            NearDuplicateBucket.owner_type == owner_type,
+            NearDuplicateBucket.owner_id.in_([owner_id for kind, owner_id in owners if kind == owner_type]),
+        ))
+    db.session.execute(delete(NearDuplicateSignature).where(NearDuplicateSignature.content_id == content_id))
+    return len(owners)
+
+
+def find_similar(signature, exclude=(), threshold=None, limit=20):
+    """
+    Indexed owners whose text is likely a near duplicate of signature.
+
+    Args:
+        signature (numpy.ndarray): MinHash signature to look up
+        exclude (iterable): (owner_type, owner_id) pairs to leave out
+        threshold (float): Minimum estimated Jaccard similarity
+            (default: NEAR_DUPLICATE_THRESHOLD)
+        limit (int): Number of owners to return
+
+    Returns:
+        list: (NearDuplicateSignature, similarity) pairs, most similar first
+    """
+    if threshold is None:
+        threshold = current_app.config.get('NEAR_DUPLICATE_THRESHOLD', 0.7)
+    exclude = set(exclude)
+    candidates = db.session.execute(
+        select(NearDuplicateBucket.owner_type, NearDuplicateBucket.owner_id)
+        .where(NearDuplicateBucket.bucket.in_(band_keys(signature, *_layout())))
+        .distinct()
+    ).all()
+    candidates = [tuple(candidate) for candidate in candidates if tuple(candidate) not in exclude]
+    if not candidates:
+        return []
+
+    found = []
+    for candidate_type in {owner_type for owner_type, _ in candidates}:
+        ids = [owner_id for owner_type, owner_id in candidates if owner_type == candidate_type]
+        rows = NearDuplicateSignature.query.filter(
+            NearDuplicateSignature.owner_type == candidate_type, NearDuplicateSignature.owner_id.in_(ids),
+        )
+        for row in rows:
+            score = similarity(signature, np.frombuffer(row.signature, dtype=np.uint32))
+            if score >= threshold:
+                found.append((row, score))
+    found.sort(key=lambda pair: (-pair[1], pair[0].owner_id))
+    return found[:limit]
+
+
+def content_duplicates(content_id, threshold=None, limit=20, visibility=None):
+    """
+    Likely near duplicates of any indexed text of a content item, including
+    copies between its own translations.
+
+    Returns:
+        list: NearDuplicate tuples, most similar first, one per other owner
+    """
+    own = NearDuplicateSignature.query.filter_by(content_id=content_id).all()
+
+    best = {}
+    for row in own:
+        own_key = (row.owner_type, row.owner_id)
+        signature = np.frombuffer(row.signature, dtype=np.uint32)
+        for match, score in find_similar(signature, [own_key], threshold, limit):
+            key = (match.owner_type, match.owner_id)
+            # A copy between two of the item's own texts is reported once;
+            # ids are only unique per owner type, so compare whole keys
+            reverse = best.get(own_key)
+            if match.content_id == content_id and reverse is not None and reverse[1] == key:
+                continue
+            if key not in best or score > best[key][2]:
+                best[key] = (match, own_key, score)
+    return _with_contents(best.values(), limit, visibility)
+
+
+def text_duplicates(text, threshold=None, limit=20, visibility=None, exclude_content_id=None):
+    """Likely near duplicates of a text that is not indexed yet, e.g. one being created"""
+    signature, _ = text_signature(text)
+    if signature is None:
+        return []
+    matches = [
+        (match, (None, None), score) for match, score in find_similar(signature, (), threshold, limit)
+        if match.content_id != exclude_content_id
+    ]
+    return _with_contents(matches, limit, visibility)
+
+
+def _with_contents(matches, limit, visibility):
+    matches = sorted(matches, key=lambda match: -match[2])
+    query = Content.query.filter(Content.id.in_({match.content_id for match, _, _ in matches}))
+    if visibility is not None:
+        query = query.filter(Content.visibility.in_(list(visibility)))
+    contents = {content.id: content for content in query.options(Content.listing_options())}
+    return [
+        NearDuplicate(
+            contents[match.content_id], match.owner_type, match.owner_id, match.language, *matched, score
+        )
+        for match, matched, score in matches
+        if match.content_id in contents
+    ][:limit]
+
+
+def index_all(owner_types=('article_translation', 'transcript'), rebuild=False, batch_size=500, progress=None):
+    """
+    Index every article translation and transcript, batch_size per
+    transaction; unchanged texts are skipped unless rebuild is set.
+
+    Returns:
+        dict: {'indexed': n, 'unchanged': n, 'removed': n}
+    """
+    report = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+    if rebuild:
+        db.session.execute(delete(NearDuplicateBucket))
+        db.session.execute(delete(NearDuplicateSignature))
+        db.session.commit()
+
+    for owner_type in owner_types:
+        model = ArticleTranslation if owner_type == 'article_translation' else Transcript
+        owner_ids = db.session.scalars(select(model.id).order_by(model.id)).all()
+        # Signatures of owners deleted since they were indexed
+        stale = db.session.scalars(
+            select(NearDuplicateSignature.owner_id).where(
+                NearDuplicateSignature.owner_type == owner_type,
+                NearDuplicateSignature.owner_id.not_in(select(model.id)),
+            )
+        ).all()
+        for start in range(0, len(owner_ids) + len(stale), batch_size):
+            for owner_id in (owner_ids + stale)[start:start + batch_size]:
+                report[index_owner(owner_type, owner_id)] += 1
+            db.session.commit()
+            if progress:
+                progress(owner_type, min(start + batch_size, len(owner_ids) + len(stale)))
+    return report
@@ -0,0 +1,143 @@
+"""
+Two-tier cache of search query embeddings.
+
+Search traffic is dominated by a few hundred repeated queries, and without a
+cache every semantic or hybrid search pays an embedding call. Like rendered
+markdown (app.utils.render_cache), query vectors are kept in an in-process
+LRU and in Redis, shared by every worker. Keys combine the provider's model
+and dimensions, the language and a hash of the normalized query; values are
+the vector's raw little-endian float32 bytes (6 KiB at 1536 dimensions),
+not JSON lists.
+
+The normalized text is also what gets embedded, so a query's vector does
+not depend on which spelling of it happened to fill the cache first.
+"""
+import hashlib
+import unicodedata
+
+import numpy as np
+
+from app.services.embeddings import get_search_provider
+from app.utils.two_tier_cache import TwoTierCache, setting
+
+
+KEY_PREFIX = 'kms:query-embedding'
+
+# Vectors are stored as little-endian float32 regardless of the host
+VECTOR_DTYPE = np.dtype('<f4')
+
+
+def normalize_query(text):
+    """Canonical form of a query: NFKC, lower case, single spaces"""
+    return ' '.join(unicodedata.normalize('NFKC', text).lower().split())
+
+
+class QueryEmbeddingCache(TwoTierCache):
+    """
+    Query vectors keyed by model, language and normalized text, with an LRU
+    of at most max_entries vectors and a Redis tier.
+    """
+
+    redis_enabled_setting = 'QUERY_EMBEDDING_CACHE_REDIS_ENABLED'
+    ttl_setting = 'QUERY_EMBEDDING_CACHE_TTL'
+
+    def __init__(self, max_entries=None):
+        super().__init__()
+        self._max_entries = max_entries
+
+    @staticmethod
+    def make_key(normalized_text, language, model, dimensions):
+        """Build the cache key for a normalized query"""
+        digest = hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+        return f'{KEY_PREFIX}:{model}:{dimensions}:{language}:{digest}'
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return setting('QUERY_EMBEDDING_CACHE_SIZE') or 0
+
+    def get(self, key, dimensions, record=True):
+        """
+        Return the cached vector for key (read-only float32), or None.
+
+        record=False leaves the hit/miss counters alone (for warm-up lookups).
+        """
+        return self.lookup(key, record, dimensions=dimensions)
+
+    def set(self, key, vector):
+        """Store a vector in both tiers; returns the cached read-only copy"""
+        return self.store(key, vector)
+
+    def stats(self):
+        stats = super().stats()
+        stats['max_entries'] = self.max_entries
+        return stats
+
+    def _budget(self):
+        return self.max_entries
+
+    def _encode(self, vector):
+        return vector.tobytes()
+
+    def _decode(self, data, dimensions):
+        # A value of the wrong size is from a foreign writer; treat it as a miss
+        if len(data) != dimensions * VECTOR_DTYPE.itemsize:
+            return None
+        return np.frombuffer(data, dtype=VECTOR_DTYPE)
+
+    def _prepare(self, vector):
+        # Cached arrays are shared between callers, so they are made read-only
+        vector = np.array(vector, dtype=VECTOR_DTYPE)
+        vector.flags.writeable = False
+        return vector
+
+
+query_cache = QueryEmbeddingCache()
+
+
+def embed_query(text, language, provider=None):
+    """
+    Embed a search query through the cache.
+
+    Args:
+        text (str): Query as typed; normalized before lookup and embedding
+        language (str): Query language (part of the key)
+        provider (EmbeddingProvider): Default: the search provider
+
+    Returns:
+        numpy.ndarray: Read-only normalized float32 vector
+    """
+    provider = provider or get_search_provider()
+    normalized = normalize_query(text)
+    key = query_cache.make_key(normalized, language, provider.model, provider.dimensions)
+    vector = query_cache.get(key, provider.dimensions)
+    if vector is None:
+        vector = query_cache.set(key, provider.embed_query(normalized))
+    return vector
+
+
+def warm(queries, provider=None):
+    """
+    Pre-embed queries that are not cached yet, in provider batches.
+
+    Args:
+        queries (iterable): (text, language) pairs
+        provider (EmbeddingProvider): Default: the search provider
+
+    Returns:
+        dict: {'cached': n already cached, 'embedded': n embedded now}
+    """
+    provider = provider or get_search_provider()
+    cached, missing = 0, []
+    for text, language in queries:
+        normalized = normalize_query(text)
+        key = query_cache.make_key(normalized, language, provider.model, provider.dimensions)
+        if query_cache.get(key, provider.dimensions, record=False) is not None:
+            cached += 1
+        else:
+            missing.append((key, normalized))
+
+    for (key, _), vector in provider.embed_stream(missing, lambda item: item[1]):
+        query_cache.set(key, vector)
+    return {'cached': cached, 'embedded': len(missing)}
@@ -0,0 +1,260 @@
+"""
+Related content from precomputed nearest-neighbor lists.
+
+Each content item keeps its RELATED_NEIGHBORS most similar items per
+language in the content_neighbor table, so article pages and
+GET /api/contents/<id>/related read a short indexed list instead of
+searching vectors on every view.
+
+Neighbors come from the chunk embeddings of the search model: an item's
+chunks in a language are averaged into one normalized vector, which is
+searched in the vector index (app.services.semantic) like a query, and
+every other item scores its best chunk (max-sim). Items without embeddings
+in a language fall back to the Jaccard similarity of their tag sets,
+|A & B| / |A | B|.
+
+Lists are refreshed incrementally. Writes mark content items dirty
+(app.tasks.related.mark_related_dirty); a refresh recomputes the dirty
+items, then the lists that mentioned them and the lists of their new
+neighbors, since those are the lists a change can reorder. Changes do not
+propagate further, so `flask related-rebuild` recomputes everything.
+"""
+from collections import Counter
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, func, or_, select
+
+from app import db
+from app.models import (
+    ArticleTranslation, Content, ContentNeighbor, ContentTag, Embedding, MediaContent, Transcript,
+)
+from app.services.embeddings import get_search_provider
+from app.services.semantic import (
+    CANDIDATES_PER_RESULT, MAX_CANDIDATES, best_hits_by_content, get_vector_index,
+)
+
+
+def _neighbor_limit():
+    return current_app.config.get('RELATED_NEIGHBORS', 20)
+
+
+def content_languages(content_id):
+    """Languages of the item's article translations and transcripts"""
+    translations = select(ArticleTranslation.language).where(ArticleTranslation.content_id == content_id)
+    transcripts = (
+        select(Transcript.language)
+        .join(MediaContent, MediaContent.id == Transcript.media_id)
+        .where(MediaContent.content_id == content_id)
+    )
+    return sorted(set(db.session.scalars(translations.union(transcripts))))
+
+
+def content_vector(content_id, language, model):
+    """
+    Normalized mean of the item's chunk embeddings in language, or None
+    when it has none for model
+    """
+    translations = select(ArticleTranslation.id).where(
+        ArticleTranslation.content_id == content_id, ArticleTranslation.language == language,
+    )
+    transcripts = (
+        select(Transcript.id)
+        .join(MediaContent, MediaContent.id == Transcript.media_id)
+        .where(MediaContent.content_id == content_id, Transcript.language == language)
+    )
+    vectors = db.session.scalars(
+        select(Embedding.vector).where(
+            Embedding.model == model,
+            Embedding.language == language,
+            or_(
+                (Embedding.owner_type == 'article_translation') & Embedding.owner_id.in_(translations),
+                (Embedding.owner_type == 'transcript') & Embedding.owner_id.in_(transcripts),
+            ),
+        )
+    ).all()
+    if not vectors:
+        return None
+
+    mean = np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
+    norm = np.linalg.norm(mean)
+    return mean / norm if norm else None
+
+
+def embedding_neighbors(content_id, language, limit, provider=None, index=None):
+    """
+    Most similar items by chunk embeddings.
+
+    Returns:
+        list: (content_id, similarity) pairs, best first, or None when the
+        item has no embeddings in language
+    """
+    provider = provider or get_search_provider()
+    index = index or get_vector_index()
+    vector = content_vector(content_id, language, provider.model)
+    if vector is None:
+        return None
+
+    # One more result than needed, since the item finds itself first
+    k = min((limit + 1) * CANDIDATES_PER_RESULT, MAX_CANDIDATES)
+    hits = index.search(vector, language, provider.model, k)
+    neighbors = [
+        (neighbor_id, float(hit.similarity))
+        for neighbor_id, hit in best_hits_by_content(hits).items()
+        if neighbor_id != content_id
+    ]
+    return neighbors[:limit]
+
+
+def tag_neighbors(content_id, limit):
+    """
+    Most similar items by tag Jaccard similarity.
+
+    Returns:
+        list: (content_id, similarity) pairs, best first
+    """
+    tags = select(ContentTag.tag_id).where(ContentTag.content_id == content_id).scalar_subquery()
+    size = db.session.scalar(select(func.count()).where(ContentTag.content_id == content_id))
+    if not size:
+        return []
+
+    shared = dict(db.session.execute(
+        select(ContentTag.content_id, func.count())
+        .where(ContentTag.tag_id.in_(tags), ContentTag.content_id != content_id)
+        .group_by(ContentTag.content_id)
+    ).all())
+    if not shared:
+        return []
+    sizes = Counter(db.session.scalars(
+        select(ContentTag.content_id).where(ContentTag.content_id.in_(list(shared)))
+    ))
+
+    neighbors = [
+        (neighbor_id, count / (size + sizes[neighbor_id] - count))
+        for neighbor_id, count in shared.items()
+    ]
+    # Ties are broken by id so rebuilds produce the same lists
+    neighbors.sort(key=lambda neighbor: (-neighbor[1], neighbor[0]))
+    return neighbors[:limit]
+
+
+def compute_neighbors(content_id, provider=None, index=None):
+    """
+    Neighbor lists of one item, for every language it is available in.
+
+    Returns:
+        list: Unsaved ContentNeighbor rows
+    """
+    limit = _neighbor_limit()
+    rows = []
+    for language in content_languages(content_id):
+        neighbors, method = embedding_neighbors(content_id, language, limit, provider, index), 'embedding'
+        if neighbors is None:
+            neighbors, method = tag_neighbors(content_id, limit), 'tags'
+        rows.extend(
+            ContentNeighbor(
+                content_id=content_id, language=language, rank=rank,
+                neighbor_id=neighbor_id, score=score, method=method,
+            )
+            for rank, (neighbor_id, score) in enumerate(neighbors)
+        )
+    return rows
+
+
+def refresh_neighbors(content_ids):
+    """
+    Replace the neighbor lists of content_ids; ids of deleted items just
+    lose their lists.
+
+    Returns:
+        dict: {'contents': n, 'embedding': lists, 'tags': lists}
+    """
+    provider = get_search_provider()
+    index = get_vector_index()
+    existing = set(db.session.scalars(select(Content.id).where(Content.id.in_(list(content_ids)))))
+
+    report = {'contents': 0, 'embedding': 0, 'tags': 0}
+    for content_id in content_ids:
+        db.session.execute(delete(ContentNeighbor).where(ContentNeighbor.content_id == content_id))
+        if content_id not in existing:
+            continue
+        rows = compute_neighbors(content_id, provider, index)
+        db.session.add_all(rows)
+        report['contents'] += 1
+        for row in rows:
+            if row.rank == 0:
+                report[row.method] += 1
+    db.session.commit()
+    return report
+
+
+def refresh_related(content_ids):
+    """
+    Refresh the lists of changed items and of the items whose lists they
+    can change: those that listed them before, and their new neighbors.
+
+    Returns:
+        dict: refresh_neighbors counts, with 'changed' for len(content_ids)
+    """
+    changed = list(dict.fromkeys(content_ids))
+    if not changed:
+        return {'changed': 0, 'contents': 0, 'embedding': 0, 'tags': 0}
+    listed_by = set(db.session.scalars(
+        select(ContentNeighbor.content_id).where(ContentNeighbor.neighbor_id.in_(changed))
+    ))
+
+    report = refresh_neighbors(changed)
+    new_neighbors = set(db.session.scalars(
+        select(ContentNeighbor.neighbor_id).where(ContentNeighbor.content_id.in_(changed))
+    ))
+    affected = sorted((listed_by | new_neighbors) - set(changed))
+    if affected:
+        for key, count in refresh_neighbors(affected).items():
+            report[key] += count
+    return {'changed': len(changed), **report}
+
+
+def rebuild_related(batch_size=100, progress=None):
+    """
+    Recompute the neighbor lists of every content item, batch_size items
+    per transaction.
+
+    Returns:
+        dict: refresh_neighbors counts summed over all items
+    """
+    report = {'contents': 0, 'embedding': 0, 'tags': 0}
+    content_ids = db.session.scalars(select(Content.id).order_by(Content.id)).all()
+    for start in range(0, len(content_ids), batch_size):
+        for key, count in refresh_neighbors(content_ids[start:start + batch_size]).items():
+            report[key] += count
+        if progress:
+            progress(report['contents'], len(content_ids))
+    # Lists of items deleted since the last build
+    db.session.execute(delete(ContentNeighbor).where(~ContentNeighbor.content_id.in_(select(Content.id))))
+    db.session.commit()
+    return report
+
+
+def related_contents(content_id, language, limit=None, visibility=None):
+    """
+    The item's precomputed neighbors in language.
+
+    Args:
+        content_id (str): Content item
+        language (str): Language of the list
+        limit (int): Number of items (default: RELATED_NEIGHBORS)
+        visibility (iterable): Allowed Content.visibility values, or None for all
+
+    Returns:
+        list: (Content, ContentNeighbor) pairs, best first
+    """
+    query = (
+        db.session.query(Content, ContentNeighbor)
+        .join(ContentNeighbor, ContentNeighbor.neighbor_id == Content.id)
+        .filter(ContentNeighbor.content_id == content_id, ContentNeighbor.language == language)
+        .options(Content.listing_options())
+        .order_by(ContentNeighbor.rank)
+    )
+    if visibility is not None:
+        query = query.filter(Content.visibility.in_(list(visibility)))
+    return query.limit(limit or _neighbor_limit()).all()
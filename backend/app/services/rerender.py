@@ -0,0 +1,158 @@
+"""
+Bulk re-rendering of stored article HTML.
+
+Rows are streamed from a server-side cursor, rendered in a process pool and
+written back with one executemany UPDATE per batch. Progress is checkpointed
+per table so an interrupted run resumes where it stopped.
+"""
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from sqlalchemy import bindparam, or_, select, update
+
+from app import db
+from app.models import ArticleTranslation, ArticleTranslationVersion
+from app.utils.markdown_renderer import RENDERER_FINGERPRINT, convert_markdown
+
+
+TABLES = {
+    'article_translation': ArticleTranslation.__table__,
+    'article_translation_version': ArticleTranslationVersion.__table__,
+}
+
+
+def render_batch(rows):
+    """Render a list of (id, markdown) rows. Runs inside worker processes."""
+    return [(row_id, *convert_markdown(markdown_text)) for row_id, markdown_text in rows]
+
+
+def load_checkpoint(path):
+    """Return {table: last_id} from a checkpoint written for the current renderer"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('renderer_version') != RENDERER_FINGERPRINT:
+        return {}
+    return data.get('tables', {})
+
+
+def save_checkpoint(path, tables):
+    if not path:
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'renderer_version': RENDERER_FINGERPRINT, 'tables': tables}, f)
+    os.replace(tmp_path, path)
+
+
+def stream_batches(table, after_id='', only_stale=True, batch_size=200):
+    """Yield lists of (id, markdown) in id order from a server-side cursor"""
+    query = select(table.c.id, table.c.markdown).where(table.c.id > after_id).order_by(table.c.id)
+    if only_stale:
+        query = query.where(or_(
+            table.c.renderer_version.is_(None),
+            table.c.renderer_version != RENDERER_FINGERPRINT,
+        ))
+
+    with db.engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.partitions(batch_size):
+            yield [tuple(row) for row in partition]
+
+
+def write_batch(table, rendered):
+    """Write rendered (id, html, toc) rows back with a single executemany"""
+    values = {
+        'rendered_html': bindparam('b_html'),
+        'renderer_version': RENDERER_FINGERPRINT,
+    }
+    if 'toc_json' in table.c:
+        values['toc_json'] = bindparam('b_toc', type_=table.c.toc_json.type)
+    if 'updated_at' in table.c:
+        # A re-render is not an edit: keep the timestamp instead of firing onupdate
+        values['updated_at'] = table.c.updated_at
+
+    stmt = update(table).where(table.c.id == bindparam('b_id')).values(**values)
+    params = [{'b_id': row_id, 'b_html': html, 'b_toc': toc} for row_id, html, toc in rendered]
+    with db.engine.begin() as conn:
+        conn.execute(stmt, params)
+
+
+def _submit(executor, batch):
+    if executor is None:
+        future = Future()
+        future.set_result(render_batch(batch))
+        return future
+    return executor.submit(render_batch, batch)
+
+
+def rerender(tables=None, workers=None, batch_size=200, checkpoint_path=None,
+             only_stale=True, progress=None):
+    """
+    Re-render stored HTML for the given tables.
+
+    Args:
+        tables (list): Table names from TABLES (default: all)
+        workers (int): Worker processes; 0 or 1 renders in-process
+        batch_size (int): Rows per render/write batch
+        checkpoint_path (str): File used to resume an interrupted run
+        only_stale (bool): Skip rows already rendered by the current renderer
+        progress (callable): Called with (table, rows_done, rows_per_second)
+
+    Returns:
+        dict: {table: {'rows': int, 'seconds': float, 'rows_per_second': float}}
+    """
+    tables = list(tables or TABLES)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    checkpoint = load_checkpoint(checkpoint_path)
+    # Keep the pool busy without buffering the whole table in memory
+    max_in_flight = max(2, workers * 2)
+    report = {}
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for name in tables:
+            table = TABLES[name]
+            started = time.monotonic()
+            done = 0
+            pending = deque()
+
+            def drain_one():
+                nonlocal done
+                last_id, future = pending.popleft()
+                rendered = future.result()
+                write_batch(table, rendered)
+                done += len(rendered)
+                checkpoint[name] = last_id
+                save_checkpoint(checkpoint_path, checkpoint)
+                if progress:
+                    elapsed = time.monotonic() - started
+                    progress(name, done, done / elapsed if elapsed else 0.0)
+
+            batches = stream_batches(table, checkpoint.get(name, ''), only_stale, batch_size)
+            for batch in batches:
+                pending.append((batch[-1][0], _submit(executor, batch)))
+                while len(pending) >= max_in_flight:
+                    drain_one()
+            while pending:
+                drain_one()
+
+            elapsed = time.monotonic() - started
+            report[name] = {
+                'rows': done,
+                'seconds': round(elapsed, 3),
+                'rows_per_second': round(done / elapsed, 1) if elapsed else 0.0,
+            }
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # A completed run leaves nothing to resume
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return report
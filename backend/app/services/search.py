@@ -0,0 +1,424 @@
+"""
+Full-text search over article translations.
+
+Search goes through a pluggable backend chosen by the SEARCH_BACKEND setting
+(default 'auto', which picks by database dialect):
+
+* postgres - a generated, weighted tsvector (title A, tags B, body C) built
+  with the text search configuration of the row's language and indexed with
+  GIN; queries are parsed with websearch_to_tsquery, ranked with ts_rank_cd.
+* sqlite_fts - an FTS5 external-content table over the same three columns,
+  kept in sync by triggers and ranked with weighted bm25.
+* like - unranked substring matching, for databases without either.
+
+Every backend restricts a query joined to ArticleTranslation and returns a
+rank expression where higher means more relevant (or None when unranked),
+so callers order results the same way whichever backend is active.
+
+Tags live in another table, which a generated column or an external-content
+FTS table cannot read, so their text is denormalized into
+article_translation.search_tags and kept current by a before_flush hook
+that follows changes to content tags, tags and their localized labels.
+"""
+import re
+
+from flask import current_app
+from sqlalchemy import (
+    DDL, String, and_, case, cast, column, event, func, inspect, literal, literal_column, null, or_,
+    select, table, union_all,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR, websearch_to_tsquery
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import ArticleTranslation, Content, ContentTag, Tag, TagLabel
+
+
+# PostgreSQL text search configuration per supported language. Languages
+# without a stemmer (zh, ja, ko) use 'simple'. The generated column in
+# migration e4f7a1c9b362 uses the same mapping; change both together.
+TEXT_SEARCH_CONFIGS = {
+    'en': 'english',
+    'de': 'german',
+    'es': 'spanish',
+    'fr': 'french',
+    'it': 'italian',
+    'pt': 'portuguese',
+    'ru': 'russian',
+}
+
+# Not mapped on the model: the column only exists on PostgreSQL
+SEARCH_VECTOR = literal_column('article_translation.search_vector', TSVECTOR)
+
+
+def text_search_config(language):
+    """Return the PostgreSQL text search configuration for a language code"""
+    return TEXT_SEARCH_CONFIGS.get(language, 'simple')
+
+
+class SearchBackend:
+    """Interface for full-text search backends"""
+
+    name = None
+
+    def apply(self, query, text, language):
+        """
+        Restrict a query joined to ArticleTranslation to translations matching text.
+
+        Args:
+            query: Query already joined to ArticleTranslation
+            text (str): User search input (websearch syntax: "quoted phrases", -exclusions, or)
+            language (str): Language code of the translations being searched,
+                or None to match each translation in its own language
+
+        Returns:
+            tuple: (query, rank) where rank is an expression ordering better
+            matches higher, or None when the backend cannot rank
+        """
+        raise NotImplementedError
+
+    def is_available(self, engine):
+        """True when the database behind engine has what this backend needs"""
+        return True
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Generated tsvector column with a GIN index"""
+
+    name = 'postgres'
+
+    def apply(self, query, text, language):
+        if language is None:
+            return self._apply_any_language(query, text)
+        tsquery = websearch_to_tsquery(text_search_config(language), text)
+        query = query.filter(SEARCH_VECTOR.bool_op('@@')(tsquery))
+        return query, func.ts_rank_cd(SEARCH_VECTOR, tsquery)
+
+    @staticmethod
+    def _apply_any_language(query, text):
+        # Each row's vector was built with its language's configuration, so
+        # the query must be parsed with the same one. One constant tsquery per
+        # configuration keeps every branch usable by the GIN index.
+        language = ArticleTranslation.language
+        branches = [
+            and_(language == code, SEARCH_VECTOR.bool_op('@@')(websearch_to_tsquery(config, text)))
+            for code, config in TEXT_SEARCH_CONFIGS.items()
+        ]
+        branches.append(and_(
+            language.notin_(list(TEXT_SEARCH_CONFIGS)),
+            SEARCH_VECTOR.bool_op('@@')(websearch_to_tsquery('simple', text)),
+        ))
+        row_config = case(
+            *((language == code, cast(literal(config), REGCONFIG)) for code, config in TEXT_SEARCH_CONFIGS.items()),
+            else_=cast(literal('simple'), REGCONFIG),
+        )
+        return query.filter(or_(*branches)), func.ts_rank_cd(SEARCH_VECTOR, websearch_to_tsquery(row_config, text))
+
+    def is_available(self, engine):
+        return engine.dialect.name == 'postgresql'
+
+
+FTS_TABLE = 'article_translation_fts'
+
+# bm25 column weights for title, search_tags, markdown; the same 1 : 0.4 : 0.2
+# ratio as the A/B/C weights ts_rank_cd applies on PostgreSQL
+FTS_WEIGHTS = (10.0, 4.0, 2.0)
+
+# The FTS index is keyed on a rowid; article_translation's implicit rowid is
+# not stable (VACUUM may renumber it, its primary key is a string), so each
+# translation gets an explicit INTEGER PRIMARY KEY in FTS_KEY_TABLE and the
+# index reads its external content through FTS_SOURCE_VIEW.
+FTS_KEY_TABLE = 'article_translation_fts_key'
+FTS_SOURCE_VIEW = 'article_translation_fts_source'
+
+_fts = table(FTS_TABLE, column('rowid'), column(FTS_TABLE))
+_fts_key = table(FTS_KEY_TABLE, column('search_rowid'), column('translation_id'))
+
+_FTS_ROWID = f'(SELECT search_rowid FROM {FTS_KEY_TABLE} WHERE translation_id = {{}}.id)'
+
+# External-content FTS5 index over article_translation plus the triggers that
+# keep it in sync. Updates only reindex when a searched column changes.
+SQLITE_FTS_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {FTS_KEY_TABLE} (
+        search_rowid INTEGER PRIMARY KEY,
+        translation_id VARCHAR(36) NOT NULL UNIQUE
+    )""",
+    f"""CREATE VIEW IF NOT EXISTS {FTS_SOURCE_VIEW} AS
+        SELECT k.search_rowid, t.title, t.search_tags, t.markdown
+        FROM {FTS_KEY_TABLE} k JOIN article_translation t ON t.id = k.translation_id""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, search_tags, markdown,
+        content='{FTS_SOURCE_VIEW}', content_rowid='search_rowid',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON article_translation BEGIN
+        INSERT INTO {FTS_KEY_TABLE}(translation_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, title, search_tags, markdown)
+        VALUES ({_FTS_ROWID.format('new')}, new.title, new.search_tags, new.markdown);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON article_translation BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_tags, markdown)
+        VALUES ('delete', {_FTS_ROWID.format('old')}, old.title, old.search_tags, old.markdown);
+        DELETE FROM {FTS_KEY_TABLE} WHERE translation_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, search_tags, markdown ON article_translation BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_tags, markdown)
+        VALUES ('delete', {_FTS_ROWID.format('old')}, old.title, old.search_tags, old.markdown);
+        INSERT INTO {FTS_TABLE}(rowid, title, search_tags, markdown)
+        VALUES ({_FTS_ROWID.format('new')}, new.title, new.search_tags, new.markdown);
+    END""",
+]
+
+_FTS_TOKEN_RE = re.compile(r'(-?)"([^"]*)"?|(\S+)')
+
+
+def fts5_query(text):
+    """
+    Translate websearch-style input into a safe FTS5 query.
+
+    Words and "quoted phrases" are ANDed, 'or' between two terms ORs them and
+    a leading '-' excludes a term. Every term is quoted, so FTS5 operators and
+    punctuation in the input are matched literally instead of raising errors.
+
+    Returns:
+        str: The FTS5 query, or '' when the input has no positive terms
+    """
+    positive = []
+    excluded = []
+    pending_or = False
+    for match in _FTS_TOKEN_RE.finditer(text):
+        negate, phrase, word = match.group(1), match.group(2), match.group(3)
+        if word is not None:
+            if word.lower() == 'or':
+                pending_or = bool(positive)
+                continue
+            negate, phrase = word.startswith('-'), word.lstrip('-')
+
+        terms = phrase.replace('"', ' ').split()
+        if not terms:
+            continue
+        quoted = '"' + ' '.join(terms) + '"'
+        if negate:
+            excluded.append(quoted)
+        elif pending_or:
+            positive[-1] = f'({positive[-1]} OR {quoted})'
+        else:
+            positive.append(quoted)
+        pending_or = False
+
+    if not positive:
+        return ''
+    expression = ' AND '.join(positive)
+    for term in excluded:
+        expression = f'{expression} NOT {term}'
+    return expression
+
+
+class SqliteFtsSearchBackend(SearchBackend):
+    """FTS5 external-content table, ranked with weighted bm25"""
+
+    name = 'sqlite_fts'
+
+    def apply(self, query, text, language):
+        expression = fts5_query(text)
+        if not expression:
+            return query.filter(db.false()), None
+
+        query = (
+            query.join(_fts_key, _fts_key.c.translation_id == literal_column('article_translation.id'))
+            .join(_fts, _fts.c.rowid == _fts_key.c.search_rowid)
+            .filter(_fts.c[FTS_TABLE].op('MATCH')(expression))
+        )
+        # bm25 scores better matches lower; negate to share the ordering
+        return query, -func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS)
+
+    def is_available(self, engine):
+        return engine.dialect.name == 'sqlite' and inspect(engine).has_table(FTS_TABLE)
+
+
+class LikeSearchBackend(SearchBackend):
+    """Unranked substring matching; scans every row"""
+
+    name = 'like'
+
+    def apply(self, query, text, language):
+        pattern = f'%{text}%'
+        query = query.filter(or_(
+            ArticleTranslation.title.ilike(pattern),
+            ArticleTranslation.markdown.ilike(pattern),
+            ArticleTranslation.search_tags.ilike(pattern),
+        ))
+        return query, None
+
+
+SEARCH_BACKENDS = {
+    backend.name: backend
+    for backend in (PostgresSearchBackend(), SqliteFtsSearchBackend(), LikeSearchBackend())
+}
+
+# Resolved 'auto' backends per engine, so table checks run once per process
+_auto_backends = {}
+
+
+def get_search_backend():
+    """
+    Return the configured search backend.
+
+    SEARCH_BACKEND may name a backend directly or be 'auto', which uses the
+    first backend available on the bound database and falls back to 'like'.
+    """
+    setting = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if setting != 'auto':
+        try:
+            return SEARCH_BACKENDS[setting]
+        except KeyError:
+            raise ValueError(f"Unknown SEARCH_BACKEND '{setting}'") from None
+
+    engine = db.session.get_bind()
+    backend = _auto_backends.get(engine)
+    if backend is None:
+        backend = next(
+            (b for b in SEARCH_BACKENDS.values() if b.name != 'like' and b.is_available(engine)),
+            SEARCH_BACKENDS['like'],
+        )
+        _auto_backends[engine] = backend
+    return backend
+
+
+def apply_text_search(query, text, language):
+    """Apply the configured backend's search; see SearchBackend.apply"""
+    return get_search_backend().apply(query, text, language)
+
+
+# Tags listed in the search sidebar, most frequent first
+FACET_TAG_LIMIT = 20
+
+
+def search_facets(matches, language, tag_limit=FACET_TAG_LIMIT):
+    """
+    Count search matches per content type, tag and language in one query.
+
+    Args:
+        matches: Query of (Content.id, Content.type, ArticleTranslation.language)
+            rows with the search and tag filters applied but not restricted
+            to one language or content type; the search must match each
+            translation in its own language (apply_text_search with None)
+        language (str): Language the type and tag counts are taken for
+        tag_limit (int): Number of tags to return
+
+    Returns:
+        dict: {'type': {type: count}, 'tag': [{'key', 'label', 'count'}, ...],
+        'language': {language: count}}
+    """
+    m = matches.cte('matches')
+    in_language = m.c.language == language
+
+    by_type = (
+        # value is cast so the union does not take on the content_type enum
+        select(literal('type').label('facet'), cast(m.c.type, String).label('value'),
+               cast(null(), String).label('label'), func.count().label('count'))
+        .where(in_language)
+        .group_by(m.c.type)
+    )
+    by_tag = (
+        select(literal('tag'), Tag.key, Tag.default_label, func.count())
+        .select_from(m.join(ContentTag, ContentTag.content_id == m.c.id).join(Tag, Tag.id == ContentTag.tag_id))
+        .where(in_language)
+        .group_by(Tag.key, Tag.default_label)
+    )
+    by_language = (
+        select(literal('language'), m.c.language, cast(null(), String), func.count())
+        .group_by(m.c.language)
+    )
+
+    facets = {'type': {}, 'tag': [], 'language': {}}
+    for facet, value, label, count in db.session.execute(union_all(by_type, by_tag, by_language)):
+        if facet == 'tag':
+            facets['tag'].append({'key': value, 'label': label, 'count': count})
+        else:
+            facets[facet][value] = count
+
+    facets['tag'].sort(key=lambda tag: (-tag['count'], tag['label']))
+    del facets['tag'][tag_limit:]
+    return facets
+
+
+def tag_search_text(tags, language):
+    """Searchable text for a translation's tags: key, default and localized label"""
+    words = []
+    for tag in tags:
+        words.append(tag.key.replace('-', ' '))
+        words.append(tag.default_label)
+        label = next((l.label for l in tag.labels if l.language == language), None)
+        if label and label != tag.default_label:
+            words.append(label)
+    return ' '.join(words)
+
+
+def refresh_search_tags(session, content):
+    """Recompute search_tags on every stored translation of a content item"""
+    # Queried rather than read from content.translations, which may have been
+    # loaded before translations added by content_id were flushed
+    translations = session.query(ArticleTranslation).filter_by(content_id=content.id)
+    for translation in translations:
+        text = tag_search_text(content.tags, translation.language)
+        if translation.search_tags != text:
+            translation.search_tags = text
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_search_tags(session, flush_context, instances):
+    contents = set()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, ArticleTranslation) and obj in session.new:
+            content = obj.content
+            if content is None and obj.content_id:
+                content = session.get(Content, obj.content_id)
+            obj.search_tags = tag_search_text(content.tags, obj.language) if content else ''
+        elif isinstance(obj, Content) and obj not in session.new:
+            if inspect(obj).attrs.tags.history.has_changes():
+                contents.add(obj)
+        elif isinstance(obj, Tag) and obj not in session.new:
+            state = inspect(obj)
+            if state.attrs.key.history.has_changes() or state.attrs.default_label.history.has_changes():
+                contents.update(obj.contents)
+        elif isinstance(obj, TagLabel):
+            state = inspect(obj)
+            if obj in session.new or any(
+                state.attrs[name].history.has_changes() for name in ('tag_id', 'language', 'label')
+            ):
+                if obj.tag is None and obj.tag_id:
+                    # Also adds the label to tag.labels, which tag_search_text reads
+                    obj.tag = session.get(Tag, obj.tag_id)
+                if obj.tag is not None:
+                    contents.update(obj.tag.contents)
+
+    for obj in session.deleted:
+        if isinstance(obj, TagLabel) and obj.tag is not None:
+            tag = obj.tag
+            if obj in tag.labels:
+                tag.labels.remove(obj)
+            contents.update(tag.contents)
+
+    for content in contents:
+        refresh_search_tags(session, content)
+
+
+# Databases created with create_all (tests, lightweight SQLite setups) get the
+# FTS index with the table; migrations f0c3b8d2a417 and d5a8c3f1e726 add it
+# to existing ones.
+for _statement in SQLITE_FTS_DDL:
+    event.listen(
+        ArticleTranslation.__table__, 'after_create',
+        DDL(_statement).execute_if(dialect='sqlite'),
+    )
+for _statement in (
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+    f'DROP VIEW IF EXISTS {FTS_SOURCE_VIEW}',
+    f'DROP TABLE IF EXISTS {FTS_KEY_TABLE}',
+):
+    event.listen(
+        ArticleTranslation.__table__, 'before_drop',
+        DDL(_statement).execute_if(dialect='sqlite'),
+    )
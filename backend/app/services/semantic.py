@@ -0,0 +1,507 @@
+"""
+Semantic (vector) search over chunk embeddings.
+
+The query is embedded with the search provider (app.services.embeddings),
+through the query-embedding cache (app.services.query_cache), and compared
+with the Embedding rows of the same model and language through a vector
+index chosen by the VECTOR_BACKEND setting (default 'auto', which picks the
+first index the database supports):
+
+* pgvector - cosine distance on Embedding.vector. The column holds vectors
+  of any dimension, so each model gets its own partial HNSW index over the
+  vector cast to its dimension (WHERE model = ...), built by
+  `flask pgvector-index`; models of different sizes never share a graph.
+* numpy - exact brute-force search in process (app.services.vector_store),
+  for SQLite and other databases without pgvector. The store is loaded per
+  model from the embedding table, or from a sidecar snapshot under
+  VECTOR_INDEX_PATH, follows embedding writes committed in this process and
+  is reloaded after VECTOR_INDEX_TTL seconds to pick up other writers. A
+  reload first applies the table's changes to the snapshot and re-saves it.
+
+The candidate search can run on a compact copy of the vectors, with the
+best k * VECTOR_RERANK_FACTOR candidates re-ranked by the full-precision
+Embedding.vector:
+
+* VECTOR_QUANTIZED - pgvector indexes the vectors cast to halfvec
+  (pgvector 0.7+, half the size), the numpy store holds int8 codes with a
+  per-vector scale (a quarter of the memory).
+* VECTOR_FIRST_PASS_DIMENSIONS - only the leading dimensions are searched
+  (pgvector indexes subvector(vector, 1, n)). Matryoshka-trained models
+  such as text-embedding-3 keep most of their accuracy when truncated.
+
+`flask pgvector-index` builds the index matching these settings.
+
+Index hits are chunks. They are mapped to their content item (article
+translations directly, transcripts through their media), grouped so each
+content item scores its best chunk similarity (max-sim), and filtered by
+visibility.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Float, cast, event, func, literal, literal_column, select, text
+from sqlalchemy.types import UserDefinedType
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import ArticleTranslation, Content, Embedding, MediaContent, Transcript
+from app.services.embeddings import get_search_provider
+from app.services.query_cache import embed_query
+from app.services.vector_store import NumpyVectorStore
+
+
+# Embedding owners that belong to a content item; 'tag' embeddings do not
+CONTENT_OWNER_TYPES = ('article_translation', 'transcript')
+
+# Chunks fetched per requested result: several chunks of one document and
+# invisible content both eat into the candidate list
+CANDIDATES_PER_RESULT = 8
+MAX_CANDIDATES = 1000
+
+# Per-model HNSW indexes are named idx_embedding_hnsw_<model digest>_<kind>
+HNSW_INDEX_PREFIX = 'idx_embedding_hnsw_'
+
+
+def hnsw_index_name(model, dimensions, quantized=False):
+    """Name of the HNSW index over model's vectors searched at dimensions"""
+    digest = hashlib.sha1(model.encode('utf-8')).hexdigest()[:12]
+    return f"{HNSW_INDEX_PREFIX}{digest}_{'h' if quantized else 'v'}{dimensions}"
+
+
+def hnsw_index_ddl(model, model_dimensions, dimensions=None, quantized=False):
+    """
+    DDL of a partial HNSW index over model's vectors; the indexed expression
+    must match _candidate_expression, or the planner will not use it.
+    Migrations f3c8e1a7b294 and e8b2d4f6a139 freeze copies; change them together.
+    """
+    dimensions = dimensions or model_dimensions
+    column = 'vector' if dimensions == model_dimensions else f'subvector(vector, 1, {dimensions})'
+    kind = 'halfvec' if quantized else 'vector'
+    model_literal = model.replace("'", "''")
+    return (
+        f'CREATE INDEX IF NOT EXISTS {hnsw_index_name(model, dimensions, quantized)} ON embedding '
+        f'USING hnsw (({column}::{kind}({dimensions})) {kind}_cosine_ops) '
+        f"WITH (m = 16, ef_construction = 64) WHERE model = '{model_literal}'"
+    )
+
+VectorHit = namedtuple('VectorHit', 'owner_type owner_id chunk_index similarity')
+
+SemanticResult = namedtuple('SemanticResult', 'content score hit')
+
+
+class VectorIndex:
+    """Interface for nearest-neighbour lookups over stored embeddings"""
+
+    name = None
+
+    def search(self, vector, language, model, k, owner_types=CONTENT_OWNER_TYPES):
+        """
+        Find the chunks closest to vector.
+
+        Args:
+            vector (numpy.ndarray): Normalized query vector
+            language (str): Only chunks in this language
+            model (str): Only chunks embedded with this model
+            k (int): Number of chunks to return
+            owner_types (tuple): Embedding owner types to search
+
+        Returns:
+            list: VectorHit tuples, most similar first
+        """
+        raise NotImplementedError
+
+    def is_available(self, engine):
+        """True when the database behind engine supports this index"""
+        return True
+
+
+class HalfVector(UserDefinedType):
+    """pgvector halfvec, only used as a cast target"""
+
+    cache_ok = True
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def get_col_spec(self, **kw):
+        return f'HALFVEC({self.dim})'
+
+
+def _rerank_candidates(k):
+    return k * current_app.config.get('VECTOR_RERANK_FACTOR', 4)
+
+
+def _first_pass_dimensions(dimensions):
+    """Dimensions the candidate search runs on for vectors of dimensions"""
+    return min(current_app.config.get('VECTOR_FIRST_PASS_DIMENSIONS') or dimensions, dimensions)
+
+
+def _candidate_expression(value, model_dimensions, dimensions, quantized):
+    """value (column or query vector) in the form the HNSW index holds"""
+    if dimensions < model_dimensions:
+        value = func.subvector(value, literal_column('1'), literal_column(str(dimensions)), type_=Vector())
+    return cast(value, HalfVector(dimensions) if quantized else Vector(dimensions))
+
+
+class PgvectorIndex(VectorIndex):
+    """pgvector cosine distance, answered by the HNSW index"""
+
+    name = 'pgvector'
+
+    def query(self, vector, language, model, k, owner_types=CONTENT_OWNER_TYPES,
+              quantized=False, dimensions=None):
+        """
+        The candidate query; ordering by the bare distance of the indexed
+        expression lets the model's index serve it.
+
+        Quantized or truncated to fewer dimensions, the compact index picks
+        k * VECTOR_RERANK_FACTOR candidates, which are re-ordered by their
+        full-precision distance.
+        """
+        model_dimensions = len(vector)
+        dimensions = dimensions or model_dimensions
+        filters = (
+            Embedding.language == language,
+            Embedding.model == model,
+            Embedding.owner_type.in_(owner_types),
+        )
+        approximate = _candidate_expression(Embedding.vector, model_dimensions, dimensions, quantized).op(
+            '<=>', return_type=Float
+        )(_candidate_expression(literal(vector, Vector()), model_dimensions, dimensions, quantized))
+        if not quantized and dimensions == model_dimensions:
+            return (
+                select(Embedding.owner_type, Embedding.owner_id, Embedding.chunk_index, approximate)
+                .where(*filters)
+                .order_by(approximate)
+                .limit(k)
+            )
+
+        candidates = (
+            select(Embedding.owner_type, Embedding.owner_id, Embedding.chunk_index, Embedding.vector)
+            .where(*filters)
+            .order_by(approximate)
+            .limit(_rerank_candidates(k))
+            .subquery()
+        )
+        distance = candidates.c.vector.cosine_distance(vector)
+        return (
+            select(candidates.c.owner_type, candidates.c.owner_id, candidates.c.chunk_index, distance)
+            .order_by(distance)
+            .limit(k)
+        )
+
+    def search(self, vector, language, model, k, owner_types=CONTENT_OWNER_TYPES):
+        quantized = current_app.config.get('VECTOR_QUANTIZED', False)
+        dimensions = _first_pass_dimensions(len(vector))
+        reranked = quantized or dimensions < len(vector)
+        # ef_search bounds how many candidates the HNSW scan keeps, and with
+        # it how many rows survive the filters; it must be at least the
+        # number of candidates requested
+        ef_search = max(current_app.config.get('HNSW_EF_SEARCH', 100),
+                        _rerank_candidates(k) if reranked else k)
+        db.session.execute(select(func.set_config('hnsw.ef_search', str(ef_search), True)))
+
+        rows = db.session.execute(self.query(vector, language, model, k, owner_types, quantized, dimensions))
+        return [
+            VectorHit(owner_type, owner_id, chunk_index, 1.0 - distance)
+            for owner_type, owner_id, chunk_index, distance in rows
+        ]
+
+    def is_available(self, engine):
+        if engine.dialect.name != 'postgresql':
+            return False
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'vector'")).first() is not None
+
+
+class NumpyVectorIndex(VectorIndex):
+    """In-process search over a NumpyVectorStore per model; exact unless quantized or truncated"""
+
+    name = 'numpy'
+
+    # Rows streamed per batch when loading from the embedding table
+    LOAD_BATCH_SIZE = 1000
+
+    def __init__(self):
+        self._stores = {}  # (engine, model) -> (store, loaded_at)
+        self._lock = threading.Lock()
+
+    def sidecar_path(self, model):
+        """Path prefix of the sidecar snapshot for model, or None when not configured"""
+        directory = current_app.config.get('VECTOR_INDEX_PATH')
+        return os.path.join(directory, model) if directory else None
+
+    @staticmethod
+    def _settings():
+        config = current_app.config
+        return config.get('VECTOR_QUANTIZED', False), config.get('VECTOR_FIRST_PASS_DIMENSIONS') or None
+
+    def load(self, model, lossy=True):
+        """
+        Build a store for model from its sidecar snapshot or the embedding
+        table, quantized and truncated per VECTOR_QUANTIZED and
+        VECTOR_FIRST_PASS_DIMENSIONS unless lossy is False
+        """
+        quantized, search_dimensions = self._settings() if lossy else (False, None)
+        path = self.sidecar_path(model)
+        if path and os.path.exists(f'{path}.npy'):
+            self.refresh_sidecar(model, path)
+            return NumpyVectorStore.load(path, quantized=quantized, search_dimensions=search_dimensions)
+
+        dimensions = (
+            db.session.scalar(select(Embedding.dim).where(Embedding.model == model).limit(1))
+            or get_search_provider().dimensions
+        )
+        store = NumpyVectorStore(dimensions, quantized=quantized, search_dimensions=search_dimensions)
+        rows = db.session.execute(
+            select(
+                Embedding.id, Embedding.owner_type, Embedding.owner_id,
+                Embedding.chunk_index, Embedding.language, Embedding.vector,
+            )
+            .where(Embedding.model == model, Embedding.vector.isnot(None))
+            .execution_options(yield_per=self.LOAD_BATCH_SIZE)
+        )
+        for batch in rows.partitions():
+            store.append([row[:5] for row in batch], [row[5] for row in batch])
+        return store
+
+    def refresh_sidecar(self, model, path):
+        """
+        Bring model's sidecar snapshot up to date with the embedding table,
+        re-saving it if anything changed.
+
+        Rows are never updated in place except for chunk_index (an edited
+        chunk is a new row), so the snapshot is diffed by id: only ids and
+        chunk indexes are read for the whole model, and vectors only for
+        rows that are new or moved since the snapshot was saved.
+
+        Returns:
+            int: Rows added, moved or removed
+        """
+        store = NumpyVectorStore.load(path)
+        snapshot = store.chunk_indexes()
+        live = dict(db.session.execute(
+            select(Embedding.id, Embedding.chunk_index)
+            .where(Embedding.model == model, Embedding.vector.isnot(None))
+        ).all())
+
+        removed = snapshot.keys() - live.keys()
+        changed = [row_id for row_id, chunk_index in live.items() if snapshot.get(row_id) != chunk_index]
+        if not removed and not changed:
+            return 0
+
+        store.remove(removed)
+        for start in range(0, len(changed), self.LOAD_BATCH_SIZE):
+            rows = db.session.execute(
+                select(
+                    Embedding.id, Embedding.owner_type, Embedding.owner_id,
+                    Embedding.chunk_index, Embedding.language, Embedding.vector,
+                )
+                .where(Embedding.id.in_(changed[start:start + self.LOAD_BATCH_SIZE]))
+            ).all()
+            store.append([row[:5] for row in rows], [row[5] for row in rows])
+        store.save(path)
+        return len(removed) + len(changed)
+
+    def store(self, model):
+        """The loaded store for model, (re)loading it when missing or expired"""
+        key = (db.session.get_bind(), model)
+        ttl = current_app.config.get('VECTOR_INDEX_TTL', 300)
+        with self._lock:
+            entry = self._stores.get(key)
+            if (entry is None or time.monotonic() - entry[1] > ttl
+                    or not self._matches_settings(entry[0])):
+                entry = (self.load(model), time.monotonic())
+                self._stores[key] = entry
+        return entry[0]
+
+    def _matches_settings(self, store):
+        quantized, search_dimensions = self._settings()
+        return (store.quantized == quantized
+                and store.search_dimensions == min(search_dimensions or store.dimensions, store.dimensions))
+
+    def loaded_store(self, engine, model):
+        """The store for model if it is loaded, else None"""
+        entry = self._stores.get((engine, model))
+        return entry[0] if entry else None
+
+    def invalidate(self, model):
+        """Drop loaded stores for model, e.g. after writes that bypassed the session"""
+        with self._lock:
+            for key in [key for key in self._stores if key[1] == model]:
+                del self._stores[key]
+
+    @staticmethod
+    def fetch_vectors(ids):
+        """Full-precision vectors by embedding id, for re-ranking quantized stores"""
+        rows = db.session.execute(select(Embedding.id, Embedding.vector).where(Embedding.id.in_(ids)))
+        return {embedding_id: vector for embedding_id, vector in rows}
+
+    def search(self, vector, language, model, k, owner_types=CONTENT_OWNER_TYPES):
+        return [
+            VectorHit(owner_type, owner_id, chunk_index, similarity)
+            for _, owner_type, owner_id, chunk_index, similarity
+            in self.store(model).search(
+                vector, k, language, owner_types,
+                fetch=self.fetch_vectors, rerank=_rerank_candidates(k),
+            )
+        ]
+
+
+VECTOR_INDEXES = {
+    index.name: index
+    for index in (PgvectorIndex(), NumpyVectorIndex())
+}
+
+# Resolved 'auto' indexes per engine, so availability checks run once per process
+_auto_indexes = {}
+
+
+def get_vector_index():
+    """
+    Return the configured vector index.
+
+    VECTOR_BACKEND may name an index directly or be 'auto', which uses the
+    first index available on the bound database; numpy is always available.
+    """
+    setting = current_app.config.get('VECTOR_BACKEND', 'auto')
+    if setting != 'auto':
+        try:
+            return VECTOR_INDEXES[setting]
+        except KeyError:
+            raise ValueError(f"Unknown VECTOR_BACKEND '{setting}'") from None
+
+    engine = db.session.get_bind()
+    index = _auto_indexes.get(engine)
+    if index is None:
+        index = next(index for index in VECTOR_INDEXES.values() if index.is_available(engine))
+        _auto_indexes[engine] = index
+    return index
+
+
+def best_hits_by_content(hits):
+    """
+    Map chunk hits to their content item and keep the best chunk per item.
+
+    Args:
+        hits (list): VectorHit tuples, most similar first
+
+    Returns:
+        dict: {content_id: VectorHit}, best first
+    """
+    translation_ids = [h.owner_id for h in hits if h.owner_type == 'article_translation']
+    transcript_ids = [h.owner_id for h in hits if h.owner_type == 'transcript']
+
+    owners = {}
+    if translation_ids:
+        owners.update(
+            (('article_translation', owner_id), content_id)
+            for owner_id, content_id in db.session.query(ArticleTranslation.id, ArticleTranslation.content_id)
+            .filter(ArticleTranslation.id.in_(translation_ids))
+        )
+    if transcript_ids:
+        owners.update(
+            (('transcript', owner_id), content_id)
+            for owner_id, content_id in db.session.query(Transcript.id, MediaContent.content_id)
+            .join(MediaContent, MediaContent.id == Transcript.media_id)
+            .filter(Transcript.id.in_(transcript_ids))
+        )
+
+    # Hits arrive best first, so the first hit per content is its max-sim
+    best = {}
+    for hit in hits:
+        content_id = owners.get((hit.owner_type, hit.owner_id))
+        if content_id is not None and content_id not in best:
+            best[content_id] = hit
+    return best
+
+
+def rank_contents(hits, limit, visibility=None):
+    """
+    Group chunk hits by content item and keep the best chunk per item.
+
+    Args:
+        hits (list): VectorHit tuples, most similar first
+        limit (int): Number of content items to return
+        visibility (iterable): Allowed Content.visibility values, or None for all
+
+    Returns:
+        list: SemanticResult tuples (content, score, hit), best first
+    """
+    best = best_hits_by_content(hits)
+    query = Content.query.filter(Content.id.in_(list(best))).options(Content.listing_options())
+    if visibility is not None:
+        query = query.filter(Content.visibility.in_(list(visibility)))
+    contents = {content.id: content for content in query}
+
+    results = [
+        SemanticResult(contents[content_id], hit.similarity, hit)
+        for content_id, hit in best.items()
+        if content_id in contents
+    ]
+    return results[:limit]
+
+
+def semantic_search(query_text, language, limit=10, owner_types=CONTENT_OWNER_TYPES, visibility=None):
+    """
+    Rank content items by similarity to query_text.
+
+    Args:
+        query_text (str): Natural-language query
+        language (str): Language of the chunks to search
+        limit (int): Number of content items to return
+        owner_types (tuple): Embedding owner types to search
+        visibility (iterable): Allowed Content.visibility values, or None for all
+
+    Returns:
+        list: SemanticResult tuples, best first
+    """
+    index = get_vector_index()
+    provider = get_search_provider()
+    vector = embed_query(query_text, language, provider)
+
+    k = min(limit * CANDIDATES_PER_RESULT, MAX_CANDIDATES)
+    hits = index.search(vector, language, provider.model, k, owner_types)
+    return rank_contents(hits, limit, visibility)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_embedding_changes(session, flush_context):
+    # Values are captured now: after the commit the objects are expired and
+    # deleted ones can no longer be loaded
+    changes = session.info.setdefault('embedding_changes', [])
+    for obj in session.deleted:
+        if isinstance(obj, Embedding):
+            changes.append((obj.model, obj.id, None, None))
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Embedding) and obj not in session.deleted:
+            row = (obj.id, obj.owner_type, obj.owner_id, obj.chunk_index, obj.language)
+            changes.append((obj.model, obj.id, row, obj.vector))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_embedding_changes(session):
+    """Mirror committed embedding writes into loaded in-process stores"""
+    changes = session.info.pop('embedding_changes', None)
+    if not changes:
+        return
+    index = VECTOR_INDEXES['numpy']
+    engine = session.get_bind()
+    for model, embedding_id, row, vector in changes:
+        store = index.loaded_store(engine, model)
+        if store is None:
+            continue
+        if vector is None:
+            store.remove([embedding_id])
+        else:
+            store.append([row], [vector])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_embedding_changes(session):
+    session.info.pop('embedding_changes', None)
@@ -0,0 +1,339 @@
+"""
+In-process vector store for databases without a vector index.
+
+Vectors live in one contiguous float32 matrix with parallel metadata arrays;
+a query is a single matrix-vector product over the normalized rows, masked
+by language and owner type, with the top k picked by argpartition. Brute
+force is exact and, at the tens of thousands of chunks a laptop or CI
+database holds, fast enough.
+
+Rows are appended into spare capacity (the matrix doubles when full) and
+removed by tombstoning; compact() drops tombstoned rows. A store can be
+saved as a sidecar .npy file and reopened as a read-only memmap, which is
+copied into memory only if rows are appended later.
+
+A quantized store keeps each row as int8 codes with a float32 scale
+(code * scale approximates the vector), a quarter of the memory. A store
+with search_dimensions keeps only that many leading dimensions per row,
+renormalized: Matryoshka-trained models put the most information first, so
+a truncated first pass finds nearly the same candidates for a fraction of
+the work. Both are lossy, so searches then re-rank the best candidates with
+full-precision vectors from cold storage: the sidecar memmap when the store
+was loaded from one (only the candidate rows are paged in), else a fetch
+callback, e.g. reading Embedding.vector from the database.
+"""
+import os
+import threading
+
+import numpy as np
+
+
+# Approximate candidates re-ranked per requested result in quantized stores
+RERANK_FACTOR = 4
+
+# Rows of int8 codes widened to float32 at a time while scoring
+SCORE_BLOCK_ROWS = 16384
+
+
+def quantize_int8(vectors):
+    """
+    Symmetric per-row int8 quantization.
+
+    Returns:
+        tuple: (int8 codes, float32 scales) with codes * scales[:, None]
+        approximating vectors
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.where(scales == 0, 1, scales).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def _normalized(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class NumpyVectorStore:
+    """Normalized float32 vectors with chunk metadata, searchable by cosine similarity"""
+
+    def __init__(self, dimensions, capacity=1024, quantized=False, search_dimensions=None):
+        self.dimensions = dimensions
+        self.quantized = quantized
+        self.search_dimensions = min(search_dimensions or dimensions, dimensions)
+        self._vectors = np.empty((capacity, self.search_dimensions), dtype=np.int8 if quantized else np.float32)
+        self._scales = np.zeros(capacity if quantized else 0, dtype=np.float32)
+        self._cold = None  # full-precision rows of a lossy store loaded from a sidecar
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._language = np.zeros(capacity, dtype=np.int16)
+        self._owner_type = np.zeros(capacity, dtype=np.int16)
+        self._chunk_index = np.zeros(capacity, dtype=np.int32)
+        self._ids = []
+        self._owner_ids = []
+        self._row_of = {}  # embedding id -> row
+        self._codes = {}  # language / owner type -> int16 code
+        self._size = 0
+        self.tombstones = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size - self.tombstones
+
+    @property
+    def lossy(self):
+        """True when searches score an approximation and re-rank"""
+        return self.quantized or self.search_dimensions < self.dimensions
+
+    @property
+    def nbytes(self):
+        """Memory held by the vector matrix (and scales), including spare capacity"""
+        return self._vectors.nbytes + self._scales.nbytes
+
+    def _code(self, value):
+        return self._codes.setdefault(value, len(self._codes))
+
+    def _reserve(self, rows):
+        capacity = len(self._alive)
+        if self._size + rows <= capacity:
+            return
+        capacity = max(capacity * 2, self._size + rows)
+        # Also turns a memmapped matrix into a writable in-memory one
+        vectors = np.empty((capacity, self.search_dimensions), dtype=self._vectors.dtype)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+        for name in self._row_arrays():
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _hot(self, vectors):
+        """The searched form of normalized full vectors: (matrix, scales or None)"""
+        if self.search_dimensions < self.dimensions:
+            vectors = _normalized(vectors[:, :self.search_dimensions])
+        if self.quantized:
+            return quantize_int8(vectors)
+        return vectors, None
+
+    def _row_arrays(self):
+        names = ('_alive', '_language', '_owner_type', '_chunk_index')
+        return names + ('_scales',) if self.quantized else names
+
+    def append(self, rows, vectors):
+        """
+        Add rows, replacing any live row with the same id.
+
+        Args:
+            rows (list): (id, owner_type, owner_id, chunk_index, language) tuples
+            vectors: Array-like of shape (len(rows), dimensions); normalized here
+        """
+        vectors, scales = self._hot(
+            _normalized(np.asarray(vectors, dtype=np.float32).reshape(len(rows), self.dimensions))
+        )
+
+        with self._lock:
+            self._remove([row[0] for row in rows])
+            self._reserve(len(rows))
+            start = self._size
+            for offset, (row_id, owner_type, owner_id, chunk_index, language) in enumerate(rows):
+                i = start + offset
+                self._ids.append(row_id)
+                self._owner_ids.append(owner_id)
+                self._owner_type[i] = self._code(owner_type)
+                self._language[i] = self._code(language)
+                self._chunk_index[i] = chunk_index
+                self._row_of[row_id] = i
+            self._vectors[start:start + len(rows)] = vectors
+            if self.quantized:
+                self._scales[start:start + len(rows)] = scales
+            self._alive[start:start + len(rows)] = True
+            # Publish the rows last; concurrent searches only read up to _size
+            self._size = start + len(rows)
+
+    def _remove(self, ids):
+        for row_id in ids:
+            i = self._row_of.pop(row_id, None)
+            if i is not None:
+                self._alive[i] = False
+                self.tombstones += 1
+
+    def remove(self, ids):
+        """Tombstone rows by id; unknown ids are ignored"""
+        with self._lock:
+            self._remove(ids)
+
+    def chunk_indexes(self):
+        """Chunk index of every live row, by id"""
+        with self._lock:
+            return {row_id: int(self._chunk_index[i]) for row_id, i in self._row_of.items()}
+
+    def compact(self):
+        """Drop tombstoned rows"""
+        with self._lock:
+            keep = np.flatnonzero(self._alive[:self._size])
+            self._vectors = np.ascontiguousarray(self._vectors[keep])
+            # Cold rows are addressed by the old row numbers
+            self._cold = None
+            for name in self._row_arrays():
+                setattr(self, name, getattr(self, name)[keep].copy())
+            self._ids = [self._ids[i] for i in keep]
+            self._owner_ids = [self._owner_ids[i] for i in keep]
+            self._row_of = {row_id: i for i, row_id in enumerate(self._ids)}
+            self._size = len(keep)
+            self.tombstones = 0
+
+    def search(self, vector, k, language=None, owner_types=None, fetch=None, rerank=None):
+        """
+        Return the k rows most similar to vector.
+
+        Args:
+            vector: Query vector (normalized by the caller)
+            k (int): Number of rows to return
+            language (str): Only rows in this language
+            owner_types (iterable): Only rows with these owner types
+            fetch (callable): Lossy stores only: maps a list of ids to
+                {id: full-precision vector} for re-ranking rows without a
+                cold copy; without it such rows keep their approximate score
+            rerank (int): Lossy stores only: approximate candidates to
+                re-rank (default k * RERANK_FACTOR)
+
+        Returns:
+            list: (id, owner_type, owner_id, chunk_index, similarity) tuples,
+            most similar first
+        """
+        # Writers replace arrays rather than resizing them in place, so a
+        # snapshot of the references stays consistent without holding the lock
+        with self._lock:
+            size = self._size
+            vectors, alive, languages = self._vectors, self._alive, self._language
+            scales, cold = self._scales, self._cold
+            owner_types_arr, chunk_indexes = self._owner_type, self._chunk_index
+            ids, owner_ids, codes = self._ids, self._owner_ids, dict(self._codes)
+        if not size or k <= 0:
+            return []
+
+        mask = alive[:size].copy()
+        if language is not None:
+            if language not in codes:
+                return []
+            mask &= languages[:size] == codes[language]
+        if owner_types is not None:
+            mask &= np.isin(owner_types_arr[:size], [codes[t] for t in owner_types if t in codes])
+
+        candidates = np.flatnonzero(mask)
+        if not candidates.size:
+            return []
+
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.lossy:
+            hot_vector = vector
+            if self.search_dimensions < self.dimensions:
+                hot_vector = _normalized(vector[None, :self.search_dimensions])[0]
+            if self.quantized:
+                scores = _block_scores(vectors, scales, candidates, hot_vector)
+            else:
+                scores = vectors[candidates] @ hot_vector
+            # Keep the best approximate candidates and score them exactly
+            keep = min(max(rerank or k * RERANK_FACTOR, k), candidates.size)
+            best = np.argpartition(-scores, keep - 1)[:keep]
+            candidates = candidates[best]
+            scores = _rescore(candidates, scores[best], vector, cold, ids, fetch)
+        else:
+            scores = (vectors[:size] @ vector)[candidates]
+        k = min(k, candidates.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        value_of = {code: value for value, code in codes.items()}
+        results = []
+        for j in top:
+            i = candidates[j]
+            results.append((
+                ids[i], value_of[owner_types_arr[i]], owner_ids[i],
+                int(chunk_indexes[i]), float(scores[j]),
+            ))
+        return results
+
+    def save(self, path):
+        """Compact and write the store to path.npy (vectors) and path.meta.npz"""
+        if self.lossy:
+            raise ValueError('Lossy stores cannot be saved; save a full-precision one and load it lossy')
+        self.compact()
+        size = self._size
+        value_of = {code: value for value, code in self._codes.items()}
+        # Written aside and renamed into place: the old files may be memmapped,
+        # by this store or by other processes
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f:
+            np.save(f, self._vectors[:size])
+        os.replace(temp, f'{path}.npy')
+        with open(temp, 'wb') as f:
+            np.savez(
+                f,
+                ids=np.array(self._ids, dtype=str),
+                owner_ids=np.array(self._owner_ids, dtype=str),
+                owner_types=np.array([value_of[c] for c in self._owner_type[:size]], dtype=str),
+                languages=np.array([value_of[c] for c in self._language[:size]], dtype=str),
+                chunk_indexes=self._chunk_index[:size],
+            )
+        os.replace(temp, f'{path}.meta.npz')
+
+    @classmethod
+    def load(cls, path, mmap=True, quantized=False, search_dimensions=None):
+        """
+        Open a store written by save(); the matrix is memmapped read-only by
+        default. A lossy store is built from the file block by block and
+        keeps it as the cold copy for re-ranking.
+        """
+        vectors = np.load(f'{path}.npy', mmap_mode='r' if mmap or quantized or search_dimensions else None)
+        meta = np.load(f'{path}.meta.npz')
+
+        store = cls(vectors.shape[1], capacity=0, quantized=quantized, search_dimensions=search_dimensions)
+        size = len(vectors)
+        if store.lossy:
+            store._vectors = np.empty((size, store.search_dimensions), dtype=np.int8 if quantized else np.float32)
+            store._scales = np.empty(size if quantized else 0, dtype=np.float32)
+            for start in range(0, size, SCORE_BLOCK_ROWS):
+                end = start + SCORE_BLOCK_ROWS
+                hot, scales = store._hot(np.asarray(vectors[start:end], dtype=np.float32))
+                store._vectors[start:end] = hot
+                if quantized:
+                    store._scales[start:end] = scales
+            store._cold = vectors
+        else:
+            store._vectors = vectors
+        store._alive = np.ones(size, dtype=bool)
+        store._language = np.array([store._code(v) for v in meta['languages']], dtype=np.int16)
+        store._owner_type = np.array([store._code(v) for v in meta['owner_types']], dtype=np.int16)
+        store._chunk_index = meta['chunk_indexes'].astype(np.int32)
+        store._ids = meta['ids'].tolist()
+        store._owner_ids = meta['owner_ids'].tolist()
+        store._row_of = {row_id: i for i, row_id in enumerate(store._ids)}
+        store._size = size
+        return store
+
+
+def _block_scores(codes, scales, rows, vector):
+    """Approximate similarities of int8 rows, widening one block at a time"""
+    scores = np.empty(rows.size, dtype=np.float32)
+    for start in range(0, rows.size, SCORE_BLOCK_ROWS):
+        block = rows[start:start + SCORE_BLOCK_ROWS]
+        scores[start:start + block.size] = (codes[block].astype(np.float32) @ vector) * scales[block]
+    return scores
+
+
+def _rescore(rows, scores, vector, cold, ids, fetch):
+    """Exact similarities for rows with a full-precision copy; the rest keep scores"""
+    scores = scores.copy()
+    in_cold = rows < (len(cold) if cold is not None else 0)
+    if in_cold.any():
+        scores[in_cold] = _normalized(np.asarray(cold[rows[in_cold]], dtype=np.float32)) @ vector
+    missing = np.flatnonzero(~in_cold)
+    if fetch is not None and missing.size:
+        found = fetch([ids[rows[j]] for j in missing])
+        known = [j for j in missing if found.get(ids[rows[j]]) is not None]
+        if known:
+            full = np.stack([np.asarray(found[ids[rows[j]]], dtype=np.float32) for j in known])
+            scores[known] = _normalized(full) @ vector
+    return scores
@@ -1,5 +1,9 @@
 from .transcription import transcribe_media
 from .embeddings import embed_article_translation, embed_transcript
 from .webhooks import dispatch_webhook
+from .rendering import rerender_translation
+from .related import refresh_related_contents
+from .near_duplicates import index_near_duplicates
 
-__all__ = ['transcribe_media', 'embed_article_translation', 'embed_transcript', 'dispatch_webhook']
+__all__ = ['transcribe_media', 'embed_article_translation', 'embed_transcript', 'dispatch_webhook', 'rerender_translation',
+           'refresh_related_contents', 'index_near_duplicates']
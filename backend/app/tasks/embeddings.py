@@ -1,31 +1,142 @@
+from datetime import datetime, timedelta
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import defer
+
 from app import celery_app, db
-from app.models import ArticleTranslation, Transcript, Embedding
+from app.models import ArticleTranslation, Transcript, Embedding, EmbeddingDirty
+from app.services.chunking import chunk_markdown, chunk_text, embedding_inputs
+from app.services.embeddings import get_write_providers
+from app.tasks.related import mark_related_dirty
+
+
+def _sync_chunk_embeddings(provider, owner_type, owner_id, language, chunks, prefix=''):
+    """
+    Bring the owner's embeddings for provider's model in line with its chunks.
+
+    Each row stores the hash of the text it embedded. Chunks whose hash
+    matches an existing row keep its vector (only chunk_index is updated if
+    the chunk moved), new or edited chunks are embedded in provider batches,
+    and rows left unmatched belong to vanished chunks and are deleted. A
+    typo fix re-embeds one chunk instead of the whole document.
+
+    Chunks are consumed lazily, so a long document is never held in memory
+    as a whole list of chunks.
+
+    Returns:
+        dict: Counts of chunks, embedded, moved and deleted rows
+    """
+    stats = {'chunks': 0, 'embedded': 0, 'moved': 0, 'deleted': 0}
+
+    existing = {}
+    rows = (
+        Embedding.query
+        .filter_by(owner_type=owner_type, owner_id=owner_id, model=provider.model)
+        .options(defer(Embedding.vector))
+        .order_by(Embedding.chunk_index)
+    )
+    for embedding in rows:
+        existing.setdefault(embedding.content_hash, []).append(embedding)
+
+    def changed_chunks():
+        for chunk, text, content_hash in embedding_inputs(chunks, prefix):
+            stats['chunks'] += 1
+            # Repeated identical chunks take the matching rows in order
+            matches = existing.get(content_hash)
+            if matches:
+                embedding = matches.pop(0)
+                if embedding.chunk_index != chunk.chunk_index:
+                    embedding.chunk_index = chunk.chunk_index
+                    stats['moved'] += 1
+                continue
+            yield chunk, text, content_hash
+
+    for (chunk, _, content_hash), vector in provider.embed_stream(changed_chunks(), lambda item: item[1]):
+        db.session.add(Embedding(
+            owner_type=owner_type,
+            owner_id=owner_id,
+            language=language,
+            model=provider.model,
+            dim=provider.dimensions,
+            chunk_index=chunk.chunk_index,
+            content_hash=content_hash,
+            vector=vector,
+        ))
+        stats['embedded'] += 1
+
+    # Deleted through the session so the in-process vector index follows
+    for embedding in chain.from_iterable(existing.values()):
+        db.session.delete(embedding)
+        stats['deleted'] += 1
+
+    db.session.commit()
+    return stats
+
+
+def _sync_owner_embeddings(owner_type, owner_id, language, make_chunks, prefix=''):
+    """
+    Sync the owner's embeddings for every model new text is written with;
+    during a model cut-over that is both the new and the searched model.
+
+    Returns:
+        dict: Chunk count, with the row counts summed over the models
+    """
+    stats = {}
+    for provider in get_write_providers():
+        model_stats = _sync_chunk_embeddings(provider, owner_type, owner_id, language, make_chunks(), prefix)
+        stats['chunks'] = model_stats.pop('chunks')
+        for key, count in model_stats.items():
+            stats[key] = stats.get(key, 0) + count
+    return stats
+
+
+def _mark_related_if_changed(content_id, stats):
+    """New or deleted vectors move the item's related-content neighbors"""
+    if stats['embedded'] or stats['deleted']:
+        mark_related_dirty(content_id)
+        db.session.commit()
+
+
+def _chunk_sizes():
+    config = current_app.config
+    return config.get('EMBEDDING_CHUNK_TOKENS', 400), config.get('EMBEDDING_CHUNK_OVERLAP', 50)
 
 
 @celery_app.task(name='tasks.embed_article_translation')
 def embed_article_translation(translation_id):
     """
     Generate embeddings for article translation.
-    Chunks long content and creates multiple embeddings.
+    Chunks the markdown at headings and paragraphs and keeps one embedding
+    per chunk, embedding only new or changed chunks; each chunk is embedded
+    with the title for context.
     """
     translation = ArticleTranslation.query.get(translation_id)
     if not translation:
         return {'error': 'Translation not found'}
 
     try:
-        # TODO: Implement embedding generation
-        # 1. Chunk the markdown content
-        # 2. Generate embeddings using OpenAI API
-        # 3. Store in Embedding table with pgvector
+        stats = _sync_owner_embeddings(
+            'article_translation', translation.id, translation.language,
+            lambda: chunk_markdown(translation.markdown, *_chunk_sizes()),
+            prefix=f'{translation.title}\n\n',
+        )
+        _mark_related_if_changed(translation.content_id, stats)
 
-        # Placeholder response
         return {
             'status': 'success',
             'translation_id': translation_id,
-            'message': 'Embedding generation not yet implemented'
+            **stats
         }
 
     except Exception as e:
+        db.session.rollback()
+        # drain_embedding_queue claimed the owner; keep it queued for the next run
+        mark_embedding_dirty('article_translation', translation_id)
+        db.session.commit()
         return {
             'status': 'error',
             'translation_id': translation_id,
@@ -37,28 +148,116 @@ def embed_article_translation(translation_id):
 def embed_transcript(transcript_id):
     """
     Generate embeddings for transcript.
-    Segments transcript and creates embeddings for each segment.
+    Segments the text at paragraph, line and sentence breaks and keeps one
+    embedding per segment, embedding only new or changed segments.
     """
     transcript = Transcript.query.get(transcript_id)
     if not transcript:
         return {'error': 'Transcript not found'}
 
     try:
-        # TODO: Implement embedding generation
-        # 1. Segment the transcript (by time or text length)
-        # 2. Generate embeddings using OpenAI API
-        # 3. Store in Embedding table with pgvector
+        stats = _sync_owner_embeddings(
+            'transcript', transcript.id, transcript.language,
+            lambda: chunk_text(transcript.text, *_chunk_sizes()),
+        )
+        _mark_related_if_changed(transcript.media.content_id, stats)
 
-        # Placeholder response
         return {
             'status': 'success',
             'transcript_id': transcript_id,
-            'message': 'Embedding generation not yet implemented'
+            **stats
         }
 
     except Exception as e:
+        db.session.rollback()
+        # drain_embedding_queue claimed the owner; keep it queued for the next run
+        mark_embedding_dirty('transcript', transcript_id)
+        db.session.commit()
         return {
             'status': 'error',
             'transcript_id': transcript_id,
             'error': str(e)
         }
+
+
+def mark_embedding_dirty(owner_type, owner_id):
+    """
+    Mark an article translation or transcript for re-embedding.
+
+    Runs in the caller's transaction, so the mark commits with the write.
+    Repeated saves only move marked_at; drain_embedding_queue embeds the
+    owner once it has been quiet for EMBED_QUIET_SECONDS.
+    """
+    if not current_app.config.get('EMBED_ON_WRITE', True):
+        return False
+
+    now = datetime.utcnow()
+    table = EmbeddingDirty.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        stmt = insert(table).values(owner_type=owner_type, owner_id=owner_id, dirty_since=now, marked_at=now)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.owner_type, table.c.owner_id],
+            set_={'marked_at': stmt.excluded.marked_at},
+        ))
+    else:
+        dirty = db.session.get(EmbeddingDirty, (owner_type, owner_id))
+        if dirty is None:
+            db.session.add(EmbeddingDirty(owner_type=owner_type, owner_id=owner_id, dirty_since=now, marked_at=now))
+        else:
+            dirty.marked_at = now
+    return True
+
+
+@celery_app.task(name='tasks.drain_embedding_queue')
+def drain_embedding_queue():
+    """
+    Enqueue embedding runs for dirty owners that have settled.
+
+    An owner is due once no write has marked it for EMBED_QUIET_SECONDS, or
+    once it has been dirty for EMBED_MAX_DELAY_SECONDS so a document that is
+    edited continuously is still embedded. Up to EMBED_DRAIN_BATCH_SIZE
+    owners are claimed per run by deleting their rows; a row whose
+    marked_at changed since it was read is left for a later run, so
+    concurrent drains never enqueue the same owner twice.
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    quiet_before = now - timedelta(seconds=config.get('EMBED_QUIET_SECONDS', 60))
+    overdue_before = now - timedelta(seconds=config.get('EMBED_MAX_DELAY_SECONDS', 600))
+    table = EmbeddingDirty.__table__
+
+    due = db.session.execute(
+        select(table.c.owner_type, table.c.owner_id, table.c.marked_at)
+        .where(or_(table.c.marked_at <= quiet_before, table.c.dirty_since <= overdue_before))
+        .order_by(table.c.dirty_since)
+        .limit(config.get('EMBED_DRAIN_BATCH_SIZE', 200))
+    ).all()
+
+    claimed = []
+    for owner_type, owner_id, marked_at in due:
+        result = db.session.execute(
+            delete(table).where(
+                table.c.owner_type == owner_type,
+                table.c.owner_id == owner_id,
+                table.c.marked_at == marked_at,
+            )
+        )
+        if result.rowcount:
+            claimed.append((owner_type, owner_id))
+    db.session.commit()
+
+    scheduled = 0
+    for owner_type, owner_id in claimed:
+        task = embed_article_translation if owner_type == 'article_translation' else embed_transcript
+        try:
+            task.delay(owner_id)
+            scheduled += 1
+        except Exception as e:
+            current_app.logger.warning('Could not enqueue embedding for %s %s: %s', owner_type, owner_id, e)
+            # Keep the owner queued for the next run
+            mark_embedding_dirty(owner_type, owner_id)
+            db.session.commit()
+
+    return {'status': 'success', 'due': len(due), 'scheduled': scheduled}
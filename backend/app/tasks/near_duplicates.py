@@ -0,0 +1,39 @@
+from flask import current_app
+from app import celery_app, db
+from app.services.near_duplicates import index_owner
+
+
+@celery_app.task(name='tasks.index_near_duplicates')
+def index_near_duplicates(owner_type, owner_id):
+    """
+    Refresh the MinHash signature and LSH buckets of an article translation
+    or transcript. Enqueued by the write endpoints once the text is
+    committed; an unchanged text is skipped.
+    """
+    try:
+        status = index_owner(owner_type, owner_id)
+        db.session.commit()
+        return {'status': status, 'owner_type': owner_type, 'owner_id': owner_id}
+
+    except Exception as e:
+        db.session.rollback()
+        return {
+            'status': 'error',
+            'owner_type': owner_type,
+            'owner_id': owner_id,
+            'error': str(e)
+        }
+
+
+def schedule_near_duplicate_index(owner_type, owner_id):
+    """
+    Enqueue indexing of a written text. Call after the write is committed,
+    so the worker reads the new text; `flask near-duplicates-index` catches
+    up on owners whose task could not be enqueued.
+    """
+    try:
+        index_near_duplicates.delay(owner_type, owner_id)
+    except Exception as e:
+        current_app.logger.warning('Could not enqueue near-duplicate index for %s %s: %s', owner_type, owner_id, e)
+        return False
+    return True
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import celery_app, db
+from app.models import ContentNeighbor, ContentNeighborDirty
+from app.services.related import refresh_related
+
+
+def mark_related_dirty(*content_ids):
+    """
+    Mark content items for a neighbor list refresh.
+
+    Runs in the caller's transaction, so the mark commits with the write;
+    refresh_related_contents picks the items up on its next run.
+    """
+    now = datetime.utcnow()
+    table = ContentNeighborDirty.__table__
+    dialect = db.session.get_bind().dialect.name
+    for content_id in dict.fromkeys(content_ids):
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+            stmt = insert(table).values(content_id=content_id, marked_at=now)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.content_id],
+                set_={'marked_at': stmt.excluded.marked_at},
+            ))
+        else:
+            dirty = db.session.get(ContentNeighborDirty, content_id)
+            if dirty is None:
+                db.session.add(ContentNeighborDirty(content_id=content_id, marked_at=now))
+            else:
+                dirty.marked_at = now
+
+
+def mark_listing_contents_dirty(content_id):
+    """Mark the items whose neighbor lists include content_id, e.g. before it is deleted"""
+    listed_by = db.session.scalars(
+        select(ContentNeighbor.content_id).where(ContentNeighbor.neighbor_id == content_id)
+    ).all()
+    if listed_by:
+        mark_related_dirty(*listed_by)
+
+
+@celery_app.task(name='tasks.refresh_related_contents')
+def refresh_related_contents():
+    """
+    Refresh the neighbor lists of content items marked dirty.
+
+    Up to RELATED_REFRESH_BATCH_SIZE items are claimed per run by deleting
+    their rows; a row whose marked_at changed since it was read is left for
+    a later run, like drain_embedding_queue.
+    """
+    table = ContentNeighborDirty.__table__
+    due = db.session.execute(
+        select(table.c.content_id, table.c.marked_at)
+        .order_by(table.c.marked_at)
+        .limit(current_app.config.get('RELATED_REFRESH_BATCH_SIZE', 100))
+    ).all()
+
+    claimed = []
+    for content_id, marked_at in due:
+        result = db.session.execute(
+            delete(table).where(table.c.content_id == content_id, table.c.marked_at == marked_at)
+        )
+        if result.rowcount:
+            claimed.append(content_id)
+    db.session.commit()
+
+    try:
+        report = refresh_related(claimed)
+    except Exception as e:
+        db.session.rollback()
+        # Keep the items queued for the next run
+        mark_related_dirty(*claimed)
+        db.session.commit()
+        return {'status': 'error', 'due': len(due), 'error': str(e)}
+
+    return {'status': 'success', 'due': len(due), **report}
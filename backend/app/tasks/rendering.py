@@ -0,0 +1,46 @@
+import time
+from flask import current_app
+from app import celery_app, db
+from app.models import ArticleTranslation
+
+# Popular pages with stale HTML would otherwise enqueue a job on every hit
+# until the worker catches up.
+RESCHEDULE_AFTER_SECONDS = 300
+_recently_scheduled = {}
+
+
+@celery_app.task(name='tasks.rerender_translation')
+def rerender_translation(translation_id):
+    """
+    Regenerate stored HTML for a translation rendered by an older renderer config.
+    """
+    translation = ArticleTranslation.query.get(translation_id)
+    if not translation:
+        return {'error': 'Translation not found'}
+
+    if not translation.is_render_stale:
+        return {'status': 'skipped', 'translation_id': translation_id}
+
+    translation.backfill_rendered_html()
+    db.session.commit()
+
+    return {'status': 'success', 'translation_id': translation_id}
+
+
+def schedule_rerender(translation_id):
+    """Enqueue a background re-render, at most once per translation per window"""
+    now = time.monotonic()
+    last = _recently_scheduled.get(translation_id)
+    if last is not None and now - last < RESCHEDULE_AFTER_SECONDS:
+        return False
+
+    if len(_recently_scheduled) > 10000:
+        _recently_scheduled.clear()
+    _recently_scheduled[translation_id] = now
+
+    try:
+        rerender_translation.delay(translation_id)
+    except Exception as e:
+        current_app.logger.warning('Could not enqueue re-render for %s: %s', translation_id, e)
+        return False
+    return True
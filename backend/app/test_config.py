@@ -27,6 +27,14 @@ class TestConfig:
     # Redis - not needed for tests
     REDIS_URL = 'redis://localhost:6379/0'
 
+    # Rendered markdown cache - local tier only
+    RENDER_CACHE_MAX_BYTES = 8 * 1024 * 1024
+    RENDER_CACHE_REDIS_ENABLED = False
+    RENDER_CACHE_TTL = 3600
+
+    # Search - resolves to the SQLite FTS5 backend
+    SEARCH_BACKEND = 'auto'
+
     # Celery - disable for tests
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True
@@ -60,6 +68,47 @@ class TestConfig:
     # Embedding model
     EMBEDDING_MODEL = 'text-embedding-3-small'
     EMBEDDING_DIMENSIONS = 1536
+    EMBEDDING_PROVIDER = 'local'
+    EMBEDDING_BATCH_SIZE = 128
+    EMBEDDING_MAX_CONCURRENCY = 4
+    EMBEDDING_MAX_RETRIES = 5
+    EMBEDDING_RETRY_BACKOFF = 0.0
+    EMBEDDING_REQUEST_TIMEOUT = 30
+    EMBEDDING_SEARCH_PROVIDER = ''
+    EMBEDDING_SEARCH_MODEL = ''
+    EMBEDDING_SEARCH_DIMENSIONS = 0
+    OPENAI_BASE_URL = 'https://api.openai.com/v1'
+    EMBEDDING_CHUNK_TOKENS = 400
+    EMBEDDING_CHUNK_OVERLAP = 50
+    EMBED_ON_WRITE = False
+    EMBED_QUIET_SECONDS = 60
+    EMBED_MAX_DELAY_SECONDS = 600
+    EMBED_DRAIN_INTERVAL = 30
+    EMBED_DRAIN_BATCH_SIZE = 200
+    VECTOR_BACKEND = 'auto'
+    VECTOR_INDEX_PATH = ''
+    VECTOR_INDEX_TTL = 300
+    VECTOR_QUANTIZED = False
+    VECTOR_RERANK_FACTOR = 4
+    VECTOR_FIRST_PASS_DIMENSIONS = 0
+    RELATED_NEIGHBORS = 20
+    RELATED_REFRESH_INTERVAL = 300
+    RELATED_REFRESH_BATCH_SIZE = 100
+    NEAR_DUPLICATE_SHINGLE_SIZE = 5
+    NEAR_DUPLICATE_BANDS = 16
+    NEAR_DUPLICATE_ROWS = 8
+    NEAR_DUPLICATE_THRESHOLD = 0.7
+    NEAR_DUPLICATE_CHECK_ON_CREATE = True
+    HYBRID_RRF_K = 60
+    HYBRID_KEYWORD_WEIGHT = 1.0
+    HYBRID_SEMANTIC_WEIGHT = 1.0
+    HYBRID_CANDIDATES = 100
+    HYBRID_SEARCH_WORKERS = 4
+    HNSW_EF_SEARCH = 100
+    QUERY_EMBEDDING_CACHE_SIZE = 256
+    QUERY_EMBEDDING_CACHE_REDIS_ENABLED = False
+    QUERY_EMBEDDING_CACHE_TTL = 3600
+    SEARCH_LOG_ENABLED = True
 
     # Supported languages
     SUPPORTED_LANGUAGES = ['en', 'de', 'es', 'fr', 'it', 'pt', 'ru', 'zh', 'ja', 'ko']
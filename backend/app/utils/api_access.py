@@ -1,4 +1,5 @@
 from flask import current_app, request, abort
+from flask_login import current_user
 
 # Methods that are always allowed regardless of mode (safe/readonly)
 ALLOWED_METHODS = {'GET', 'HEAD', 'OPTIONS'}
@@ -15,3 +16,10 @@ def enforce_read_only_in_public_mode():
 
     if app_mode == 'public' or public_read_only:
         abort(403, description='Write operations are disabled on the public service')
+
+
+def caller_visibility():
+    """Visibility values the caller may see: anonymous and public-service callers only see public content"""
+    if current_app.config.get('APP_MODE') == 'public' or not current_user.is_authenticated:
+        return ('public',)
+    return None
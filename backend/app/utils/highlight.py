@@ -0,0 +1,220 @@
+"""
+Code highlighting extension for the markdown renderer.
+
+A drop-in replacement for Python-Markdown's codehilite extension that keeps
+its output but avoids its slow paths:
+
+* Lexer classes are resolved once per fence language and cached, instead of
+  scanning the Pygments lexer registry for every block.
+* Blocks without a language are handled according to ``guess_mode``:
+  ``'guess'`` runs Pygments' guess_lexer (tries every lexer - slow),
+  ``'heuristic'`` sniffs the first few lines for well-known markers and
+  ``'off'`` renders them as plain text.
+* Highlighted blocks are memoized per document by a hash of the code and
+  options, so repeated snippets are only highlighted once.
+"""
+import hashlib
+import re
+from functools import lru_cache
+
+from markdown.extensions import codehilite, fenced_code
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension, HiliteTreeprocessor
+from pygments import highlight
+from pygments.formatters import find_formatter_class
+from pygments.lexers import find_lexer_class_by_name, guess_lexer
+from pygments.util import ClassNotFound
+
+
+GUESS_MODES = ('guess', 'heuristic', 'off')
+
+# Lines inspected by the heuristic; markers appear near the top of a snippet.
+SNIFF_LINES = 5
+
+_SHEBANG_RE = re.compile(r'^#!\s*(?:\S*/)?(?:env\s+)?(?P<interpreter>[a-z]+\d*)')
+
+_INTERPRETERS = {
+    'python': 'python', 'python3': 'python', 'bash': 'bash', 'sh': 'bash',
+    'zsh': 'bash', 'node': 'javascript', 'ruby': 'ruby', 'perl': 'perl', 'php': 'php',
+}
+
+# (pattern, alias) checked in order against the first non-blank lines
+_MARKERS = [
+    (re.compile(r'^<\?php'), 'php'),
+    (re.compile(r'^<\?xml'), 'xml'),
+    (re.compile(r'^<(!doctype|html|head|body|div|span|p|a|ul|script|style)\b', re.I), 'html'),
+    (re.compile(r'^(from\s+[\w.]+\s+import|import\s+[\w.]+\s*$|def\s+\w+\(|class\s+\w+(\(.*\))?:|@\w+)'), 'python'),
+    (re.compile(r'^(import\s.+\sfrom\s|export\s|const\s|let\s|var\s|function\b|async\s+function\b)'), 'javascript'),
+    (re.compile(r'^(select|insert\s+into|update\s+\w+\s+set|delete\s+from|create\s+(table|index|view)|alter\s+table|with\s+\w+\s+as)\b', re.I), 'sql'),
+    (re.compile(r'^(package\s+\w+|func\s+\w+\()'), 'go'),
+    (re.compile(r'^#include\s*[<"]'), 'c'),
+    (re.compile(r'^(using\s+System|namespace\s+[\w.]+)'), 'csharp'),
+    (re.compile(r'^(public|private|protected)\s+(static\s+)?(class|interface|void)\b'), 'java'),
+    (re.compile(r'^(fn\s+\w+|use\s+\w+::|let\s+mut\s)'), 'rust'),
+    (re.compile(r'^(\$\s|sudo\s|apt(-get)?\s|pip3?\s|npm\s|yarn\s|git\s|cd\s|docker\s|curl\s|flask\s|export\s+\w+=)'), 'bash'),
+    (re.compile(r'^[\w-]+:(\s|$)'), 'yaml'),
+    (re.compile(r'^[\[{]'), 'json'),
+]
+
+
+@lru_cache(maxsize=256)
+def lexer_class(name):
+    """Resolve a fence language to a Pygments lexer class, or None if unknown"""
+    if not name:
+        return None
+    try:
+        return find_lexer_class_by_name(name)
+    except ClassNotFound:
+        return None
+
+
+@lru_cache(maxsize=16)
+def formatter_class(name):
+    """Resolve a Pygments formatter name, falling back to html"""
+    return find_formatter_class(name) or find_formatter_class('html')
+
+
+def sniff_language(code):
+    """
+    Cheap language guess from the first few lines of a code block.
+
+    Args:
+        code (str): The code block
+
+    Returns:
+        str: A Pygments alias, or 'text' when nothing matches
+    """
+    lines = [line.strip() for line in code.lstrip().split('\n', SNIFF_LINES)[:SNIFF_LINES]]
+    lines = [line for line in lines if line]
+    if not lines:
+        return 'text'
+
+    shebang = _SHEBANG_RE.match(lines[0])
+    if shebang:
+        return _INTERPRETERS.get(shebang.group('interpreter'), 'text')
+
+    for line in lines:
+        for pattern, alias in _MARKERS:
+            if pattern.match(line):
+                return alias
+    return 'text'
+
+
+class CodeHighlighter(CodeHilite):
+    """CodeHilite with cached lexer lookup, configurable guessing and a memo"""
+
+    def __init__(self, src, **options):
+        self.guess_mode = options.pop('guess_mode', 'guess')
+        self.memo = options.pop('memo', None)
+        super().__init__(src, **options)
+        if not self.guess_lang:
+            self.guess_mode = 'off'
+
+    def hilite(self, shebang=True):
+        if not (codehilite.pygments and self.use_pygments):
+            return super().hilite(shebang)
+
+        self.src = self.src.strip('\n')
+        if self.lang is None and shebang:
+            self._parseHeader()
+
+        key = None
+        if self.memo is not None:
+            key = hashlib.sha256(repr((
+                self.lang, self.guess_mode, self.pygments_formatter,
+                sorted(self.options.items()), self.src,
+            )).encode('utf-8')).hexdigest()
+            html = self.memo.get(key)
+            if html is not None:
+                return html
+
+        lexer = self._get_lexer()
+        if not self.lang:
+            self.lang = lexer.aliases[0]
+
+        if isinstance(self.pygments_formatter, str):
+            formatter = formatter_class(self.pygments_formatter)(**self.options)
+        else:
+            formatter = self.pygments_formatter(
+                lang_str=f'{self.lang_prefix}{self.lang}', **self.options
+            )
+
+        html = highlight(self.src, lexer, formatter)
+        if key is not None:
+            self.memo[key] = html
+        return html
+
+    def _get_lexer(self):
+        cls = lexer_class(self.lang)
+        if cls is not None:
+            return cls(**self.options)
+
+        if self.guess_mode == 'guess':
+            try:
+                return guess_lexer(self.src, **self.options)
+            except ValueError:
+                pass
+        elif self.guess_mode == 'heuristic':
+            cls = lexer_class(sniff_language(self.src))
+            if cls is not None:
+                return cls(**self.options)
+        return lexer_class('text')(**self.options)
+
+
+class HighlightTreeprocessor(HiliteTreeprocessor):
+    """Highlight indented code blocks with CodeHighlighter"""
+
+    def run(self, root):
+        for block in root.iter('pre'):
+            if len(block) == 1 and block[0].tag == 'code':
+                local_config = self.config.copy()
+                code = CodeHighlighter(
+                    self.code_unescape(block[0].text),
+                    tab_length=self.md.tab_length,
+                    style=local_config.pop('pygments_style', 'default'),
+                    **local_config
+                )
+                placeholder = self.md.htmlStash.store(code.hilite())
+                block.clear()
+                block.tag = 'p'
+                block.text = placeholder
+
+
+class HighlightExtension(CodeHiliteExtension):
+    """
+    codehilite replacement; accepts every codehilite option plus guess_mode.
+
+    Subclassing CodeHiliteExtension keeps fenced_code (loaded via 'extra')
+    picking up this extension's configuration for fenced blocks.
+    """
+
+    def __init__(self, **kwargs):
+        # Popped first: codehilite would coerce 'off' to a boolean
+        guess_mode = kwargs.pop('guess_mode', 'guess')
+        if guess_mode not in GUESS_MODES:
+            raise ValueError(f"guess_mode must be one of {', '.join(GUESS_MODES)}")
+
+        self.memo = {}
+        super().__init__(**kwargs)
+        self.config['guess_mode'] = [guess_mode, 'Language guessing: guess|heuristic|off']
+        # Shared by reference with every highlighter created for a document
+        self.config['memo'] = [self.memo, '']
+
+    def extendMarkdown(self, md):
+        hiliter = HighlightTreeprocessor(md)
+        hiliter.config = self.getConfigs()
+        md.treeprocessors.register(hiliter, 'hilite', 30)
+
+        md.registerExtension(self)
+
+    def reset(self):
+        self.memo.clear()
+
+
+# fenced_code instantiates the highlighter through its module-level name, so
+# point it at the caching subclass. Without guess_mode/memo options it behaves
+# like the stock CodeHilite.
+fenced_code.CodeHilite = CodeHighlighter
+
+
+def makeExtension(**kwargs):
+    return HighlightExtension(**kwargs)
@@ -2,7 +2,100 @@
 Markdown rendering utility for converting markdown to HTML.
 Uses Python-Markdown with extensions for rich content support.
 """
+import hashlib
+import json
+import math
+import re
+import threading
+from contextlib import contextmanager
+
 import markdown
+import pygments
+
+from app.config import Config
+
+from . import highlight
+from .render_cache import render_cache
+
+
+MARKDOWN_EXTENSIONS = [
+    'extra',              # Includes tables, footnotes, etc.
+    highlight.__name__,  # Code syntax highlighting (cached codehilite)
+    'fenced_code',       # Fenced code blocks
+    'nl2br',             # Convert newlines to <br>
+    'sane_lists',        # Better list handling
+    'smarty',            # Smart typography
+    'toc',               # Table of contents
+    'attr_list',         # Add attributes to elements
+    'def_list',          # Definition lists
+    'abbr',              # Abbreviations
+]
+
+MARKDOWN_EXTENSION_CONFIGS = {
+    highlight.__name__: {
+        'css_class': 'highlight',
+        'linenums': False,
+        'guess_lang': True,
+        'guess_mode': Config.MARKDOWN_GUESS_LANG,
+    },
+    'toc': {
+        'permalink': True,
+        'permalink_class': 'toc-link',
+    }
+}
+
+# Identifies the output of this renderer configuration. Anything that can change
+# the generated HTML belongs in here so cached/stored HTML is invalidated with it.
+RENDERER_FINGERPRINT = hashlib.sha256(json.dumps({
+    'extensions': MARKDOWN_EXTENSIONS,
+    'extension_configs': MARKDOWN_EXTENSION_CONFIGS,
+    'markdown': markdown.__version__,
+    'pygments': pygments.__version__,
+}, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+# Building a Markdown instance loads and wires up every extension, which costs
+# more than converting a typical article. Engines are therefore kept in a
+# per-thread pool and reset() between uses instead of being rebuilt per call.
+_pool = threading.local()
+
+
+def build_markdown_engine():
+    """Create a new Markdown engine with the standard extension set"""
+    return markdown.Markdown(
+        extensions=MARKDOWN_EXTENSIONS,
+        extension_configs=MARKDOWN_EXTENSION_CONFIGS
+    )
+
+
+@contextmanager
+def markdown_engine():
+    """
+    Borrow a pre-built Markdown engine from the current thread's pool.
+
+    The engine is reset on release so no state (footnotes, abbreviations,
+    reference links, TOC) leaks into the next conversion. Nested use on the
+    same thread gets a separate engine.
+    """
+    engines = getattr(_pool, 'engines', None)
+    if engines is None:
+        engines = _pool.engines = []
+
+    md = engines.pop() if engines else build_markdown_engine()
+    try:
+        yield md
+    finally:
+        _reset_engine(md)
+        engines.append(md)
+
+
+def _reset_engine(md):
+    """Reset an engine, including state that Markdown.reset() leaves behind"""
+    md.reset()
+    # The abbr extension registers one inline pattern per definition on the
+    # engine itself and never removes them, so a reused engine would keep
+    # expanding abbreviations from earlier documents.
+    for name in [name for name in md.inlinePatterns._data if name.startswith('abbr-')]:
+        md.inlinePatterns.deregister(name)
 
 
 def render_markdown(markdown_text):
@@ -18,40 +111,145 @@ def render_markdown(markdown_text):
     if not markdown_text:
         return ""
 
-    md = markdown.Markdown(
-        extensions=[
-            'extra',              # Includes tables, footnotes, etc.
-            'codehilite',        # Code syntax highlighting
-            'fenced_code',       # Fenced code blocks
-            'nl2br',             # Convert newlines to <br>
-            'sane_lists',        # Better list handling
-            'smarty',            # Smart typography
-            'toc',               # Table of contents
-            'attr_list',         # Add attributes to elements
-            'def_list',          # Definition lists
-            'abbr',              # Abbreviations
-        ],
-        extension_configs={
-            'codehilite': {
-                'css_class': 'highlight',
-                'linenums': False,
-                'guess_lang': True,
-            },
-            'toc': {
-                'permalink': True,
-                'permalink_class': 'toc-link',
-            }
+    key = render_cache.make_key(markdown_text, RENDERER_FINGERPRINT)
+    html = render_cache.get(key)
+    if html is None:
+        with markdown_engine() as md:
+            html = md.convert(markdown_text)
+        render_cache.set(key, html)
+    return html
+
+
+def render_markdown_with_toc(markdown_text):
+    """
+    Convert markdown text to HTML and also return its table of contents.
+
+    Args:
+        markdown_text (str): The markdown text to convert
+
+    Returns:
+        tuple: (html, toc) where toc is the nested heading list produced by the
+        toc extension: [{'level', 'id', 'name', 'children'}, ...]
+    """
+    if not markdown_text:
+        return "", []
+
+    key = render_cache.make_key(markdown_text, RENDERER_FINGERPRINT + ':toc')
+    cached = render_cache.get(key)
+    if cached is not None:
+        document = json.loads(cached)
+        return document['html'], document['toc']
+
+    html, toc = convert_markdown(markdown_text)
+    render_cache.set(key, json.dumps({'html': html, 'toc': toc}))
+    return html, toc
+
+
+def convert_markdown(markdown_text):
+    """
+    Uncached conversion returning (html, toc); for bulk jobs where every
+    document is distinct and a cache round-trip would only add overhead.
+    """
+    if not markdown_text:
+        return "", []
+
+    with markdown_engine() as md:
+        html = md.convert(markdown_text)
+        toc = _toc_tree(md.toc_tokens)
+    return html, toc
+
+
+def _toc_tree(tokens):
+    return [
+        {
+            'level': token['level'],
+            'id': token['id'],
+            'name': token['name'],
+            'children': _toc_tree(token['children']),
         }
+        for token in tokens
+    ]
+
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+
+
+def compute_listing_fields(markdown_text):
+    """
+    Compute the denormalized fields shown on listing cards.
+
+    Args:
+        markdown_text (str): The markdown text
+
+    Returns:
+        dict: excerpt, word_count and read_time_minutes
+    """
+    word_count = len(markdown_text.split()) if markdown_text else 0
+    return {
+        'excerpt': get_excerpt(markdown_text, EXCERPT_LENGTH),
+        'word_count': word_count,
+        'read_time_minutes': max(1, math.ceil(word_count / WORDS_PER_MINUTE)) if word_count else 0,
+    }
+
+
+# Block-level lines that contribute nothing to an excerpt
+_EXCERPT_SKIP_LINE_RE = re.compile(r"""
+    [ ]{0,3}(?:
+        \[[^\]]+\]:\s                          # link reference / footnote definition
+      | \*\[[^\]]+\]:                          # abbreviation definition
+      | ([-*_])(?:[ ]*\1){2,}[ ]*$             # horizontal rule
+      | =+[ ]*$                                # setext heading underline
+      | \|?[ ]*:?-+:?[ ]*(?:\|[ ]*:?-+:?[ ]*)*\|?[ ]*$   # table separator
+      | <!--.*-->[ ]*$                         # single-line HTML comment
     )
+""", re.VERBOSE)
 
-    html = md.convert(markdown_text)
-    return html
+_EXCERPT_FENCE_RE = re.compile(r'[ ]{0,3}(`{3,}|~{3,})')
+
+# Blockquote, heading, list and task markers at the start of a line
+_EXCERPT_PREFIX_RE = re.compile(r'\s*(?:>\s*)*(?:#{1,6}(?:\s+|$)|[-*+]\s+(?:\[[ xX]\]\s+)?|\d+[.)]\s+)?')
+
+# Inline tokens, matched lazily left to right. Plain text runs are capped so a
+# huge line without markup is still consumed in bounded steps.
+_EXCERPT_INLINE_RE = re.compile(r"""
+    (?P<image>!\[[^\]]*\]\([^)]*\))
+  | \[(?P<link>[^\]^][^\]]*)\](?:\([^)]*\)|\[[^\]]*\])?
+  | (?P<footnote>\[\^[^\]]*\])
+  | (?P<ticks>`+)(?P<code>.+?)(?P=ticks)
+  | <(?P<url>[a-z][a-z0-9+.-]*://[^>\s]+)>
+  | (?P<html></?[A-Za-z][^>]*>)
+  | (?P<attrs>\{:?\s*[#.][^}]*\})
+  | \\(?P<escaped>[\\`*_{}\[\]()#+\-.!|~>])
+  | (?P<marker>\*+|~~|(?<!\w)_+|_+(?!\w)|\#+[ ]*$)
+  | (?P<cell>\|)
+  | (?P<text>[^!\[`<{\\*~_|#]{1,256}|.)
+""", re.VERBOSE)
+
+
+def _excerpt_runs(text, start, end):
+    """Visible text runs of text[start:end]; None marks a table cell boundary"""
+    for token in _EXCERPT_INLINE_RE.finditer(text, start, end):
+        kind = token.lastgroup
+        if kind == 'link':
+            # Link text is inline markup itself, e.g. [**bold**](url)
+            yield from _excerpt_runs(text, token.start('link'), token.end('link'))
+        elif kind == 'cell':
+            yield None
+        elif kind in ('text', 'code', 'url', 'escaped'):
+            yield token.group(kind)
 
 
 def get_excerpt(markdown_text, max_length=200):
     """
     Extract a plain text excerpt from markdown.
 
+    Scans the document line by line and stops as soon as enough visible text
+    has been collected, so the cost depends on max_length rather than on the
+    size of the document. Fenced code, definitions, rules and table separators
+    are skipped; links and images, emphasis, inline code and HTML are reduced
+    to their visible text.
+
     Args:
         markdown_text (str): The markdown text
         max_length (int): Maximum length of excerpt
@@ -62,19 +260,50 @@ def get_excerpt(markdown_text, max_length=200):
     if not markdown_text:
         return ""
 
-    # Remove markdown formatting
-    plain_text = markdown_text
-    plain_text = plain_text.replace('#', '')
-    plain_text = plain_text.replace('*', '')
-    plain_text = plain_text.replace('_', '')
-    plain_text = plain_text.replace('`', '')
-    plain_text = plain_text.replace('[', '')
-    plain_text = plain_text.replace(']', '')
-    plain_text = plain_text.replace('(', '')
-    plain_text = plain_text.replace(')', '')
-
-    # Remove extra whitespace
-    plain_text = ' '.join(plain_text.split())
+    parts = []
+    length = 0
+    space = False
+    fence = None
+    end = len(markdown_text)
+    pos = 0
+
+    while pos < end and length <= max_length:
+        eol = markdown_text.find('\n', pos)
+        if eol == -1:
+            eol = end
+
+        if fence:
+            close = _EXCERPT_FENCE_RE.match(markdown_text, pos, eol)
+            if (close and close.group(1)[0] == fence[0] and len(close.group(1)) >= len(fence)
+                    and not markdown_text[close.end():eol].strip()):
+                fence = None
+        elif (opening := _EXCERPT_FENCE_RE.match(markdown_text, pos, eol)):
+            fence = opening.group(1)
+        elif not _EXCERPT_SKIP_LINE_RE.match(markdown_text, pos, eol):
+            start = _EXCERPT_PREFIX_RE.match(markdown_text, pos, eol).end()
+            space = True
+            for raw in _excerpt_runs(markdown_text, start, eol):
+                if raw is None:
+                    space = True
+                    continue
+
+                words = raw.split()
+                if not words:
+                    space = True
+                    continue
+                if length and (space or raw[0].isspace()):
+                    parts.append(' ')
+                    length += 1
+                piece = ' '.join(words)
+                parts.append(piece)
+                length += len(piece)
+                space = raw[-1].isspace()
+                if length > max_length:
+                    break
+
+        pos = eol + 1
+
+    plain_text = ''.join(parts)
 
     # Truncate
     if len(plain_text) > max_length:
@@ -0,0 +1,169 @@
+"""
+Keyset (seek) pagination.
+
+OFFSET pagination makes the database read and discard every row before the
+requested page, so deep pages get linearly slower, and the COUNT that
+usually accompanies it scans the whole result again. Keyset pagination
+remembers the sort key of the last row served and asks for the rows
+strictly after it, which an index on the same columns answers without
+touching the earlier rows.
+
+The sort key travels to clients as an opaque cursor token. Every ordering
+must end in a unique column (the primary key) so that a key identifies
+exactly one position.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import literal, tuple_
+
+from app import db
+
+
+# How a listing reports its total: a real COUNT, the planner's row estimate
+# (PostgreSQL only, None elsewhere) or nothing at all.
+TOTAL_MODES = ('exact', 'estimate', 'none')
+
+
+class InvalidCursor(ValueError):
+    """A cursor token that cannot be decoded or belongs to another ordering"""
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query"""
+
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor  # None on the last page
+        self.total = total
+
+
+def encode_cursor(values):
+    """
+    Encode sort key values as an opaque, URL-safe cursor token.
+
+    Args:
+        values (iterable): Sort key of the last row served; str, int,
+            float, None or datetime
+
+    Returns:
+        str: Cursor token
+    """
+    payload = json.dumps(
+        [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        token (str): Cursor token
+        size (int): Number of sort key columns the listing expects
+
+    Returns:
+        list: Sort key values
+
+    Raises:
+        InvalidCursor: If the token is malformed or has the wrong arity
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor('Malformed cursor') from e
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Cursor does not match this listing')
+
+    decoded = []
+    for value in values:
+        if isinstance(value, dict):
+            try:
+                value = datetime.fromisoformat(value['dt'])
+            except (KeyError, TypeError, ValueError) as e:
+                raise InvalidCursor('Malformed cursor') from e
+        decoded.append(value)
+    return decoded
+
+
+def estimate_count(query):
+    """
+    Planner row estimate for a query, without running it.
+
+    Only PostgreSQL exposes a usable estimate; other databases return None.
+    """
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return None
+
+    compiled = query.order_by(None).statement.compile(dialect=bind.dialect)
+    plan = db.session.connection().exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled.string}', compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_total(query, mode):
+    """
+    Total number of rows for a listing according to mode (see TOTAL_MODES).
+
+    Args:
+        query: Filtered query, before pagination
+        mode (str): 'exact', 'estimate' or 'none'
+
+    Returns:
+        int or None
+    """
+    if mode == 'exact':
+        return query.order_by(None).count()
+    if mode == 'estimate':
+        return estimate_count(query)
+    return None
+
+
+def keyset_paginate(query, order_by, cursor=None, per_page=20, descending=True, total='none'):
+    """
+    Fetch one page of query ordered by order_by, starting after cursor.
+
+    Args:
+        query: Query selecting a single entity, with its filters applied
+        order_by (list): Sort key columns, most significant first, ending in
+            a unique column; all sorted in the same direction
+        cursor (str): next_cursor of the previous page; None or '' for the
+            first page
+        per_page (int): Page size
+        descending (bool): Sort direction
+        total (str): How to report the total, see TOTAL_MODES
+
+    Returns:
+        KeysetPage
+
+    Raises:
+        InvalidCursor: If cursor cannot be decoded for this ordering
+    """
+    page_total = count_total(query, total)
+
+    if cursor:
+        values = decode_cursor(cursor, len(order_by))
+        key = tuple_(*order_by)
+        after = tuple_(*[literal(value, column.type) for column, value in zip(order_by, values)])
+        query = query.filter(key < after if descending else key > after)
+
+    # One extra row tells whether another page follows
+    keys = [column.label(f'keyset_{i}') for i, column in enumerate(order_by)]
+    rows = query.add_columns(*keys).order_by(None).order_by(
+        *[column.desc() if descending else column.asc() for column in order_by]
+    ).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor(rows[per_page - 1][1:])
+    return KeysetPage([row[0] for row in rows[:per_page]], next_cursor, page_total)
@@ -0,0 +1,118 @@
+"""
+Incremental, block-level markdown preview.
+
+The document is split into top-level blocks; each block is rendered on its
+own (through the render cache, so unchanged blocks are never re-converted)
+and identified by a hash. The editor sends the hashes it already holds and
+only receives HTML for the blocks it is missing.
+
+Block rendering is an approximation of a full render: duplicate heading ids
+are only de-duplicated within a block. Documents using document-wide
+definitions (reference links, footnotes, abbreviations) fall back to a full
+render, since a definition in one block changes the output of others.
+"""
+import hashlib
+import re
+
+from .markdown_renderer import RENDERER_FINGERPRINT, render_markdown
+
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_LIST_ITEM_RE = re.compile(r'^ {0,3}([*+-]|\d+[.)])\s')
+_GLOBAL_DEFINITION_RE = re.compile(r'^ {0,3}(\[[^\]]+\]:|\*\[[^\]]*\]:)', re.MULTILINE)
+
+# More hashes than any editor document has blocks; bounds the set built per
+# request
+MAX_KNOWN_BLOCKS = 5000
+
+
+def _closes_fence(line, fence):
+    """True when line closes a fence opened with fence: same character, at least as long, nothing after"""
+    match = _FENCE_RE.match(line)
+    return bool(
+        match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence)
+        and not line[match.end():].strip()
+    )
+
+
+def split_blocks(markdown_text):
+    """
+    Split markdown into top-level blocks separated by blank lines.
+
+    Fenced code keeps its blank lines, and indented continuations or
+    following list items are kept with the block they belong to.
+    """
+    blocks = []
+    current = []
+    fence = None
+
+    for line in markdown_text.split('\n'):
+        if fence:
+            current.append(line)
+            if _closes_fence(line, fence):
+                fence = None
+            continue
+
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = []
+            continue
+
+        if not current and blocks:
+            previous_start = blocks[-1][0]
+            previous_is_list = bool(_LIST_ITEM_RE.match(previous_start))
+            indented = line.startswith((' ', '\t')) and not _FENCE_RE.match(line)
+            continues_previous = (
+                # list item continuation paragraphs and loose lists
+                (previous_is_list and (indented or _LIST_ITEM_RE.match(line)))
+                # indented code spanning blank lines
+                or (indented and previous_start.startswith((' ', '\t')))
+            )
+            if continues_previous:
+                current = blocks.pop()
+                current.append('')
+
+        match = _FENCE_RE.match(line)
+        if match:
+            fence = match.group(1)
+        current.append(line)
+
+    if current:
+        blocks.append(current)
+    return ['\n'.join(block) for block in blocks]
+
+
+def block_hash(block_text):
+    """Stable id for a block under the current renderer configuration"""
+    digest = hashlib.sha256(f'{RENDERER_FINGERPRINT}\n{block_text}'.encode('utf-8'))
+    return digest.hexdigest()[:20]
+
+
+def render_preview(markdown_text, known_hashes=()):
+    """
+    Render a preview, sending only the fragments the client does not have.
+
+    Args:
+        markdown_text (str): The full markdown document
+        known_hashes (iterable): Block hashes the client already holds
+
+    Returns:
+        dict: {'mode': 'blocks', 'blocks': [hash, ...], 'fragments': {hash: html}}
+        or {'mode': 'full', 'rendered_html': html} when block rendering
+        cannot be used for this document.
+    """
+    markdown_text = markdown_text or ''
+    if _GLOBAL_DEFINITION_RE.search(markdown_text):
+        return {'mode': 'full', 'rendered_html': render_markdown(markdown_text)}
+
+    known = set(known_hashes or ())
+    order = []
+    fragments = {}
+    for block in split_blocks(markdown_text):
+        digest = block_hash(block)
+        order.append(digest)
+        if digest not in known and digest not in fragments:
+            fragments[digest] = render_markdown(block)
+
+    return {'mode': 'blocks', 'blocks': order, 'fragments': fragments}
@@ -0,0 +1,70 @@
+"""
+Two-tier cache for rendered markdown.
+
+Tier 1 is an in-process LRU bounded by a byte budget. Tier 2 is Redis, shared
+by every worker, so identical markdown is only converted once per deployment.
+Keys combine a hash of the markdown with the renderer fingerprint; changing
+the extension config changes the fingerprint, and entries written under the
+old one simply age out of the LRU and expire in Redis.
+"""
+import hashlib
+
+from .two_tier_cache import TwoTierCache, setting
+
+
+KEY_PREFIX = 'kms:render'
+
+
+class RenderCache(TwoTierCache):
+    """
+    Content-hash keyed cache of rendered HTML with an LRU and a Redis tier.
+    The LRU is bounded by the UTF-8 size of the cached HTML.
+    """
+
+    redis_enabled_setting = 'RENDER_CACHE_REDIS_ENABLED'
+    ttl_setting = 'RENDER_CACHE_TTL'
+
+    def __init__(self, max_bytes=None):
+        super().__init__()
+        self._max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(markdown_text, fingerprint):
+        """Build the cache key for a markdown document"""
+        digest = hashlib.sha256(markdown_text.encode('utf-8')).hexdigest()
+        return f'{KEY_PREFIX}:{fingerprint}:{digest}'
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return setting('RENDER_CACHE_MAX_BYTES') or 0
+
+    def get(self, key):
+        """Return cached HTML for key, or None"""
+        return self.lookup(key)
+
+    def set(self, key, html):
+        """Store rendered HTML in both tiers"""
+        self.store(key, html)
+
+    def stats(self):
+        stats = super().stats()
+        stats['bytes'] = self._size
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+    def _budget(self):
+        return self.max_bytes
+
+    def _encode(self, html):
+        return html.encode('utf-8')
+
+    def _decode(self, data):
+        return data.decode('utf-8')
+
+    def _entry_size(self, html, encoded):
+        return len(encoded)
+
+
+render_cache = RenderCache()
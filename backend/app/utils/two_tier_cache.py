@@ -0,0 +1,185 @@
+"""
+In-process LRU in front of a shared Redis tier.
+
+Base class of the rendered-markdown cache (app.utils.render_cache) and the
+query-embedding cache (app.services.query_cache). Tier 1 is an LRU bounded
+by a budget in subclass-defined units (bytes, entries); tier 2 is Redis,
+shared by every worker. Redis is optional: when it is disabled or failing
+the cache degrades to the local tier.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+
+from app.config import Config
+
+
+# After a Redis error, skip the shared tier for this many seconds instead of
+# paying a connection timeout on every lookup.
+REDIS_RETRY_SECONDS = 30
+
+
+def setting(name):
+    """Read a setting from the active app config, falling back to Config"""
+    if has_app_context():
+        return current_app.config.get(name, getattr(Config, name, None))
+    return getattr(Config, name, None)
+
+
+class TwoTierCache:
+    """
+    LRU + Redis cache of values that can be rebuilt at any time.
+
+    Subclasses name their settings and implement _budget, _encode and
+    _decode; _prepare and _entry_size default to storing values as-is at
+    one budget unit each.
+    """
+
+    # Config flag enabling the Redis tier, and the TTL of Redis entries
+    redis_enabled_setting = None
+    ttl_setting = None
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_url = None
+        self._redis_down_until = 0.0
+        self._counters = {
+            'hits': 0,
+            'redis_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'redis_errors': 0,
+        }
+
+    def _budget(self):
+        """Capacity of the local tier, in _entry_size units"""
+        raise NotImplementedError
+
+    def _encode(self, value):
+        """Bytes stored in Redis for value"""
+        raise NotImplementedError
+
+    def _decode(self, data, **context):
+        """Value of Redis bytes, or None to treat them as a miss"""
+        raise NotImplementedError
+
+    def _prepare(self, value):
+        """Form in which value is kept and handed out"""
+        return value
+
+    def _entry_size(self, value, encoded):
+        return 1
+
+    def lookup(self, key, record=True, **context):
+        """
+        Return the value for key from either tier, or None.
+
+        record=False leaves the hit/miss counters alone (for warm-up
+        lookups); context is passed on to _decode.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += record
+                return entry[0]
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                data = client.get(key)
+            except Exception:
+                self._mark_redis_down()
+                data = None
+            value = self._decode(data, **context) if data is not None else None
+            if value is not None:
+                value = self._prepare(value)
+                self._store_local(key, value, self._entry_size(value, data))
+                with self._lock:
+                    self._counters['redis_hits'] += record
+                return value
+
+        with self._lock:
+            self._counters['misses'] += record
+        return None
+
+    def store(self, key, value):
+        """Store a value in both tiers; returns the form kept in the cache"""
+        value = self._prepare(value)
+        encoded = self._encode(value)
+        self._store_local(key, value, self._entry_size(value, encoded))
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.set(key, encoded, ex=setting(self.ttl_setting))
+            except Exception:
+                self._mark_redis_down()
+        return value
+
+    def clear(self):
+        """Drop all local entries and reset counters (Redis is left alone)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current LRU size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['redis_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['redis_hits']) / lookups, 4) if lookups else 0.0
+        stats['redis_enabled'] = self._get_redis() is not None
+        return stats
+
+    def _store_local(self, key, value, size):
+        budget = self._budget()
+        if size > budget:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._counters['evictions'] += 1
+
+    def _get_redis(self):
+        if not setting(self.redis_enabled_setting):
+            return None
+        if time.monotonic() < self._redis_down_until:
+            return None
+
+        url = setting('REDIS_URL')
+        if self._redis is None or self._redis_url != url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(
+                    url,
+                    socket_timeout=0.1,
+                    socket_connect_timeout=0.1,
+                )
+                self._redis_url = url
+            except Exception:
+                self._mark_redis_down()
+                return None
+        return self._redis
+
+    def _mark_redis_down(self):
+        with self._lock:
+            self._counters['redis_errors'] += 1
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
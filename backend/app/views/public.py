@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for
-import math
 from datetime import datetime
-from app.models import Content, ArticleTranslation, Tag, ContentTag
+from app.models import Content, ArticleTranslation, Tag
+from app.services.related import related_contents
+from app.services.search import apply_text_search, search_facets
+from app.utils.markdown_renderer import compute_listing_fields
 from app import db
 
 public_bp = Blueprint('public', __name__)
@@ -43,15 +45,13 @@ def index():
     featured_query = db.session.query(Content).join(ArticleTranslation).filter(
         ArticleTranslation.language == current_language,
         Content.visibility == 'public'
-    ).order_by(Content.created_at.desc()).limit(6).all()
+    ).options(Content.listing_options()).order_by(Content.created_at.desc()).limit(6).all()
 
     featured_content = []
     for content in featured_query:
         translation = next((t for t in content.translations if t.language == current_language), None)
         if translation:
-            # Get excerpt
-            excerpt = translation.markdown[:150] + '...' if len(translation.markdown) > 150 else translation.markdown
-            excerpt = excerpt.replace('#', '').replace('*', '').strip()
+            excerpt = translation.display_excerpt
 
             # Get tags
             tag_labels = [tag.default_label for tag in content.tags] if content.tags else []
@@ -79,9 +79,29 @@ def index():
     )
 
 
+def _get_rendered_html(translation):
+    """
+    Return the HTML stored at write time.
+    Missing HTML is rendered and saved once; HTML from an older renderer
+    config is served as-is while a background job regenerates it.
+    """
+    if translation.rendered_html is None:
+        html = translation.backfill_rendered_html()
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+        return html
+
+    if translation.is_render_stale:
+        from app.tasks.rendering import schedule_rerender
+        schedule_rerender(translation.id)
+
+    return translation.rendered_html
+
+
 def _get_content_data(content_id, current_language):
     """Helper function to fetch and prepare content data"""
-    from app.utils import render_markdown
     from app.models import MediaContent
 
     # Get content
@@ -109,15 +129,16 @@ def _get_content_data(content_id, current_language):
     # Get tags
     tag_labels = [tag.default_label for tag in content.tags] if content.tags else []
 
-    # Render markdown to HTML
-    markdown_html = render_markdown(translation.markdown)
+    # Stored HTML (rendered on write, backfilled lazily)
+    markdown_html = _get_rendered_html(translation)
 
     # Check if there's associated media
     media_content = MediaContent.query.filter_by(content_id=content.id).first()
 
     # Prepare content data
-    word_count = len(translation.markdown.split()) if translation and translation.markdown else 0
-    read_time_minutes = max(1, math.ceil(word_count / 200)) if word_count else 0
+    read_time_minutes = translation.read_time_minutes
+    if read_time_minutes is None:
+        read_time_minutes = compute_listing_fields(translation.markdown)['read_time_minutes']
     content_data = {
         'id': content.id,
         'type': content.type,
@@ -135,6 +156,33 @@ def _get_content_data(content_id, current_language):
     return content, content_data, available_languages
 
 
+# Related items shown under an article
+RELATED_ON_PAGE = 6
+
+
+def _get_related(content_id, language):
+    """Public related items from the precomputed neighbor lists, never computed per view"""
+    related = []
+    for content, neighbor in related_contents(content_id, language, RELATED_ON_PAGE, visibility=('public',)):
+        translation = next(
+            (t for t in content.translations if t.language == language),
+            next((t for t in content.translations if t.is_primary), content.translations[0] if content.translations else None)
+        )
+        if not translation:
+            continue
+        metadata = get_content_metadata(content.type)
+        related.append({
+            'id': content.id,
+            'type': content.type,
+            'type_label': metadata['label'],
+            'icon': metadata['icon'],
+            'title': translation.title,
+            'excerpt': translation.display_excerpt,
+            'language': translation.language,
+        })
+    return related
+
+
 @public_bp.route('/contents/<content_id>')
 def content_detail(content_id):
     """Legacy route - redirects to type-specific route"""
@@ -176,7 +224,8 @@ def article_detail(content_id):
         current_language=current_language,
         current_year=datetime.now().year,
         content=content_data,
-        available_languages=available_languages
+        available_languages=available_languages,
+        related=_get_related(content.id, content_data['language'])
     )
 
 
@@ -280,54 +329,49 @@ def search_page():
         'publication': 0
     }
 
-    if query or tag_filters:
-        # Base query for public content (include tags for search)
-        base_query = (
-            db.session.query(Content)
-            .join(ArticleTranslation)
-            .outerjoin(ContentTag)
-            .outerjoin(Tag)
-            .filter(
-                ArticleTranslation.language == current_language,
-                Content.visibility == 'public'
-            )
-        )
+    facets = {'type': {}, 'tag': [], 'language': {}}
 
-        # Search filter (title, markdown, tags) - only if query exists
-        if query:
-            search_filter = db.or_(
-                ArticleTranslation.title.ilike(f'%{query}%'),
-                ArticleTranslation.markdown.ilike(f'%{query}%'),
-                Tag.default_label.ilike(f'%{query}%'),
-                Tag.key.ilike(f'%{query}%')
-            )
-            base_query = base_query.filter(search_filter)
-
-        # Filter by selected tags
-        if tag_filters:
+    if query or tag_filters:
+        def apply_filters(q, language):
+            """Restrict a query joined to ArticleTranslation to public matches in language (None: any)"""
+            q = q.filter(Content.visibility == 'public')
+            rank = None
+            if query:
+                q, rank = apply_text_search(q, query, language)
             for tag_key in tag_filters:
-                base_query = base_query.filter(
-                    Content.tags.any(Tag.key == tag_key)
-                )
-
-        # Get category counts for all types
-        for c_type in ['article', 'video', 'audio', 'publication']:
-            count_query = base_query.filter(Content.type == c_type).distinct()
-            category_counts[c_type] = count_query.count()
+                q = q.filter(Content.tags.any(Tag.key == tag_key))
+            return q, rank
 
-        # Build filtered query
-        content_query = base_query
+        # Type, tag and language counts in one query; the total follows from them
+        matches, _ = apply_filters(
+            db.session.query(Content.id, Content.type, ArticleTranslation.language).join(ArticleTranslation),
+            None,
+        )
+        facets = search_facets(matches, current_language)
+        category_counts.update(facets['type'])
+
+        # Page query: one translation per content in the current language
+        content_query, rank = apply_filters(
+            db.session.query(Content).join(ArticleTranslation)
+            .filter(ArticleTranslation.language == current_language),
+            current_language,
+        )
         if content_type:
             content_query = content_query.filter(Content.type == content_type)
+            total = facets['type'].get(content_type, 0)
+        else:
+            total = sum(facets['type'].values())
 
-        # Get total count
-        total = content_query.distinct().count()
+        # Most relevant first where the database can rank matches
+        ordering = [Content.created_at.desc()]
+        if rank is not None:
+            ordering.insert(0, rank.desc())
 
         # Paginate
         content_items = (
             content_query
-            .order_by(Content.created_at.desc())
-            .distinct()
+            .options(Content.listing_options())
+            .order_by(*ordering)
             .offset((page - 1) * per_page)
             .limit(per_page)
             .all()
@@ -337,9 +381,7 @@ def search_page():
         for content in content_items:
             translation = next((t for t in content.translations if t.language == current_language), None)
             if translation:
-                # Get excerpt from markdown
-                excerpt = translation.markdown[:150] + '...' if len(translation.markdown) > 150 else translation.markdown
-                excerpt = excerpt.replace('#', '').replace('*', '').strip()
+                excerpt = translation.display_excerpt
 
                 # Get tags
                 tag_labels = [tag.default_label for tag in content.tags] if content.tags else []
@@ -372,5 +414,6 @@ def search_page():
         total=total,
         page=page,
         per_page=per_page,
-        category_counts=category_counts
+        category_counts=category_counts,
+        facets=facets
     )
@@ -1,10 +1,47 @@
-from flask import render_template, request, flash, redirect, url_for, current_app
+from flask import render_template, request, flash, redirect, url_for, current_app, abort, jsonify
 from werkzeug.routing import BuildError
 from flask_login import login_required
 from datetime import datetime
 from . import admin_bp
 
 
+def _content_sort_keys(sort_by):
+    """Keyset columns and direction for the admin content list sort options"""
+    from app.models import Content, ArticleTranslation
+
+    if sort_by == 'oldest':
+        return [Content.created_at, Content.id], False
+    if sort_by == 'title':
+        return [ArticleTranslation.title, Content.id], False
+    return [Content.created_at, Content.id], True  # newest
+
+
+def _paginate_listing(query, order_by, descending, page, per_page):
+    """
+    Fetch one page of an admin listing.
+
+    With a ?cursor= argument (empty for the first page) the listing is
+    keyset paginated and the total is only estimated; otherwise it uses
+    numbered pages with an exact count.
+
+    Returns:
+        tuple: (items, total, cursor, next_cursor)
+    """
+    from app.utils.pagination import InvalidCursor, keyset_paginate
+
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            result = keyset_paginate(query, order_by, cursor, per_page, descending, total='estimate')
+        except InvalidCursor:
+            abort(400)
+        return result.items, result.total, cursor, result.next_cursor
+
+    total = query.count()
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in order_by])
+    return query.offset((page - 1) * per_page).limit(per_page).all(), total, None, None
+
+
 @admin_bp.route('/')
 @login_required
 def index():
@@ -17,7 +54,7 @@ def index():
     # Get recent content (last 6 items)
     recent_query = db.session.query(Content).join(ArticleTranslation).filter(
         ArticleTranslation.language == current_language
-    ).order_by(Content.updated_at.desc()).limit(6).all()
+    ).options(Content.listing_options()).order_by(Content.updated_at.desc()).limit(6).all()
 
     recent_content = []
     for content in recent_query:
@@ -54,6 +91,7 @@ def index():
 def search_page():
     """Search page with results"""
     from app.models import Content, ArticleTranslation, Tag, ContentTag
+    from app.services.search import apply_text_search
     from app import db
 
     current_language = request.args.get('lang', 'de')
@@ -86,29 +124,26 @@ def search_page():
                 )
             )
 
-        # Search in title, markdown, or tags
+        # Full-text search over title, tags and body
+        rank = None
         if query:
-            search_filter = db.or_(
-                ArticleTranslation.title.ilike(f'%{query}%'),
-                ArticleTranslation.markdown.ilike(f'%{query}%'),
-                Tag.default_label.ilike(f'%{query}%'),
-                Tag.key.ilike(f'%{query}%')
-            )
-            content_query = content_query.outerjoin(ContentTag).outerjoin(Tag).filter(search_filter)
+            content_query, rank = apply_text_search(content_query, query, current_language)
 
         # Get total count
         total = content_query.count()
 
+        # Most relevant first where the database can rank matches
+        if rank is not None:
+            content_query = content_query.order_by(rank.desc())
+
         # Paginate
-        content_items = content_query.offset((page - 1) * per_page).limit(per_page).all()
+        content_items = content_query.options(Content.listing_options()).offset((page - 1) * per_page).limit(per_page).all()
 
         # Format results
         for content in content_items:
             translation = next((t for t in content.translations if t.language == current_language), None)
             if translation:
-                # Get excerpt from markdown
-                excerpt = translation.markdown[:200] + '...' if len(translation.markdown) > 200 else translation.markdown
-                excerpt = excerpt.replace('#', '').replace('*', '').strip()
+                excerpt = translation.display_excerpt
 
                 # Get tags
                 tag_labels = [tag.default_label for tag in content.tags] if content.tags else []
@@ -181,28 +216,18 @@ def contents_page():
             db.or_(Tag.key == tag_filter, Tag.default_label.ilike(f'%{tag_filter}%'))
         )
 
-    # Apply sorting
-    if sort_by == 'oldest':
-        content_query = content_query.order_by(Content.created_at.asc())
-    elif sort_by == 'title':
-        content_query = content_query.order_by(ArticleTranslation.title.asc())
-    else:  # newest
-        content_query = content_query.order_by(Content.created_at.desc())
-
-    # Get total count
-    total = content_query.count()
-
-    # Paginate
-    content_items = content_query.offset((page - 1) * per_page).limit(per_page).all()
+    # Sort and paginate
+    order_by, descending = _content_sort_keys(sort_by)
+    content_items, total, cursor, next_cursor = _paginate_listing(
+        content_query.options(Content.listing_options()), order_by, descending, page, per_page
+    )
 
     # Format results
     contents = []
     for content in content_items:
         translation = next((t for t in content.translations if t.language == current_language), None)
         if translation:
-            # Get excerpt from markdown
-            excerpt = translation.markdown[:150] + '...' if len(translation.markdown) > 150 else translation.markdown
-            excerpt = excerpt.replace('#', '').replace('*', '').strip()
+            excerpt = translation.display_excerpt
 
             # Get tags
             tag_labels = [tag.default_label for tag in content.tags] if content.tags else []
@@ -221,8 +246,8 @@ def contents_page():
     # Get available tags for filter
     available_tags = Tag.query.order_by(Tag.default_label).all()
 
-    # Calculate pagination
-    total_pages = (total + per_page - 1) // per_page
+    # Calculate pagination (no page numbers in cursor mode)
+    total_pages = (total + per_page - 1) // per_page if cursor is None else 0
 
     return render_template(
         'contents.html',
@@ -233,6 +258,8 @@ def contents_page():
         page=page,
         per_page=per_page,
         total_pages=total_pages,
+        cursor=cursor,
+        next_cursor=next_cursor,
         content_type=content_type,
         visibility=visibility,
         tag_filter=tag_filter,
@@ -286,22 +313,16 @@ def articles_page():
             db.or_(Tag.key == tag_filter, Tag.default_label.ilike(f'%{tag_filter}%'))
         )
 
-    if sort_by == 'oldest':
-        content_query = content_query.order_by(Content.created_at.asc())
-    elif sort_by == 'title':
-        content_query = content_query.order_by(ArticleTranslation.title.asc())
-    else:
-        content_query = content_query.order_by(Content.created_at.desc())
-
-    total = content_query.count()
-    content_items = content_query.offset((page - 1) * per_page).limit(per_page).all()
+    order_by, descending = _content_sort_keys(sort_by)
+    content_items, total, cursor, next_cursor = _paginate_listing(
+        content_query.options(Content.listing_options()), order_by, descending, page, per_page
+    )
 
     contents = []
     for content in content_items:
         translation = next((t for t in content.translations if t.language == current_language), None)
         if translation:
-            excerpt = translation.markdown[:150] + '...' if len(translation.markdown) > 150 else translation.markdown
-            excerpt = excerpt.replace('#', '').replace('*', '').strip()
+            excerpt = translation.display_excerpt
             tag_labels = [ct.tag.default_label for ct in content.content_tags] if hasattr(content, 'content_tags') else []
             contents.append({
                 'id': content.id,
@@ -315,7 +336,7 @@ def articles_page():
             })
 
     available_tags = Tag.query.order_by(Tag.default_label).all()
-    total_pages = (total + per_page - 1) // per_page
+    total_pages = (total + per_page - 1) // per_page if cursor is None else 0
 
     return render_template(
         'contents.html',
@@ -326,6 +347,8 @@ def articles_page():
         page=page,
         per_page=per_page,
         total_pages=total_pages,
+        cursor=cursor,
+        next_cursor=next_cursor,
         content_type='article',
         visibility=visibility,
         tag_filter=tag_filter,
@@ -333,7 +356,7 @@ def articles_page():
         available_tags=available_tags,
         page_title="Artikel - Verwaltungsportal",
         page_heading="Artikel verwalten",
-        page_subtitle=f"{total} Artikel gefunden",
+        page_subtitle=f"{total} Artikel gefunden" if total is not None else "Artikel",
         nav_new_url='admin.articles_new_page',
         nav_new_label='Neuer Artikel'
     )
@@ -453,7 +476,7 @@ def translations_page():
         content_query = content_query.filter(Content.type == content_type)
 
     # Order by most recent
-    content_items = content_query.order_by(Content.created_at.desc()).all()
+    content_items = content_query.options(Content.listing_options()).order_by(Content.created_at.desc()).all()
 
     # Format content with translation status
     contents_data = []
@@ -530,14 +553,10 @@ def media_page():
         media_with_transcripts = db.session.query(MediaContent.id).join(Transcript).filter(Transcript.language == current_language)
         media_query = media_query.filter(~MediaContent.id.in_(media_with_transcripts))
 
-    # Order by most recent
-    media_query = media_query.order_by(MediaContent.created_at.desc())
-
-    # Get total
-    total = media_query.count()
-
-    # Paginate
-    media_items = media_query.offset((page - 1) * per_page).limit(per_page).all()
+    # Most recent first, paginated
+    media_items, total, cursor, next_cursor = _paginate_listing(
+        media_query, [MediaContent.created_at, MediaContent.id], True, page, per_page
+    )
 
     # Format media data
     media_data = []
@@ -584,8 +603,8 @@ def media_page():
             'detail_url': detail_url
         })
 
-    # Calculate pagination
-    total_pages = (total + per_page - 1) // per_page
+    # Calculate pagination (no page numbers in cursor mode)
+    total_pages = (total + per_page - 1) // per_page if cursor is None else 0
 
     return render_template(
         'media.html',
@@ -596,6 +615,8 @@ def media_page():
         page=page,
         per_page=per_page,
         total_pages=total_pages,
+        cursor=cursor,
+        next_cursor=next_cursor,
         media_type=media_type,
         has_transcript=has_transcript
     )
@@ -641,28 +662,18 @@ def publications_page():
                 MediaContent.mime_type.in_(['application/vnd.openxmlformats-officedocument.wordprocessingml.document'])
             )
 
-    # Apply sorting
-    if sort_by == 'oldest':
-        publications_query = publications_query.order_by(Content.created_at.asc())
-    elif sort_by == 'title':
-        publications_query = publications_query.order_by(ArticleTranslation.title.asc())
-    else:  # newest
-        publications_query = publications_query.order_by(Content.created_at.desc())
-
-    # Get total count
-    total = publications_query.count()
-
-    # Paginate
-    publication_items = publications_query.offset((page - 1) * per_page).limit(per_page).all()
+    # Sort and paginate
+    order_by, descending = _content_sort_keys(sort_by)
+    publication_items, total, cursor, next_cursor = _paginate_listing(
+        publications_query.options(Content.listing_options()), order_by, descending, page, per_page
+    )
 
     # Format results
     publications = []
     for content in publication_items:
         translation = next((t for t in content.translations if t.language == current_language), None)
         if translation and content.media:
-            # Get excerpt from markdown
-            excerpt = translation.markdown[:200] + '...' if len(translation.markdown) > 200 else translation.markdown
-            excerpt = excerpt.replace('#', '').replace('*', '').strip()
+            excerpt = translation.display_excerpt
 
             # Get tags
             tag_labels = [tag.default_label for tag in content.tags] if content.tags else []
@@ -687,8 +698,8 @@ def publications_page():
                 'visibility': content.visibility
             })
 
-    # Calculate pagination
-    total_pages = (total + per_page - 1) // per_page
+    # Calculate pagination (no page numbers in cursor mode)
+    total_pages = (total + per_page - 1) // per_page if cursor is None else 0
 
     return render_template(
         'publications.html',
@@ -699,6 +710,8 @@ def publications_page():
         page=page,
         per_page=per_page,
         total_pages=total_pages,
+        cursor=cursor,
+        next_cursor=next_cursor,
         mime_filter=mime_filter,
         sort_by=sort_by
     )
@@ -709,6 +722,8 @@ def publications_upload_page():
     """Publications upload page"""
     from app.models import Content, ArticleTranslation, MediaContent, Tag, User
     from app import db
+    from app.tasks.embeddings import mark_embedding_dirty
+    from app.tasks.near_duplicates import schedule_near_duplicate_index
     from werkzeug.utils import secure_filename
     import os
     import uuid
@@ -800,6 +815,7 @@ def publications_upload_page():
                 is_primary=True
             )
             translation.generate_slug()
+            translation.refresh_derived_fields()
             db.session.add(translation)
 
             # Create MediaContent entry
@@ -828,7 +844,10 @@ def publications_upload_page():
                     db.session.add(tag)
                 content.tags.append(tag)
 
+            db.session.flush()
+            mark_embedding_dirty('article_translation', translation.id)
             db.session.commit()
+            schedule_near_duplicate_index('article_translation', translation.id)
 
             flash(f'Publikation "{title}" erfolgreich hochgeladen!', 'success')
             return redirect(url_for('admin.publications_page', lang=current_language))
@@ -1023,5 +1042,21 @@ def about_page():
     )
 
 
+@admin_bp.route('/ops/render-cache')
+@login_required
+def render_cache_stats():
+    """Rendered-HTML cache counters for this worker (for sizing the cache)"""
+    from app.utils.render_cache import render_cache
+    return jsonify(render_cache.stats()), 200
+
+
+@admin_bp.route('/ops/query-cache')
+@login_required
+def query_cache_stats():
+    """Query-embedding cache counters for this worker (hit rate, LRU size)"""
+    from app.services.query_cache import query_cache
+    return jsonify(query_cache.stats()), 200
+
+
 # NOTE: Content detail route moved to public.py
 # to allow public access to content without authentication
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full preview render vs. incremental block preview after a
+one-paragraph edit to a long document.
+
+Usage (from backend/):
+    python benchmarks/bench_block_preview.py [--sections 400] [--iterations 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local cache tier only, large enough to hold every block
+os.environ.setdefault('RENDER_CACHE_REDIS_ENABLED', 'false')
+os.environ.setdefault('RENDER_CACHE_MAX_BYTES', str(256 * 1024 * 1024))
+
+from app.utils.markdown_renderer import convert_markdown  # noqa: E402
+from app.utils.preview import render_preview  # noqa: E402
+
+
+def build_document(sections):
+    parts = []
+    for i in range(sections):
+        parts.append(f'## Section {i}\n\n'
+                     f'Paragraph {i} with *emphasis*, `code` and a [link](https://example.com/{i}).\n\n'
+                     f'- item {i}.1\n- item {i}.2\n\n'
+                     f'```python\ndef f_{i}():\n    return {i}\n```')
+    return '\n\n'.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sections', type=int, default=400)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    document = build_document(args.sections)
+    first = render_preview(document)
+    known = first['blocks']
+
+    full_total = 0.0
+    block_total = 0.0
+    for i in range(args.iterations):
+        edited = document.replace('Paragraph 7 ', f'Paragraph 7 (edit {i}) ', 1)
+
+        started = time.perf_counter()
+        convert_markdown(edited)
+        full_total += time.perf_counter() - started
+
+        started = time.perf_counter()
+        result = render_preview(edited, known)
+        block_total += time.perf_counter() - started
+
+    print(f'document:          {len(document) / 1024:.0f} KiB, {len(known)} blocks')
+    print(f'full render:       {full_total / args.iterations * 1000:.2f} ms/preview')
+    print(f'block preview:     {block_total / args.iterations * 1000:.2f} ms/preview '
+          f'({len(result["fragments"])} fragment(s) sent)')
+    print(f'speedup:           {full_total / block_total:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: code block language detection modes over the seed articles.
+
+Renders every article from seed_data.py with each guess_mode, once as
+written (fenced blocks carry a language) and once with the fence languages
+stripped, which is where Pygments' guess_lexer dominates the render time.
+
+Usage (from backend/):
+    python benchmarks/bench_code_highlight.py [--iterations 20]
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+import timeit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import markdown  # noqa: E402
+
+from app.utils import highlight  # noqa: E402
+from app.utils.markdown_renderer import (  # noqa: E402
+    MARKDOWN_EXTENSION_CONFIGS,
+    MARKDOWN_EXTENSIONS,
+)
+
+
+FENCE_LANG_RE = re.compile(r'^(```|~~~)[ \t]*[\w+#.-]+[ \t]*$', re.MULTILINE)
+
+
+def load_seed_articles():
+    """Pull the markdown bodies out of seed_data.py without touching a database"""
+    with open(os.path.join(BACKEND_DIR, 'seed_data.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    articles = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Dict):
+            continue
+        for key, value in zip(node.keys, node.values):
+            if (isinstance(key, ast.Constant) and key.value == 'markdown'
+                    and isinstance(value, ast.Constant)):
+                # The seed file escapes backticks inside its triple-quoted strings
+                articles.append(value.value.replace('\\`', '`'))
+    return articles
+
+
+def build_engine(guess_mode):
+    configs = dict(MARKDOWN_EXTENSION_CONFIGS)
+    configs[highlight.__name__] = dict(configs[highlight.__name__], guess_mode=guess_mode)
+    return markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, extension_configs=configs)
+
+
+def render_all(md, articles):
+    for text in articles:
+        md.reset()
+        md.convert(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    labelled = load_seed_articles()
+    unlabelled = [FENCE_LANG_RE.sub(r'\1', text) for text in labelled]
+    blocks = sum(text.count('```') // 2 for text in labelled)
+    print(f'articles: {len(labelled)}, fenced blocks: {blocks}, iterations: {args.iterations}')
+
+    results = {}
+    for corpus_name, corpus in (('labelled', labelled), ('unlabelled', unlabelled)):
+        for mode in highlight.GUESS_MODES:
+            md = build_engine(mode)
+            render_all(md, corpus)  # warm up lexer caches
+            total = timeit.timeit(lambda: render_all(md, corpus), number=args.iterations)
+            results[corpus_name, mode] = total / args.iterations * 1000
+            print(f'{corpus_name:<11} {mode:<10} {results[corpus_name, mode]:8.2f} ms/corpus')
+
+    guess = results['unlabelled', 'guess']
+    print(f"heuristic speedup (unlabelled): {guess / results['unlabelled', 'heuristic']:.1f}x")
+    print(f"off speedup (unlabelled):       {guess / results['unlabelled', 'off']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
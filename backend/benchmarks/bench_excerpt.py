@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass get_excerpt vs. the previous replace/split/join version
+on megabyte-sized markdown documents.
+
+Usage (from backend/):
+    python benchmarks/bench_excerpt.py [--size-mb 1] [--iterations 20]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.markdown_renderer import EXCERPT_LENGTH, get_excerpt  # noqa: E402
+
+
+SECTION = """## Section heading
+
+Some **bold** text, some _emphasis_ and a [link](https://example.com/path) with
+`inline code` and an ![image](https://example.com/image.png) in a paragraph.
+
+```python
+def example():
+    return [item for item in range(10)]
+```
+
+- list item one
+- list item two
+
+"""
+
+
+def legacy_get_excerpt(markdown_text, max_length=200):
+    """The previous implementation, kept here for comparison"""
+    if not markdown_text:
+        return ""
+
+    plain_text = markdown_text
+    for char in '#*_`[]()':
+        plain_text = plain_text.replace(char, '')
+    plain_text = ' '.join(plain_text.split())
+
+    if len(plain_text) > max_length:
+        plain_text = plain_text[:max_length].rsplit(' ', 1)[0] + '...'
+    return plain_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=float, default=1.0)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    target = int(args.size_mb * 1024 * 1024)
+    documents = {
+        'structured': '# Title\n\n' + SECTION * (target // len(SECTION) + 1),
+        'single line': 'word ' * (target // 5),
+    }
+
+    print(f'document size: {args.size_mb} MB, iterations: {args.iterations}')
+    for name, text in documents.items():
+        legacy = timeit.timeit(lambda: legacy_get_excerpt(text, EXCERPT_LENGTH), number=args.iterations)
+        current = timeit.timeit(lambda: get_excerpt(text, EXCERPT_LENGTH), number=args.iterations)
+        per_call = lambda total: total / args.iterations * 1000
+        print(f'{name:<12} legacy: {per_call(legacy):9.3f} ms  single-pass: {per_call(current):7.3f} ms  '
+              f'speedup: {legacy / current:,.0f}x')
+
+
+if __name__ == '__main__':
+    main()
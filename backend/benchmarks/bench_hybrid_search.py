@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: relevance and latency of keyword, semantic and hybrid search.
+
+Builds a throwaway SQLite database (a file, so hybrid search can run its
+retrievers in parallel) from the seed articles, split into one document per
+'## ' section, embeds every section with the configured provider and runs
+the labeled queries in hybrid_queries.json through each retriever.
+
+Reports recall@5, MRR@10 and nDCG@10 against the labels, plus p50/p95
+latency per query. With the offline 'local' provider the semantic side is
+purely lexical, so treat its numbers as a floor for a real embedding model.
+
+Usage (from backend/):
+    python benchmarks/bench_hybrid_search.py [--iterations 5] [--rrf-k 60]
+"""
+import argparse
+import ast
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app, db  # noqa: E402
+from app.test_config import TestConfig  # noqa: E402
+
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hybrid_queries.json')
+
+
+def load_seed_sections(language='en'):
+    """Split the seed articles into (title, markdown) documents, one per '## ' section"""
+    with open(os.path.join(BACKEND_DIR, 'seed_data.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    sections = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Dict):
+            continue
+        fields = {k.value: v.value for k, v in zip(node.keys, node.values)
+                  if isinstance(k, ast.Constant) and isinstance(v, ast.Constant)}
+        if 'markdown' not in fields or fields.get('language') != language:
+            continue
+
+        heading, lines = 'Introduction', []
+        # The seed file escapes backticks inside its triple-quoted strings
+        for line in fields['markdown'].replace('\\`', '`').splitlines():
+            if line.startswith('## '):
+                sections.append((f"{fields['title']} / {heading}", '\n'.join(lines)))
+                heading, lines = line[3:].strip(), []
+            elif not line.startswith('# '):
+                lines.append(line)
+        sections.append((f"{fields['title']} / {heading}", '\n'.join(lines)))
+    return sections
+
+
+def seed(sections, language='en'):
+    """Store each section as a public article with one embedding chunk; returns {content_id: title}"""
+    from app.models import ArticleTranslation, Content, Embedding, User
+    from app.services.embeddings import get_embedding_provider
+
+    user = User(email='bench@example.com', name='Bench')
+    user.set_password('bench')
+    db.session.add(user)
+    db.session.flush()
+
+    provider = get_embedding_provider()
+    vectors = provider.embed([f'{title}\n{text}' for title, text in sections])
+    titles = {}
+    for (title, text), vector in zip(sections, vectors):
+        content = Content(type='article', visibility='public', created_by_id=user.id)
+        db.session.add(content)
+        db.session.flush()
+        translation = ArticleTranslation(content_id=content.id, language=language, title=title, markdown=text)
+        translation.generate_slug()
+        translation.refresh_derived_fields()
+        db.session.add(translation)
+        db.session.flush()
+        db.session.add(Embedding(
+            owner_type='article_translation', owner_id=translation.id, language=language,
+            model=provider.model, dim=provider.dimensions, chunk_index=0, vector=vector,
+        ))
+        titles[content.id] = title
+    db.session.commit()
+    return titles
+
+
+def relevance(ranked, relevant):
+    """(recall@5, reciprocal rank within 10, nDCG@10) of ranked titles"""
+    recall = len(relevant.intersection(ranked[:5])) / len(relevant)
+    rr = next((1 / (i + 1) for i, title in enumerate(ranked[:10]) if title in relevant), 0.0)
+    dcg = sum(1 / math.log2(i + 2) for i, title in enumerate(ranked[:10]) if title in relevant)
+    ideal = sum(1 / math.log2(i + 2) for i in range(min(len(relevant), 10)))
+    return recall, rr, dcg / ideal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5, help='Timed runs per query')
+    parser.add_argument('--rrf-k', type=int, default=60)
+    parser.add_argument('--keyword-weight', type=float, default=1.0)
+    parser.add_argument('--semantic-weight', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(QUERIES_PATH, encoding='utf-8') as f:
+        queries = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        app = create_app(BenchConfig)
+        with app.test_request_context():
+            from app.services import hybrid
+
+            db.create_all()
+            titles = seed(load_seed_sections())
+            print(f'documents: {len(titles)}, queries: {len(queries)}, iterations: {args.iterations}')
+
+            weights = {'keyword': args.keyword_weight, 'semantic': args.semantic_weight}
+            modes = {
+                'keyword': lambda q: [cid for cid, _ in hybrid.keyword_ranking(q, 'en', 10)],
+                'semantic': lambda q: [cid for cid, _ in hybrid.semantic_ranking(q, 'en', 10)],
+                'hybrid': lambda q: [r.content_id for r in hybrid.hybrid_search(q, 'en', 10, None, args.rrf_k, weights)],
+            }
+
+            print(f"{'mode':<9} {'recall@5':>9} {'MRR@10':>7} {'nDCG@10':>8} {'p50 ms':>7} {'p95 ms':>7}")
+            for name, run in modes.items():
+                run(queries[0]['query'])  # warm up caches and the vector store
+                scores, timings = [], []
+                for item in queries:
+                    for _ in range(args.iterations):
+                        start = time.perf_counter()
+                        ranked = run(item['query'])
+                        timings.append((time.perf_counter() - start) * 1000)
+                    scores.append(relevance([titles[cid] for cid in ranked], set(item['relevant'])))
+
+                recall, mrr, ndcg = (statistics.mean(column) for column in zip(*scores))
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                print(f'{name:<9} {recall:9.3f} {mrr:7.3f} {ndcg:8.3f} '
+                      f'{statistics.median(timings):7.2f} {p95:7.2f}')
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: fresh Markdown engine per call vs. the pooled engine
+vs. the rendered-HTML cache.
+
+Usage (from backend/):
+    python benchmarks/bench_markdown_engine.py [--iterations 500]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.markdown_renderer import (  # noqa: E402
+    build_markdown_engine,
+    markdown_engine,
+    render_markdown,
+)
+
+
+SAMPLE_ARTICLE = """# Getting Started
+
+This is a *typical* article with a [link](https://example.com) and some `inline code`.
+
+## Setup
+
+1. Install the package
+2. Configure the service
+3. Run the tests
+
+```python
+def hello():
+    return "world"
+```
+
+| Column | Value |
+|--------|-------|
+| a      | 1     |
+
+Some text with a footnote[^1].
+
+[^1]: The footnote.
+"""
+
+
+def _fresh_engine():
+    return build_markdown_engine().convert(SAMPLE_ARTICLE)
+
+
+def _pooled_engine():
+    with markdown_engine() as md:
+        return md.convert(SAMPLE_ARTICLE)
+
+
+def _cached():
+    return render_markdown(SAMPLE_ARTICLE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    # Warm up the pool and pygments lexer caches
+    _pooled_engine()
+    _fresh_engine()
+
+    construct = timeit.timeit(build_markdown_engine, number=args.iterations)
+    fresh = timeit.timeit(_fresh_engine, number=args.iterations)
+    pooled = timeit.timeit(_pooled_engine, number=args.iterations)
+    _cached()
+    cached = timeit.timeit(_cached, number=args.iterations)
+
+    per_call = lambda total: total / args.iterations * 1000
+    print(f'iterations:            {args.iterations}')
+    print(f'engine construction:   {per_call(construct):.3f} ms/call')
+    print(f'fresh engine + render: {per_call(fresh):.3f} ms/call')
+    print(f'pooled engine render:  {per_call(pooled):.3f} ms/call')
+    print(f'cached render:         {per_call(cached):.3f} ms/call')
+    print(f'pooled speedup:        {fresh / pooled:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recall@k versus memory for quantized vector search.
+
+Generates clustered unit vectors (real embeddings are far from uniformly
+spread) and queries near stored rows, computes the exact float32 top k
+and compares it with:
+
+* halfvec - scores on float16 vectors, what pgvector's halfvec index sees
+* int8 - NumpyVectorStore with int8 codes and a per-vector scale
+
+each without re-ranking and with the best k * factor candidates re-ranked
+with the full-precision vectors (VECTOR_RERANK_FACTOR). Memory is what the
+search has to keep hot: the candidate matrix, not the cold float32 copy.
+Only the quantization is measured; HNSW graph recall comes on top of it,
+and halfvec latency is left to pgvector.
+
+Usage (from backend/):
+    python benchmarks/bench_vector_quantization.py [--rows 20000] [--dim 1536] [--k 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.vector_store import NumpyVectorStore  # noqa: E402
+
+
+def make_data(rows, dim, queries, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=rows)] + 0.6 * rng.standard_normal((rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    picks = rng.integers(rows, size=queries)
+    # Noise of norm ~1 around a stored row
+    query_vectors = vectors[picks] + 1.0 / np.sqrt(dim) * rng.standard_normal((queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return vectors, query_vectors
+
+
+def top_k(scores, k):
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def recall(found, truth):
+    return len(set(found) & set(truth)) / len(truth)
+
+
+def run_halfvec(vectors, queries, truth, k, factor):
+    half = vectors.astype(np.float16)
+    widened = half.astype(np.float32)
+    recalls = []
+    for query, expected in zip(queries, truth):
+        candidates = top_k(widened @ query, min(k * factor, len(half)))
+        if factor > 1:
+            candidates = candidates[top_k(vectors[candidates] @ query, k)]
+        recalls.append(recall(candidates[:k], expected))
+    # Latency is pgvector's to measure, not a numpy simulation's
+    return recalls, None, half.nbytes
+
+
+def run_store(store, queries, truth, k, rerank):
+    recalls, timings = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        results = store.search(query, k, rerank=rerank)
+        timings.append(time.perf_counter() - started)
+        recalls.append(recall([int(r[0]) for r in results], expected))
+    return recalls, timings, store.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=1536)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--clusters', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    vectors, queries = make_data(args.rows, args.dim, args.queries, args.clusters, args.seed)
+    truth = [top_k(vectors @ query, args.k) for query in queries]
+    rows = [(str(i), 'transcript', str(i), 0, 'en') for i in range(args.rows)]
+    k = args.k
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench')
+        exact = NumpyVectorStore(args.dim, capacity=args.rows)
+        exact.append(rows, vectors)
+        exact.save(path)
+        int8 = NumpyVectorStore.load(path, quantized=True)
+
+        results = [('float32', run_store(exact, queries, truth, k, None))]
+        for factor in (1, 4):
+            results.append((f'halfvec, rerank x{factor}', run_halfvec(vectors, queries, truth, k, factor)))
+        for factor in (1, 2, 4, 8):
+            results.append((f'int8, rerank x{factor}', run_store(int8, queries, truth, k, k * factor)))
+
+    print(f'{args.rows} vectors x {args.dim} dims, {args.queries} queries, recall@{k}')
+    print(f"{'mode':<20} {'recall':>8} {'min':>6} {'hot MB':>8} {'p50 ms':>8}")
+    for name, (recalls, timings, nbytes) in results:
+        latency = f'{statistics.median(timings) * 1000:8.2f}' if timings else f"{'n/a':>8}"
+        print(f'{name:<20} {statistics.mean(recalls):8.4f} {min(recalls):6.2f} '
+              f'{nbytes / 2 ** 20:8.1f} {latency}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""add composite indexes for keyset pagination
+
+Revision ID: a6d2e9f4b153
+Revises: f0c3b8d2a417
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2e9f4b153'
+down_revision = 'f0c3b8d2a417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('content', schema=None) as batch_op:
+        batch_op.create_index('idx_content_updated_id', ['updated_at', 'id'], unique=False)
+        batch_op.create_index('idx_content_created_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('media_content', schema=None) as batch_op:
+        batch_op.create_index('idx_media_content_created_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('webhook_event', schema=None) as batch_op:
+        batch_op.create_index(
+            'idx_webhook_event_webhook_created_id', ['webhook_id', 'created_at', 'id'], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('webhook_event', schema=None) as batch_op:
+        batch_op.drop_index('idx_webhook_event_webhook_created_id')
+
+    with op.batch_alter_table('media_content', schema=None) as batch_op:
+        batch_op.drop_index('idx_media_content_created_id')
+
+    with op.batch_alter_table('content', schema=None) as batch_op:
+        batch_op.drop_index('idx_content_created_id')
+        batch_op.drop_index('idx_content_updated_id')
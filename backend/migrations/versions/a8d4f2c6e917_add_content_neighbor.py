@@ -0,0 +1,46 @@
+"""add precomputed related content tables
+
+Revision ID: a8d4f2c6e917
+Revises: f3c8e1a7b294
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4f2c6e917'
+down_revision = 'f3c8e1a7b294'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'content_neighbor',
+        sa.Column('content_id', sa.String(length=36), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('neighbor_id', sa.String(length=36), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('method', sa.String(length=20), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['content_id'], ['content.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['neighbor_id'], ['content.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('content_id', 'language', 'rank')
+    )
+    op.create_index('idx_content_neighbor_neighbor', 'content_neighbor', ['neighbor_id'], unique=False)
+
+    op.create_table(
+        'content_neighbor_dirty',
+        sa.Column('content_id', sa.String(length=36), nullable=False),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('content_id')
+    )
+
+
+def downgrade():
+    op.drop_table('content_neighbor_dirty')
+    op.drop_index('idx_content_neighbor_neighbor', table_name='content_neighbor')
+    op.drop_table('content_neighbor')
@@ -0,0 +1,26 @@
+"""add renderer_version to article_translation
+
+Revision ID: b3e1f0a27c94
+Revises: 7d4a2b8c4c51
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e1f0a27c94'
+down_revision = '7d4a2b8c4c51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('article_translation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('renderer_version', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('article_translation', schema=None) as batch_op:
+        batch_op.drop_column('renderer_version')
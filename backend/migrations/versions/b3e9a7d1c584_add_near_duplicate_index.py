@@ -0,0 +1,48 @@
+"""add MinHash near-duplicate index
+
+Revision ID: b3e9a7d1c584
+Revises: a8d4f2c6e917
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e9a7d1c584'
+down_revision = 'a8d4f2c6e917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'near_duplicate_signature',
+        sa.Column('owner_type', sa.String(length=20), nullable=False),
+        sa.Column('owner_id', sa.String(length=36), nullable=False),
+        sa.Column('content_id', sa.String(length=36), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['content_id'], ['content.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('owner_type', 'owner_id')
+    )
+    op.create_index('idx_near_duplicate_signature_content', 'near_duplicate_signature', ['content_id'], unique=False)
+
+    op.create_table(
+        'near_duplicate_bucket',
+        sa.Column('bucket', sa.String(length=16), nullable=False),
+        sa.Column('owner_type', sa.String(length=20), nullable=False),
+        sa.Column('owner_id', sa.String(length=36), nullable=False),
+        sa.PrimaryKeyConstraint('bucket', 'owner_type', 'owner_id')
+    )
+    op.create_index('idx_near_duplicate_bucket_owner', 'near_duplicate_bucket', ['owner_type', 'owner_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_near_duplicate_bucket_owner', table_name='near_duplicate_bucket')
+    op.drop_table('near_duplicate_bucket')
+    op.drop_index('idx_near_duplicate_signature_content', table_name='near_duplicate_signature')
+    op.drop_table('near_duplicate_signature')
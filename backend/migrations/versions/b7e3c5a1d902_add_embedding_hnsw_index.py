@@ -0,0 +1,42 @@
+"""add HNSW vector index and model/language index to embedding
+
+Revision ID: b7e3c5a1d902
+Revises: a6d2e9f4b153
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3c5a1d902'
+down_revision = 'a6d2e9f4b153'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('embedding', schema=None) as batch_op:
+        batch_op.create_index(
+            'idx_embedding_model_language', ['model', 'language', 'owner_type'], unique=False
+        )
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # One HNSW index over all embeddings for cosine distance (m = 16,
+    # ef_construction = 64); f3c8e1a7b294 replaces it with per-model indexes
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS idx_embedding_vector_hnsw ON embedding '
+        'USING hnsw (vector vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_embedding_vector_hnsw')
+
+    with op.batch_alter_table('embedding', schema=None) as batch_op:
+        batch_op.drop_index('idx_embedding_model_language')
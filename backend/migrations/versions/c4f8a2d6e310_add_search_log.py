@@ -0,0 +1,35 @@
+"""add search log
+
+Revision ID: c4f8a2d6e310
+Revises: b7e3c5a1d902
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f8a2d6e310'
+down_revision = 'b7e3c5a1d902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'search_log',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('query_text', sa.String(length=500), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('mode', sa.String(length=20), nullable=False),
+        sa.Column('result_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_search_log_created', 'search_log', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_search_log_created', table_name='search_log')
+    op.drop_table('search_log')
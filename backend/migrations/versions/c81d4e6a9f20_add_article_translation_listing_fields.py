@@ -0,0 +1,32 @@
+"""add denormalized listing fields to article_translation
+
+Revision ID: c81d4e6a9f20
+Revises: b3e1f0a27c94
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81d4e6a9f20'
+down_revision = 'b3e1f0a27c94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('article_translation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('excerpt', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('word_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('read_time_minutes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('toc_json', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('article_translation', schema=None) as batch_op:
+        batch_op.drop_column('toc_json')
+        batch_op.drop_column('read_time_minutes')
+        batch_op.drop_column('word_count')
+        batch_op.drop_column('excerpt')
@@ -0,0 +1,112 @@
+"""key the SQLite FTS5 search index on stable integer ids
+
+Revision ID: d5a8c3f1e726
+Revises: b3e9a7d1c584
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c3f1e726'
+down_revision = 'b3e9a7d1c584'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of app.services.search.SQLITE_FTS_DDL
+FTS_DDL = [
+    """CREATE TABLE IF NOT EXISTS article_translation_fts_key (
+        search_rowid INTEGER PRIMARY KEY,
+        translation_id VARCHAR(36) NOT NULL UNIQUE
+    )""",
+    """CREATE VIEW IF NOT EXISTS article_translation_fts_source AS
+        SELECT k.search_rowid, t.title, t.search_tags, t.markdown
+        FROM article_translation_fts_key k JOIN article_translation t ON t.id = k.translation_id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS article_translation_fts USING fts5(
+        title, search_tags, markdown,
+        content='article_translation_fts_source', content_rowid='search_rowid',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS article_translation_fts_ai AFTER INSERT ON article_translation BEGIN
+        INSERT INTO article_translation_fts_key(translation_id) VALUES (new.id);
+        INSERT INTO article_translation_fts(rowid, title, search_tags, markdown)
+        VALUES ((SELECT search_rowid FROM article_translation_fts_key WHERE translation_id = new.id),
+                new.title, new.search_tags, new.markdown);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS article_translation_fts_ad AFTER DELETE ON article_translation BEGIN
+        INSERT INTO article_translation_fts(article_translation_fts, rowid, title, search_tags, markdown)
+        VALUES ('delete', (SELECT search_rowid FROM article_translation_fts_key WHERE translation_id = old.id),
+                old.title, old.search_tags, old.markdown);
+        DELETE FROM article_translation_fts_key WHERE translation_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS article_translation_fts_au
+    AFTER UPDATE OF title, search_tags, markdown ON article_translation BEGIN
+        INSERT INTO article_translation_fts(article_translation_fts, rowid, title, search_tags, markdown)
+        VALUES ('delete', (SELECT search_rowid FROM article_translation_fts_key WHERE translation_id = old.id),
+                old.title, old.search_tags, old.markdown);
+        INSERT INTO article_translation_fts(rowid, title, search_tags, markdown)
+        VALUES ((SELECT search_rowid FROM article_translation_fts_key WHERE translation_id = new.id),
+                new.title, new.search_tags, new.markdown);
+    END""",
+]
+
+# The index as created by f0c3b8d2a417, keyed on article_translation's
+# implicit rowid
+ROWID_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS article_translation_fts USING fts5(
+        title, search_tags, markdown,
+        content='article_translation', content_rowid='rowid',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS article_translation_fts_ai AFTER INSERT ON article_translation BEGIN
+        INSERT INTO article_translation_fts(rowid, title, search_tags, markdown)
+        VALUES (new.rowid, new.title, new.search_tags, new.markdown);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS article_translation_fts_ad AFTER DELETE ON article_translation BEGIN
+        INSERT INTO article_translation_fts(article_translation_fts, rowid, title, search_tags, markdown)
+        VALUES ('delete', old.rowid, old.title, old.search_tags, old.markdown);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS article_translation_fts_au
+    AFTER UPDATE OF title, search_tags, markdown ON article_translation BEGIN
+        INSERT INTO article_translation_fts(article_translation_fts, rowid, title, search_tags, markdown)
+        VALUES ('delete', old.rowid, old.title, old.search_tags, old.markdown);
+        INSERT INTO article_translation_fts(rowid, title, search_tags, markdown)
+        VALUES (new.rowid, new.title, new.search_tags, new.markdown);
+    END""",
+]
+
+
+def _drop_fts():
+    op.execute('DROP TRIGGER IF EXISTS article_translation_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS article_translation_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS article_translation_fts_ai')
+    op.execute('DROP TABLE IF EXISTS article_translation_fts')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _drop_fts()
+    for statement in FTS_DDL:
+        op.execute(statement)
+    op.execute(
+        'INSERT INTO article_translation_fts_key(translation_id) '
+        'SELECT id FROM article_translation ORDER BY rowid'
+    )
+    op.execute("INSERT INTO article_translation_fts(article_translation_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _drop_fts()
+    op.execute('DROP VIEW IF EXISTS article_translation_fts_source')
+    op.execute('DROP TABLE IF EXISTS article_translation_fts_key')
+    for statement in ROWID_FTS_DDL:
+        op.execute(statement)
+    # Rows may have been renumbered since the index was built
+    op.execute("INSERT INTO article_translation_fts(article_translation_fts) VALUES ('rebuild')")
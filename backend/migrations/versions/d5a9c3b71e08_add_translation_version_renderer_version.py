@@ -0,0 +1,26 @@
+"""add renderer_version to article_translation_version
+
+Revision ID: d5a9c3b71e08
+Revises: c81d4e6a9f20
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9c3b71e08'
+down_revision = 'c81d4e6a9f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('article_translation_version', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('renderer_version', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('article_translation_version', schema=None) as batch_op:
+        batch_op.drop_column('renderer_version')
@@ -0,0 +1,27 @@
+"""add content hash to embedding
+
+Revision ID: d9b1e7c3a528
+Revises: c4f8a2d6e310
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9b1e7c3a528'
+down_revision = 'c4f8a2d6e310'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows keep a NULL hash and are re-embedded once on their next update
+    with op.batch_alter_table('embedding', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('embedding', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
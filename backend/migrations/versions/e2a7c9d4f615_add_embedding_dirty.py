@@ -0,0 +1,33 @@
+"""add embedding dirty queue
+
+Revision ID: e2a7c9d4f615
+Revises: d9b1e7c3a528
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c9d4f615'
+down_revision = 'd9b1e7c3a528'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'embedding_dirty',
+        sa.Column('owner_type', sa.String(length=20), nullable=False),
+        sa.Column('owner_id', sa.String(length=36), nullable=False),
+        sa.Column('dirty_since', sa.DateTime(), nullable=False),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('owner_type', 'owner_id')
+    )
+    op.create_index('idx_embedding_dirty_marked', 'embedding_dirty', ['marked_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_embedding_dirty_marked', table_name='embedding_dirty')
+    op.drop_table('embedding_dirty')
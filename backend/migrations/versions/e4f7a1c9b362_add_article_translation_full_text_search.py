@@ -0,0 +1,101 @@
+"""add weighted full-text search vector to article_translation
+
+Revision ID: e4f7a1c9b362
+Revises: d5a9c3b71e08
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4f7a1c9b362'
+down_revision = 'd5a9c3b71e08'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of app.services.search.TEXT_SEARCH_CONFIGS
+TEXT_SEARCH_CONFIGS = {
+    'en': 'english',
+    'de': 'german',
+    'es': 'spanish',
+    'fr': 'french',
+    'it': 'italian',
+    'pt': 'portuguese',
+    'ru': 'russian',
+}
+
+
+def _config_expression():
+    cases = ' '.join(
+        f"WHEN '{language}' THEN '{config}'::regconfig"
+        for language, config in TEXT_SEARCH_CONFIGS.items()
+    )
+    return f"CASE language {cases} ELSE 'simple'::regconfig END"
+
+
+def _backfill_search_tags(bind):
+    """Frozen copy of app.services.search.tag_search_text, applied to every translation"""
+    tags = {
+        tag_id: (key, default_label)
+        for tag_id, key, default_label in bind.execute(sa.text('SELECT id, key, default_label FROM tag'))
+    }
+    labels = {
+        (tag_id, language): label
+        for tag_id, language, label in bind.execute(sa.text('SELECT tag_id, language, label FROM tag_label'))
+    }
+    content_tags = {}
+    for content_id, tag_id in bind.execute(sa.text('SELECT content_id, tag_id FROM content_tag')):
+        content_tags.setdefault(content_id, []).append(tag_id)
+
+    updates = []
+    translations = bind.execute(sa.text('SELECT id, content_id, language FROM article_translation'))
+    for translation_id, content_id, language in translations:
+        words = []
+        for tag_id in content_tags.get(content_id, ()):
+            key, default_label = tags[tag_id]
+            words.append(key.replace('-', ' '))
+            words.append(default_label)
+            label = labels.get((tag_id, language))
+            if label and label != default_label:
+                words.append(label)
+        updates.append({'id': translation_id, 'text': ' '.join(words)})
+    if updates:
+        bind.execute(sa.text('UPDATE article_translation SET search_tags = :text WHERE id = :id'), updates)
+
+
+def upgrade():
+    with op.batch_alter_table('article_translation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_tags', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    # In Python rather than SQL so the text matches the before_flush hook
+    # exactly, localized labels included, on every dialect
+    _backfill_search_tags(bind)
+    if bind.dialect.name != 'postgresql':
+        return
+
+    config = _config_expression()
+    op.execute(f"""
+        ALTER TABLE article_translation ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector({config}, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector({config}, coalesce(search_tags, '')), 'B') ||
+            setweight(to_tsvector({config}, coalesce(markdown, '')), 'C')
+        ) STORED
+    """)
+    op.execute(
+        'CREATE INDEX idx_article_search_vector ON article_translation USING GIN (search_vector)'
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_article_search_vector')
+        op.execute('ALTER TABLE article_translation DROP COLUMN IF EXISTS search_vector')
+
+    with op.batch_alter_table('article_translation', schema=None) as batch_op:
+        batch_op.drop_column('search_tags')
@@ -0,0 +1,79 @@
+"""key embeddings on model and dimensions
+
+Revision ID: e8b2d4f6a139
+Revises: d5a8c3f1e726
+Create Date: 2026-10-19 10:00:00.000000
+
+API models were stored under their bare name, so the same model shortened
+to two dimensions shared one key and one partial HNSW index predicate.
+They are now stored as <model>@<dim>, like local-hash-<dim>. Only the
+full-dimension index is rebuilt; rerun pgvector-index for compact indexes
+and vector-index-save for numpy sidecars.
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b2d4f6a139'
+down_revision = 'd5a8c3f1e726'
+branch_labels = None
+depends_on = None
+
+
+def _index_prefix(model):
+    return f"idx_embedding_hnsw_{hashlib.sha1(model.encode('utf-8')).hexdigest()[:12]}_"
+
+
+def _drop_indexes(bind, model):
+    pattern = _index_prefix(model).replace('_', '\\_') + '%'
+    names = bind.execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE tablename = 'embedding' AND indexname LIKE :pattern"),
+        {'pattern': pattern},
+    ).scalars().all()
+    for name in names:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def _create_index(model, dim):
+    # Frozen copy of app.services.semantic.hnsw_index_ddl for full-dimension indexes
+    model_literal = model.replace("'", "''")
+    op.execute(
+        f'CREATE INDEX IF NOT EXISTS {_index_prefix(model)}v{dim} ON embedding '
+        f'USING hnsw ((vector::vector({dim})) vector_cosine_ops) '
+        f"WITH (m = 16, ef_construction = 64) WHERE model = '{model_literal}'"
+    )
+
+
+def _rename(renames):
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == 'postgresql'
+    if postgresql:
+        for old, new, dim in renames:
+            _drop_indexes(bind, old)
+    for old, new, dim in renames:
+        bind.execute(
+            sa.text('UPDATE embedding SET model = :new WHERE model = :old AND dim = :dim'),
+            {'old': old, 'new': new, 'dim': dim},
+        )
+    if postgresql:
+        for new, dim in {(new, dim) for old, new, dim in renames}:
+            _create_index(new, dim)
+
+
+def upgrade():
+    rows = op.get_bind().execute(sa.text(
+        "SELECT DISTINCT model, dim FROM embedding "
+        "WHERE model NOT LIKE 'local-hash-%' AND model NOT LIKE '%@%'"
+    )).all()
+    _rename([(model, f'{model}@{dim}', dim) for model, dim in rows])
+
+
+def downgrade():
+    # A model stored at several dimensions shares one key again
+    rows = op.get_bind().execute(sa.text(
+        "SELECT DISTINCT model, dim FROM embedding WHERE model LIKE '%@%'"
+    )).all()
+    _rename([(model, model.rsplit('@', 1)[0], dim) for model, dim in rows])
@@ -0,0 +1,66 @@
+"""add FTS5 search index for SQLite deployments
+
+Revision ID: f0c3b8d2a417
+Revises: e4f7a1c9b362
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0c3b8d2a417'
+down_revision = 'e4f7a1c9b362'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The index is keyed on article_translation's implicit rowid, which VACUUM
+    # may renumber; a database left at this revision needs
+    # INSERT INTO article_translation_fts(article_translation_fts) VALUES ('rebuild')
+    # after a VACUUM. d5a8c3f1e726 moves the key to a stable INTEGER PRIMARY KEY.
+    # PostgreSQL uses the generated search_vector column instead
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS article_translation_fts USING fts5(
+            title, search_tags, markdown,
+            content='article_translation', content_rowid='rowid',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_translation_fts_ai AFTER INSERT ON article_translation BEGIN
+            INSERT INTO article_translation_fts(rowid, title, search_tags, markdown)
+            VALUES (new.rowid, new.title, new.search_tags, new.markdown);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_translation_fts_ad AFTER DELETE ON article_translation BEGIN
+            INSERT INTO article_translation_fts(article_translation_fts, rowid, title, search_tags, markdown)
+            VALUES ('delete', old.rowid, old.title, old.search_tags, old.markdown);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_translation_fts_au
+        AFTER UPDATE OF title, search_tags, markdown ON article_translation BEGIN
+            INSERT INTO article_translation_fts(article_translation_fts, rowid, title, search_tags, markdown)
+            VALUES ('delete', old.rowid, old.title, old.search_tags, old.markdown);
+            INSERT INTO article_translation_fts(rowid, title, search_tags, markdown)
+            VALUES (new.rowid, new.title, new.search_tags, new.markdown);
+        END
+    """)
+    # Index the rows that already exist
+    op.execute("INSERT INTO article_translation_fts(article_translation_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS article_translation_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS article_translation_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS article_translation_fts_ai')
+    op.execute('DROP TABLE IF EXISTS article_translation_fts')
@@ -0,0 +1,65 @@
+"""store embeddings of any dimension, with a partial HNSW index per model
+
+Revision ID: f3c8e1a7b294
+Revises: e2a7c9d4f615
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8e1a7b294'
+down_revision = 'e2a7c9d4f615'
+branch_labels = None
+depends_on = None
+
+
+def _index_name(model, dim):
+    digest = hashlib.sha1(model.encode('utf-8')).hexdigest()[:12]
+    return f'idx_embedding_hnsw_{digest}_v{dim}'
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # The vector column is plain text elsewhere and has no dimension
+        return
+
+    op.execute('DROP INDEX IF EXISTS idx_embedding_vector_hnsw')
+    op.execute('DROP INDEX IF EXISTS idx_embedding_vector_hnsw_half')
+    op.execute('ALTER TABLE embedding ALTER COLUMN vector TYPE vector')
+
+    # Frozen copy of app.services.semantic.hnsw_index_ddl for full-dimension indexes
+    models = bind.execute(sa.text('SELECT DISTINCT model, dim FROM embedding')).all()
+    for model, dim in models:
+        model_literal = model.replace("'", "''")
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS {_index_name(model, dim)} ON embedding '
+            f'USING hnsw ((vector::vector({dim})) vector_cosine_ops) '
+            f"WITH (m = 16, ef_construction = 64) WHERE model = '{model_literal}'"
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    indexes = bind.execute(sa.text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'embedding' "
+        "AND indexname LIKE 'idx\\_embedding\\_hnsw\\_%'"
+    )).scalars().all()
+    for name in indexes:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    # Only the 1536-dimension vectors fit the old column
+    op.execute('DELETE FROM embedding WHERE dim != 1536')
+    op.execute('ALTER TABLE embedding ALTER COLUMN vector TYPE vector(1536)')
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS idx_embedding_vector_hnsw ON embedding '
+        'USING hnsw (vector vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+    )
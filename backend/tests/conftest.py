@@ -1,6 +1,8 @@
 """Pytest configuration and fixtures for testing."""
 import os
 import pytest
+from flask import g
+from flask.testing import FlaskClient
 from app import create_app, db
 from app.test_config import TestConfig
 from app.models import User, Content, ArticleTranslation, MediaContent, Tag
@@ -72,6 +74,35 @@ def authenticated_client(client, test_user):
     return client
 
 
+class _SessionUserClient(FlaskClient):
+    """
+    Test client whose requests see only their own login. Requests share the
+    session-wide app context, so Flask-Login's user cached in g would
+    otherwise carry over between clients.
+    """
+
+    def open(self, *args, **kwargs):
+        g.pop('_login_user', None)
+        try:
+            return super().open(*args, **kwargs)
+        finally:
+            g.pop('_login_user', None)
+
+
+@pytest.fixture
+def ops_client(app):
+    """Create a client logged in as a user kept across tests."""
+    with app.app_context():
+        if not User.query.filter_by(email='ops@example.com').first():
+            user = User(email='ops@example.com', is_active=True)
+            user.set_password('opspassword')
+            db.session.add(user)
+            db.session.commit()
+    client = _SessionUserClient(app, app.response_class, use_cookies=True)
+    client.post('/login', data={'email': 'ops@example.com', 'password': 'opspassword'})
+    return client
+
+
 @pytest.fixture
 def test_content(app, test_user):
     """Create test content with translation."""
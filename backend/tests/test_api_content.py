@@ -112,3 +112,156 @@ class TestContentTranslations:
         )
         # May require authentication
         assert response.status_code in [200, 201, 401, 403]
+
+
+class TestMarkdownRenderAPI:
+    """Test markdown preview endpoints."""
+
+    def test_render_markdown(self, client):
+        """Test rendering markdown to HTML."""
+        response = client.post(
+            '/api/contents/render_markdown',
+            data=json.dumps({'markdown': '**bold**'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert '<strong>bold</strong>' in data['rendered_html']
+
+    def test_render_cache_stats(self, client, ops_client):
+        """Test that render cache counters are only exposed to logged-in users."""
+        assert client.get('/api/contents/render_markdown/cache').status_code == 404
+        assert client.get('/admin/ops/render-cache').status_code in (302, 401)
+
+        response = ops_client.get('/admin/ops/render-cache')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        for key in ('hits', 'misses', 'evictions', 'bytes', 'max_bytes'):
+            assert key in data
+
+
+class TestListingFields:
+    """Test denormalized listing fields computed on write."""
+
+    def test_fields_populated_on_create_and_update(self, client, app):
+        """Test excerpt, word count, read time and TOC on write paths."""
+        from app.models import ArticleTranslation
+        from app import db
+
+        response = client.post(
+            '/api/contents',
+            data=json.dumps({
+                'type': 'article',
+                'translation': {'language': 'en', 'title': 'Listing', 'markdown': '# Intro\n\none two three'},
+            }),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        content_id = json.loads(response.data)['id']
+
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert translation.excerpt == 'Intro one two three'
+        assert translation.word_count == 5
+        assert translation.read_time_minutes == 1
+        assert translation.toc_json[0]['id'] == 'intro'
+
+        response = client.put(
+            f'/api/contents/{content_id}/translations/en',
+            data=json.dumps({'markdown': '## Changed\n\n' + 'word ' * 450}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        db.session.expire_all()
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert translation.word_count == 452
+        assert translation.read_time_minutes == 3
+        assert translation.toc_json[0]['name'] == 'Changed'
+
+    def test_render_markdown_blocks_mode(self, client):
+        """Test incremental block preview through the API."""
+        response = client.post(
+            '/api/contents/render_markdown',
+            data=json.dumps({'markdown': 'one\n\ntwo', 'mode': 'blocks'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        first = json.loads(response.data)
+        assert first['mode'] == 'blocks'
+        assert len(first['blocks']) == 2
+
+        response = client.post(
+            '/api/contents/render_markdown',
+            data=json.dumps({'markdown': 'one\n\nthree', 'mode': 'blocks', 'known_blocks': first['blocks']}),
+            content_type='application/json'
+        )
+        second = json.loads(response.data)
+        assert list(second['fragments'].values()) == ['<p>three</p>']
+
+    def test_render_markdown_blocks_mode_validates_known_blocks(self, client):
+        """Test that malformed or oversized known_blocks are rejected with 400."""
+        from app.utils.preview import MAX_KNOWN_BLOCKS
+
+        for known_blocks in ([{'a': 1}], [['nested']], [1], 'abc', ['x'] * (MAX_KNOWN_BLOCKS + 1)):
+            response = client.post(
+                '/api/contents/render_markdown',
+                data=json.dumps({'markdown': 'one', 'mode': 'blocks', 'known_blocks': known_blocks}),
+                content_type='application/json'
+            )
+            assert response.status_code == 400
+
+
+class TestKeysetPagination:
+    """Test cursor (keyset) pagination of the content list."""
+
+    def _walk(self, client, url):
+        ids, cursor = [], ''
+        while cursor is not None:
+            response = client.get(f'{url}&cursor={cursor}')
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            ids.extend(item['id'] for item in data['items'])
+            cursor = data['next_cursor']
+        return ids
+
+    def test_cursor_walk_matches_page_order(self, client, app):
+        """Test that following next_cursor visits every item once, in order."""
+        for n in range(5):
+            client.post('/api/contents', data=json.dumps({
+                'type': 'article',
+                'translation': {'language': 'en', 'title': f'Keyset {n}', 'markdown': 'Body'},
+            }), content_type='application/json')
+
+        paged = json.loads(client.get('/api/contents?per_page=100').data)
+        walked = self._walk(client, '/api/contents?per_page=2')
+        assert walked == [item['id'] for item in paged['items']]
+        assert len(walked) == paged['total'] >= 5
+
+    def test_total_modes(self, client):
+        """Test that the total is skipped in cursor mode unless requested."""
+        data = json.loads(client.get('/api/contents?cursor=&per_page=1').data)
+        assert data['total'] is None
+
+        data = json.loads(client.get('/api/contents?cursor=&per_page=1&total=exact').data)
+        assert data['total'] == json.loads(client.get('/api/contents').data)['total']
+
+        # SQLite has no planner estimate
+        data = json.loads(client.get('/api/contents?page=1&total=estimate').data)
+        assert data['total'] is None and data['pages'] is None
+
+        assert client.get('/api/contents?total=some').status_code == 400
+
+    def test_invalid_cursor(self, client):
+        """Test that malformed or foreign cursors are rejected."""
+        from app.utils.pagination import encode_cursor
+
+        assert client.get('/api/contents?cursor=not-a-cursor').status_code == 400
+        foreign = encode_cursor(['2026-01-01T00:00:00'])
+        assert client.get(f'/api/contents?cursor={foreign}').status_code == 400
+
+    def test_cursor_round_trip(self):
+        """Test that cursor tokens preserve datetimes, floats and strings."""
+        from datetime import datetime
+        from app.utils.pagination import decode_cursor, encode_cursor
+
+        values = [-3.0000000000000004, datetime(2026, 10, 18, 12, 30, 0, 123456), 'abc']
+        assert decode_cursor(encode_cursor(values), 3) == values
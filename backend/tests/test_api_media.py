@@ -301,6 +301,11 @@ class TestMediaUploadComplete:
                 assert transcript.language == 'de'
                 assert 'transcript content' in transcript.text
 
+                # Both texts are indexed for near-duplicate detection
+                from app.models import NearDuplicateSignature
+                indexed = NearDuplicateSignature.query.filter_by(content_id=result['content_id']).all()
+                assert {row.owner_type for row in indexed} == {'article_translation', 'transcript'}
+
                 # Cleanup
                 from app import db
                 from app.models import ArticleTranslation, Content
@@ -63,3 +63,559 @@ class TestSearchFilters:
         """Test search pagination."""
         response = client.get('/api/search?q=test&page=1&per_page=10')
         assert response.status_code in [200, 400]
+
+
+def _create_article(client, title, markdown, tags=None, language='en'):
+    response = client.post(
+        '/api/contents',
+        data=json.dumps({
+            'type': 'article',
+            'visibility': 'public',
+            'translation': {'language': language, 'title': title, 'markdown': markdown},
+            'tags': tags or [],
+        }),
+        content_type='application/json'
+    )
+    assert response.status_code == 201
+    return json.loads(response.data)['id']
+
+
+def _embed_article(content_id, text, language='en'):
+    """Store one local-provider embedding chunk for the content's translation"""
+    from app.models import ArticleTranslation, Embedding
+    from app.services.embeddings import get_embedding_provider
+    from app import db
+
+    provider = get_embedding_provider()
+    translation = ArticleTranslation.query.filter_by(content_id=content_id, language=language).one()
+    db.session.add(Embedding(
+        owner_type='article_translation', owner_id=translation.id, language=language,
+        model=provider.model, dim=provider.dimensions, chunk_index=0,
+        vector=provider.embed_query(text),
+    ))
+    db.session.commit()
+
+
+def _delete_embeddings():
+    from app.models import Embedding
+    from app import db
+
+    for embedding in Embedding.query:
+        db.session.delete(embedding)
+    db.session.commit()
+
+
+class TestFullTextSearch:
+    """Test full-text search over title, tags and body."""
+
+    def test_matches_title_body_and_tags(self, client, app):
+        """Test that matches come from title, body or tag text."""
+        by_title = _create_article(client, 'Zebrafish anatomy', 'Fins and gills.')
+        by_tag = _create_article(client, 'Untitled notes', 'Nothing here.', tags=['okapi-facts'])
+
+        response = client.get('/api/search?q=zebrafish&lang=en')
+        ids = [item['id'] for item in json.loads(response.data)['items']]
+        assert ids == [by_title]
+
+        response = client.get('/api/search?q=okapi&lang=en')
+        ids = [item['id'] for item in json.loads(response.data)['items']]
+        assert ids == [by_tag]
+
+    def test_search_tags_follow_tag_changes(self, client, app):
+        """Test that search_tags is updated when tags are edited."""
+        from app.models import ArticleTranslation, Tag
+        from app import db
+
+        content_id = _create_article(client, 'Tagged', 'Body', tags=['quokka'])
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert translation.search_tags == 'quokka quokka'
+
+        Tag.query.filter_by(key='quokka').one().default_label = 'Quokka Island'
+        db.session.commit()
+        assert translation.search_tags == 'quokka Quokka Island'
+
+    def test_search_tags_follow_label_changes(self, client, app):
+        """Test that adding, editing and deleting a localized label updates search_tags."""
+        from app.models import ArticleTranslation, Tag, TagLabel
+        from app import db
+
+        content_id = _create_article(client, 'Labelled', 'Body', tags=['wombat'])
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        tag = Tag.query.filter_by(key='wombat').one()
+
+        db.session.add(TagLabel(tag_id=tag.id, language='en', label='Burrowing marsupial'))
+        db.session.commit()
+        assert translation.search_tags == 'wombat wombat Burrowing marsupial'
+
+        label = TagLabel.query.filter_by(tag_id=tag.id, language='en').one()
+        label.label = 'Hairy-nosed wombat'
+        db.session.commit()
+        assert translation.search_tags == 'wombat wombat Hairy-nosed wombat'
+
+        db.session.delete(label)
+        db.session.commit()
+        assert translation.search_tags == 'wombat wombat'
+
+    def test_postgres_query(self, app):
+        """Test the tsquery, rank and language config on PostgreSQL."""
+        from sqlalchemy.dialects import postgresql
+        from app.models import Content, ArticleTranslation
+        from app.services import search
+
+        query = Content.query.join(ArticleTranslation)
+        backend = search.SEARCH_BACKENDS['postgres']
+        query, rank = backend.apply(query, '"exact phrase" -skip', 'de')
+
+        compiled = query.order_by(rank.desc()).statement.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        assert 'article_translation.search_vector @@ websearch_to_tsquery(' in sql
+        assert 'ORDER BY ts_rank_cd(article_translation.search_vector' in sql
+        assert {'german', '"exact phrase" -skip'} <= set(compiled.params.values())
+        assert search.text_search_config('ja') == 'simple'
+
+    def test_postgres_query_in_each_rows_language(self, app):
+        """Test that without a language each row is matched with its own language config."""
+        from sqlalchemy.dialects import postgresql
+        from app.models import Content, ArticleTranslation
+        from app.services import search
+
+        query, rank = search.SEARCH_BACKENDS['postgres'].apply(Content.query.join(ArticleTranslation), 'vogel', None)
+
+        compiled = query.order_by(rank.desc()).statement.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        # One indexable branch per configuration, plus 'simple' for the rest
+        assert sql.count('article_translation.search_vector @@ websearch_to_tsquery(') == len(search.TEXT_SEARCH_CONFIGS) + 1
+        assert 'article_translation.language NOT IN' in sql
+        assert 'ts_rank_cd(article_translation.search_vector, websearch_to_tsquery(CASE' in sql
+        params = [value for value in compiled.params.values() if isinstance(value, str)]
+        assert set(search.TEXT_SEARCH_CONFIGS.values()) | {'simple'} <= set(params)
+
+
+class TestSearchBackends:
+    """Test backend selection and the SQLite FTS5 backend."""
+
+    def test_auto_selects_fts5_on_sqlite(self, app):
+        """Test that the SQLite test database resolves to FTS5."""
+        from app.services.search import get_search_backend
+        assert get_search_backend().name == 'sqlite_fts'
+
+    def test_fts5_query_translation(self):
+        """Test websearch-style input becomes a safe FTS5 query."""
+        from app.services.search import fts5_query
+        assert fts5_query('"exact phrase" -skip') == '"exact phrase" NOT "skip"'
+        assert fts5_query('a or b c') == '("a" OR "b") AND "c"'
+        assert fts5_query('NEAR( "') == '"NEAR("'
+        assert fts5_query('-only') == ''
+
+    def test_title_matches_rank_first(self, client, app):
+        """Test that bm25 weights a title match above a body match."""
+        in_body = _create_article(client, 'Field notes', 'A long note mentioning the pangolin once.')
+        in_title = _create_article(client, 'Pangolin behaviour', 'Scales and claws.')
+
+        response = client.get('/api/search?q=pangolin&lang=en')
+        ids = [item['id'] for item in json.loads(response.data)['items']]
+        assert ids == [in_title, in_body]
+
+    def test_index_follows_updates_and_deletes(self, client, app):
+        """Test that the triggers keep the FTS table in sync."""
+        content_id = _create_article(client, 'Capybara', 'Rodent facts.')
+
+        client.put(
+            f'/api/contents/{content_id}/translations/en',
+            data=json.dumps({'title': 'Axolotl', 'markdown': 'Amphibian facts.'}),
+            content_type='application/json'
+        )
+        assert json.loads(client.get('/api/search?q=capybara&lang=en').data)['items'] == []
+        assert len(json.loads(client.get('/api/search?q=axolotl&lang=en').data)['items']) == 1
+
+        from app.models import ArticleTranslation, ArticleTranslationVersion
+        from app import db
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        ArticleTranslationVersion.query.filter_by(translation_id=translation.id).delete()
+        db.session.delete(translation)
+        db.session.commit()
+        assert json.loads(client.get('/api/search?q=axolotl&lang=en').data)['items'] == []
+
+    def test_index_survives_renumbered_rowids(self, client, app):
+        """Test that the FTS index does not depend on article_translation's implicit rowid."""
+        from sqlalchemy import text
+        from app import db
+
+        content_id = _create_article(client, 'Okavango', 'River delta.')
+        # What VACUUM may do to a table without an INTEGER PRIMARY KEY
+        db.session.execute(text('UPDATE article_translation SET rowid = rowid + 1000000'))
+        db.session.commit()
+
+        items = json.loads(client.get('/api/search?q=okavango&lang=en').data)['items']
+        assert [item['id'] for item in items] == [content_id]
+        client.put(
+            f'/api/contents/{content_id}/translations/en',
+            data=json.dumps({'title': 'Zambezi'}),
+            content_type='application/json'
+        )
+        assert json.loads(client.get('/api/search?q=okavango&lang=en').data)['items'] == []
+        assert len(json.loads(client.get('/api/search?q=zambezi&lang=en').data)['items']) == 1
+
+    def test_backends_share_result_shape(self, client, app):
+        """Test that the like backend returns the same response shape."""
+        _create_article(client, 'Narwhal tusks', 'Arctic whales.')
+        fts = json.loads(client.get('/api/search?q=narwhal&lang=en').data)
+
+        app.config['SEARCH_BACKEND'] = 'like'
+        try:
+            like = json.loads(client.get('/api/search?q=narwhal&lang=en').data)
+        finally:
+            app.config['SEARCH_BACKEND'] = 'auto'
+
+        assert fts.keys() == like.keys()
+        assert [i['id'] for i in fts['items']] == [i['id'] for i in like['items']]
+
+    def test_cursor_pagination_follows_rank(self, client, app):
+        """Test that cursor mode pages through ranked results in order."""
+        for title, body in (('Tapir', 'Tapir tapir tapir.'), ('Notes', 'One tapir.'), ('Tapir trail', 'Forest.')):
+            _create_article(client, title, body)
+
+        paged = json.loads(client.get('/api/search?q=tapir&lang=en').data)
+        walked, cursor = [], ''
+        while cursor is not None:
+            data = json.loads(client.get(f'/api/search?q=tapir&lang=en&per_page=1&cursor={cursor}').data)
+            walked.extend(item['id'] for item in data['items'])
+            cursor = data['next_cursor']
+        assert walked == [item['id'] for item in paged['items']]
+        assert len(walked) == 3
+
+
+class TestSemanticSearch:
+    """Test the embedding provider, pgvector query and result grouping."""
+
+    def test_local_embeddings_are_deterministic(self):
+        """Test that the local provider is stable, normalized and lexical."""
+        import numpy as np
+        from app.services.embeddings import LocalEmbeddingProvider
+
+        texts = ['Baobab trees store water', 'Storing water in baobabs', 'Quantum chromodynamics']
+        first = LocalEmbeddingProvider(256).embed(texts)
+        second = LocalEmbeddingProvider(256).embed(texts)
+
+        assert first.dtype == np.float32 and first.shape == (3, 256)
+        assert np.array_equal(first, second)
+        assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+        assert first[0] @ first[1] > first[0] @ first[2]
+
+    def test_pgvector_query(self, app):
+        """Test that the candidate query orders by cosine distance of the indexed expression under a limit."""
+        import numpy as np
+        from sqlalchemy.dialects import postgresql
+        from app.services.semantic import PgvectorIndex, hnsw_index_ddl
+
+        query = PgvectorIndex().query(np.zeros(3, dtype=np.float32), 'de', 'local-hash-3', 40)
+        compiled = query.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        assert 'ORDER BY CAST(embedding.vector AS VECTOR(3)) <=> CAST(%(param_1)s AS VECTOR(3))' in sql
+        assert '((vector::vector(3)) vector_cosine_ops)' in hnsw_index_ddl('local-hash-3', 3)
+        assert 'LIMIT %(param_2)s' in sql
+        assert compiled.params['param_2'] == 40
+        assert compiled.params['language_1'] == 'de'
+        assert compiled.params['model_1'] == 'local-hash-3'
+
+    def test_pgvector_quantized_query(self, app):
+        """Test that quantized candidates come from the halfvec index and are re-ranked."""
+        import numpy as np
+        from sqlalchemy.dialects import postgresql
+        from app.services.semantic import PgvectorIndex
+
+        query = PgvectorIndex().query(np.zeros(3, dtype=np.float32), 'de', 'local-hash-3', 10, quantized=True)
+        compiled = query.compile(dialect=postgresql.dialect())
+        sql = ' '.join(str(compiled).split())
+        assert 'ORDER BY CAST(embedding.vector AS HALFVEC(3)) <=> CAST(%(param_1)s AS HALFVEC(3))' in sql
+        assert 'ORDER BY anon_1.vector <=> %(vector_1)s' in sql
+        assert sorted(v for v in compiled.params.values() if isinstance(v, int)) == [10, 40]
+
+    def test_pgvector_first_pass_query(self, app):
+        """Test that a truncated first pass matches the per-model subvector index and is re-ranked."""
+        import numpy as np
+        from sqlalchemy.dialects import postgresql
+        from app.services.semantic import PgvectorIndex, hnsw_index_ddl, hnsw_index_name
+
+        query = PgvectorIndex().query(np.zeros(8, dtype=np.float32), 'de', "o'model", 10, dimensions=4)
+        sql = ' '.join(str(query.compile(dialect=postgresql.dialect())).split())
+        assert 'ORDER BY CAST(subvector(embedding.vector, 1, 4) AS VECTOR(4)) <=> ' in sql
+        assert 'ORDER BY anon_1.vector <=> %(vector_1)s' in sql
+
+        ddl = hnsw_index_ddl("o'model", 8, 4)
+        assert ddl.startswith(f"CREATE INDEX IF NOT EXISTS {hnsw_index_name('o' + chr(39) + 'model', 4)} ")
+        assert '((subvector(vector, 1, 4)::vector(4)) vector_cosine_ops)' in ddl
+        assert ddl.endswith("WHERE model = 'o''model'")
+        assert hnsw_index_name('a', 4) != hnsw_index_name('b', 4) != hnsw_index_name('b', 4, quantized=True)
+
+    def test_numpy_quantized_end_to_end(self, client, app):
+        """Test semantic search through an int8 store re-ranked from the embedding table."""
+        from app.services.embeddings import get_embedding_provider
+        from app.services.semantic import VECTOR_INDEXES
+
+        content_id = _create_article(client, 'Quantized kelp', 'Kelp forests store carbon.')
+        _embed_article(content_id, 'Quantized kelp Kelp forests store carbon.')
+
+        app.config['VECTOR_QUANTIZED'] = True
+        try:
+            provider = get_embedding_provider()
+            assert VECTOR_INDEXES['numpy'].store(provider.model).quantized
+            [hit] = VECTOR_INDEXES['numpy'].search(
+                provider.embed_query('Quantized kelp Kelp forests store carbon.'), 'en', provider.model, 1,
+            )
+        finally:
+            app.config['VECTOR_QUANTIZED'] = False
+        # Re-ranked with the stored float32 vector, so the score is exact
+        assert hit.similarity == pytest.approx(1.0, abs=1e-5)
+
+        _delete_embeddings()
+
+    def test_numpy_fallback_end_to_end(self, client, app):
+        """Test semantic search on SQLite through the in-process numpy index."""
+        from app.services.embeddings import get_embedding_provider
+        from app.services.semantic import VECTOR_INDEXES, get_vector_index
+
+        assert get_vector_index().name == 'numpy'
+        provider = get_embedding_provider()
+        # Loaded before the writes, so the commit hook has to keep it current
+        store = VECTOR_INDEXES['numpy'].store(provider.model)
+
+        ids = {}
+        for title, body in (('Mangrove coasts', 'Mangroves protect coastlines from storms.'),
+                            ('Glacier retreat', 'Alpine glaciers are melting.')):
+            ids[title] = _create_article(client, title, body)
+            _embed_article(ids[title], f'{title} {body}')
+        assert store.search(provider.embed_query('mangroves'), 10, 'en')
+
+        response = client.post(
+            '/api/search/semantic',
+            data=json.dumps({'query': 'storms on mangrove coastlines', 'lang': 'en', 'limit': 1}),
+            content_type='application/json'
+        )
+        items = json.loads(response.data)['items']
+        assert [item['id'] for item in items] == [ids['Mangrove coasts']]
+        assert items[0]['match']['owner_type'] == 'article_translation'
+
+        _delete_embeddings()
+        assert len(store) == 0
+
+    def test_hits_grouped_by_content_with_visibility(self, client, app):
+        """Test max-sim grouping per content and the visibility filter."""
+        from app.models import ArticleTranslation, Content
+        from app.services.semantic import VectorHit, rank_contents
+        from app import db
+
+        public_id = _create_article(client, 'Public', 'Body')
+        private_id = _create_article(client, 'Private', 'Body')
+        Content.query.get(private_id).visibility = 'private'
+        db.session.commit()
+        public_tr = ArticleTranslation.query.filter_by(content_id=public_id).one().id
+        private_tr = ArticleTranslation.query.filter_by(content_id=private_id).one().id
+
+        hits = [
+            VectorHit('article_translation', private_tr, 0, 0.9),
+            VectorHit('article_translation', public_tr, 2, 0.8),
+            VectorHit('article_translation', public_tr, 0, 0.5),
+            VectorHit('transcript', 'missing', 0, 0.4),
+        ]
+        results = rank_contents(hits, 10)
+        assert [(r.content.id, r.score) for r in results] == [(private_id, 0.9), (public_id, 0.8)]
+
+        results = rank_contents(hits, 10, visibility=('public',))
+        assert [(r.content.id, r.hit.chunk_index) for r in results] == [(public_id, 2)]
+
+
+class TestNumpyVectorStore:
+    """Test the in-process vector store behind the numpy index."""
+
+    def test_top_k_filters_and_tombstones(self):
+        """Test exact top-k ordering, metadata filters and removal."""
+        import numpy as np
+        from app.services.vector_store import NumpyVectorStore
+
+        store = NumpyVectorStore(2, capacity=1)
+        store.append(
+            [('a', 'article_translation', 'o1', 0, 'en'), ('b', 'article_translation', 'o1', 1, 'en'),
+             ('c', 'transcript', 'o2', 0, 'en'), ('d', 'article_translation', 'o3', 0, 'de')],
+            [[1, 0], [0.8, 0.6], [0.9, 0.1], [1, 0]],
+        )
+        query = np.array([1, 0], dtype=np.float32)
+
+        assert [r[0] for r in store.search(query, 2, 'en')] == ['a', 'c']
+        assert [r[0] for r in store.search(query, 5, 'en', ['article_translation'])] == ['a', 'b']
+        assert store.search(query, 5, 'fr') == []
+
+        store.remove(['a'])
+        assert [r[0] for r in store.search(query, 2, 'en')] == ['c', 'b']
+        store.append([('c', 'transcript', 'o2', 0, 'en')], [[0, 1]])  # replaces c
+        assert [r[0] for r in store.search(query, 5, 'en')] == ['b', 'c']
+        assert len(store) == 3 and store.tombstones == 2
+
+        store.compact()
+        assert store.tombstones == 0 and [r[0] for r in store.search(query, 5)] == ['d', 'b', 'c']
+
+    def test_sidecar_round_trip(self, tmp_path):
+        """Test saving to .npy and reopening as a memmap that still accepts appends."""
+        import numpy as np
+        from app.services.vector_store import NumpyVectorStore
+
+        store = NumpyVectorStore(3)
+        store.append([('a', 'transcript', 'o1', 4, 'en'), ('b', 'transcript', 'o2', 0, 'en')],
+                     [[1, 0, 0], [0, 1, 0]])
+        store.remove(['b'])
+        store.save(str(tmp_path / 'model'))
+
+        loaded = NumpyVectorStore.load(str(tmp_path / 'model'))
+        assert isinstance(loaded._vectors, np.memmap)
+        query = np.array([1, 0, 0], dtype=np.float32)
+        assert loaded.search(query, 5) == [('a', 'transcript', 'o1', 4, 1.0)]
+
+        loaded.append([('c', 'transcript', 'o3', 0, 'en')], [[2, 0, 0]])
+        assert [r[0] for r in loaded.search(query, 5)] == ['a', 'c']
+
+
+    def test_quantized_store_reranks(self, tmp_path):
+        """Test int8 codes at a quarter of the memory, re-ranked from cold vectors."""
+        import numpy as np
+        from app.services.vector_store import NumpyVectorStore
+
+        rng = np.random.default_rng(7)
+        vectors = rng.standard_normal((500, 32)).astype(np.float32)
+        rows = [(str(i), 'transcript', f'o{i}', 0, 'en') for i in range(500)]
+        exact = NumpyVectorStore(32, capacity=500)
+        exact.append(rows, vectors)
+        exact.save(str(tmp_path / 'model'))
+
+        quantized = NumpyVectorStore.load(str(tmp_path / 'model'), quantized=True)
+        assert quantized.nbytes < exact.nbytes / 3
+        query = vectors[3] / np.linalg.norm(vectors[3])
+        expected = exact.search(query, 10)
+        results = quantized.search(query, 10)
+        assert [r[0] for r in results] == [r[0] for r in expected]
+        assert [r[4] for r in results] == pytest.approx([r[4] for r in expected], abs=1e-6)
+
+        # Rows appended later are re-ranked through fetch, or keep their approximate score
+        quantized.append([('new', 'transcript', 'o-new', 0, 'en')], [vectors[3]])
+        [_, (new_id, *_, approximate)] = quantized.search(query, 2)
+        assert new_id == 'new' and approximate != pytest.approx(1.0, abs=1e-7)
+        fetched = quantized.search(query, 2, fetch=lambda ids: {'new': vectors[3]})
+        assert fetched[1][0] == 'new' and fetched[1][4] == pytest.approx(1.0, abs=1e-6)
+
+        with pytest.raises(ValueError):
+            quantized.save(str(tmp_path / 'other'))
+
+    def test_truncated_store_reranks(self):
+        """Test a first pass on leading dimensions, re-ranked with every dimension."""
+        import numpy as np
+        from app.services.vector_store import NumpyVectorStore
+
+        rng = np.random.default_rng(11)
+        vectors = rng.standard_normal((300, 64)).astype(np.float32)
+        rows = [(str(i), 'transcript', f'o{i}', 0, 'en') for i in range(300)]
+        exact = NumpyVectorStore(64, capacity=300)
+        exact.append(rows, vectors)
+        truncated = NumpyVectorStore(64, capacity=300, search_dimensions=16)
+        truncated.append(rows, vectors)
+
+        assert truncated.lossy and truncated.search_dimensions == 16
+        assert truncated.nbytes < exact.nbytes / 2
+        query = vectors[5] / np.linalg.norm(vectors[5])
+        expected = exact.search(query, 5)
+        results = truncated.search(query, 5, rerank=300, fetch=lambda ids: {i: vectors[int(i)] for i in ids})
+        assert [r[0] for r in results] == [r[0] for r in expected]
+        assert [r[4] for r in results] == pytest.approx([r[4] for r in expected], abs=1e-6)
+
+
+class TestHybridSearch:
+    """Test reciprocal rank fusion and mode=hybrid."""
+
+    def test_reciprocal_rank_fusion(self):
+        """Test fused order, per-retriever breakdown and weights."""
+        from app.services.hybrid import reciprocal_rank_fusion
+
+        rankings = {
+            'keyword': [('a', 9.0), ('b', 5.0), ('a', 1.0)],
+            'semantic': [('b', 0.9), ('c', 0.8)],
+        }
+        fused = reciprocal_rank_fusion(rankings, k=10)
+        assert [r.content_id for r in fused] == ['b', 'a', 'c']
+        assert fused[0].score == pytest.approx(1 / 12 + 1 / 11)
+        assert fused[0].breakdown == {'keyword': {'rank': 2, 'score': 5.0},
+                                      'semantic': {'rank': 1, 'score': 0.9}}
+        assert fused[1].breakdown == {'keyword': {'rank': 1, 'score': 9.0}}
+
+        fused = reciprocal_rank_fusion(rankings, k=10, weights={'keyword': 0.0})
+        assert [r.content_id for r in fused] == ['b', 'c', 'a']
+
+    def test_hybrid_mode_combines_retrievers(self, client, app):
+        """Test that hybrid results carry breakdowns from both retrievers."""
+        exact = _create_article(client, 'Part ZX-4410 datasheet', 'Torque limits for the ZX-4410.')
+        paraphrase = _create_article(client, 'Fastener guidance', 'Recommended bolt tightening values.')
+        _embed_article(exact, 'Part ZX-4410 datasheet. Torque limits for the ZX-4410.')
+        _embed_article(paraphrase, 'Fastener guidance. Recommended bolt tightening torque values.')
+
+        try:
+            response = client.get('/api/search?q=ZX-4410 torque&lang=en&mode=hybrid')
+            assert response.status_code == 200
+            data = json.loads(response.data)
+        finally:
+            _delete_embeddings()
+
+        assert data['mode'] == 'hybrid'
+        by_id = {item['id']: item for item in data['items']}
+        assert data['items'][0]['id'] == exact
+        assert set(by_id[exact]['scores']) == {'keyword', 'semantic'}
+        assert set(by_id[paraphrase]['scores']) == {'semantic'}
+        assert by_id[exact]['score'] > by_id[paraphrase]['score']
+
+    def test_hybrid_parameters_validated(self, client):
+        """Test that bad mode and fusion parameters are rejected."""
+        assert client.get('/api/search?q=x&mode=vector').status_code == 400
+        assert client.get('/api/search?q=x&mode=hybrid&rrf_k=abc').status_code == 400
+        assert client.get('/api/search?q=x&mode=hybrid&semantic_weight=high').status_code == 400
+
+
+class TestQueryEmbeddingCache:
+    """Test the query-embedding cache in front of the embedding provider."""
+
+    def test_normalized_queries_share_a_vector(self, client, ops_client, app):
+        """Test that spelling variants hit one entry and the stats endpoint counts them."""
+        import numpy as np
+        from app.services.embeddings import get_embedding_provider
+        from app.services.query_cache import embed_query, query_cache
+
+        query_cache.clear()
+        first = embed_query('  Machine   LEARNING ', 'en')
+        second = embed_query('machine learning', 'en')
+        embed_query('machine learning', 'de')
+
+        assert second is first
+        assert not first.flags.writeable
+        np.testing.assert_array_equal(first, get_embedding_provider().embed_query('machine learning'))
+
+        assert client.get('/admin/ops/query-cache').status_code in (302, 401)
+        stats = json.loads(ops_client.get('/admin/ops/query-cache').data)
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+        assert stats['hit_rate'] == round(1 / 3, 4)
+
+    def test_redis_tier_stores_packed_float32(self):
+        """Test that Redis holds raw float32 bytes and foreign-sized values are misses."""
+        import numpy as np
+        from app.services.query_cache import QueryEmbeddingCache
+
+        class FakeRedis(dict):
+            def set(self, key, value, ex=None):
+                self[key] = value
+
+        redis = FakeRedis()
+        cache = QueryEmbeddingCache(max_entries=0)  # LRU off: every read goes to Redis
+        cache._get_redis = lambda: redis
+
+        key = cache.make_key('python', 'en', 'model', 3)
+        cache.set(key, [0.6, 0.8, 0.0])
+        assert redis[key] == np.array([0.6, 0.8, 0.0], dtype='<f4').tobytes()
+        np.testing.assert_array_equal(cache.get(key, 3), np.array([0.6, 0.8, 0.0], dtype=np.float32))
+
+        redis[key] = b'\0' * 8
+        assert cache.get(key, 3) is None
+        assert (cache.stats()['redis_hits'], cache.stats()['misses']) == (1, 1)
@@ -0,0 +1,244 @@
+"""Tests for the embedding chunker and the embedding tasks that use it."""
+import io
+import json
+
+import pytest
+
+from app.services.chunking import chunk_markdown, chunk_text, count_tokens
+
+
+MARKDOWN = (
+    '# Guide\n\nShort intro. Second sentence.\n\n'
+    '## Details\n\n' + 'Alpha beta gamma delta epsilon. ' * 40 + '\n\n'
+    '```python\ndef f():\n\n    return 1\n```\n\n'
+    '## End\n\nDone.\n'
+)
+
+
+class TestChunkMarkdown:
+    """Test markdown chunking."""
+
+    def test_headings_start_chunks(self):
+        """Test that every heading starts a chunk and sets its heading."""
+        chunks = list(chunk_markdown(MARKDOWN, 60, 10))
+
+        assert [c.chunk_index for c in chunks] == list(range(len(chunks)))
+        assert chunks[0].text == '# Guide\n\nShort intro. Second sentence.'
+        assert chunks[0].heading == 'Guide'
+        assert chunks[1].text.startswith('## Details')
+        assert chunks[-1].text == '## End\n\nDone.'
+        assert {c.heading for c in chunks} == {'Guide', 'Details', 'End'}
+        assert all(c.token_count <= 60 for c in chunks)
+        assert all(c.token_count == count_tokens(c.text) for c in chunks)
+
+    def test_sentence_breaks_and_overlap(self):
+        """Test that long paragraphs split at sentence ends and chunks overlap."""
+        chunks = [c for c in chunk_markdown(MARKDOWN, 60, 10) if c.heading == 'Details']
+
+        for previous, current in zip(chunks, chunks[1:]):
+            assert previous.text.endswith('.') or previous.text.endswith('```')
+            assert current.text.startswith('Alpha')
+            # The shared sentence is repeated at the start of the next chunk
+            assert previous.text.endswith(current.text.split('. ')[0] + '.')
+
+    def test_stable_across_block_sizes(self):
+        """Test that streamed input yields identical chunks, indexes and hashes."""
+        expected = list(chunk_markdown(MARKDOWN, 60, 10))
+        for size in (1, 3, 7, 64):
+            blocks = [MARKDOWN[i:i + size] for i in range(0, len(MARKDOWN), size)]
+            assert list(chunk_markdown(blocks, 60, 10)) == expected
+        assert list(chunk_markdown(io.StringIO(MARKDOWN), 60, 10)) == expected
+
+    def test_invalid_sizes(self):
+        """Test that overlap must stay under half of the target."""
+        with pytest.raises(ValueError):
+            list(chunk_markdown('text', 10, 5))
+        with pytest.raises(ValueError):
+            list(chunk_markdown('text', 0, 0))
+
+
+class TestChunkText:
+    """Test transcript chunking."""
+
+    def test_long_transcript_streams(self):
+        """Test that a transcript without line breaks is chunked lazily at sentences."""
+        def blocks():
+            for _ in range(2000):
+                yield 'The speaker talks about search. '
+
+        chunks = chunk_text(blocks(), 100, 20)
+        first = next(chunks)
+        assert first.chunk_index == 0
+        assert first.text.startswith('The speaker') and first.text.endswith('search.')
+
+        rest = list(chunks)
+        assert len(rest) > 100
+        assert all(c.token_count <= 100 for c in rest)
+        assert rest[-1].text.endswith('search.')
+
+    def test_words_split_only_when_nothing_else_fits(self):
+        """Test that an overlong word is split at the target size."""
+        chunks = list(chunk_text('x' * 50, 5, 0))
+        assert [c.text for c in chunks] == ['x' * 20, 'x' * 20, 'x' * 10]
+
+
+class TestEmbeddingTasks:
+    """Test the article and transcript embedding tasks."""
+
+    @pytest.fixture
+    def small_chunks(self, app):
+        app.config['EMBEDDING_CHUNK_TOKENS'] = 60
+        app.config['EMBEDDING_CHUNK_OVERLAP'] = 10
+        yield
+        app.config['EMBEDDING_CHUNK_TOKENS'] = 400
+        app.config['EMBEDDING_CHUNK_OVERLAP'] = 50
+
+    @staticmethod
+    def _create_translation(client, markdown):
+        from app.models import ArticleTranslation
+
+        response = client.post(
+            '/api/contents',
+            data=json.dumps({
+                'type': 'article',
+                'translation': {'language': 'en', 'title': 'Chunked', 'markdown': markdown},
+            }),
+            content_type='application/json'
+        )
+        return ArticleTranslation.query.filter_by(content_id=json.loads(response.data)['id']).one()
+
+    @staticmethod
+    def _rows(translation_id):
+        from app.models import Embedding
+
+        rows = Embedding.query.filter_by(owner_type='article_translation', owner_id=translation_id)
+        return {row.chunk_index: (row.id, row.content_hash) for row in rows}
+
+    def test_article_translation_chunks_are_embedded(self, app, client, small_chunks):
+        """Test one embedding per chunk, and that re-running embeds nothing."""
+        from app.tasks.embeddings import embed_article_translation
+
+        translation = self._create_translation(client, MARKDOWN)
+        count = len(list(chunk_markdown(MARKDOWN, 60, 10)))
+
+        result = embed_article_translation(translation.id)
+        assert result == {'status': 'success', 'translation_id': translation.id,
+                          'chunks': count, 'embedded': count, 'moved': 0, 'deleted': 0}
+        rows = self._rows(translation.id)
+        assert sorted(rows) == list(range(count))
+        assert all(content_hash for _, content_hash in rows.values())
+
+        result = embed_article_translation(translation.id)
+        assert (result['embedded'], result['moved'], result['deleted']) == (0, 0, 0)
+        assert self._rows(translation.id) == rows
+
+    def test_edits_only_embed_changed_chunks(self, app, client, small_chunks):
+        """Test that an update re-embeds the edited chunk and reindexes moved ones."""
+        from app.tasks.embeddings import drain_embedding_queue, embed_article_translation
+
+        translation = self._create_translation(client, MARKDOWN)
+        embed_article_translation(translation.id)
+        before = self._rows(translation.id)
+
+        edited = '# Preface\n\nNew first section.\n\n' + MARKDOWN.replace('Done.', 'Done!')
+        app.config['EMBED_ON_WRITE'] = True
+        app.config['EMBED_QUIET_SECONDS'] = 0
+        try:
+            response = client.put(
+                f'/api/contents/{translation.content_id}/translations/en',
+                data=json.dumps({'markdown': edited}),
+                content_type='application/json'
+            )
+            drain_embedding_queue()
+        finally:
+            app.config['EMBED_ON_WRITE'] = False
+            app.config['EMBED_QUIET_SECONDS'] = 60
+        assert response.status_code == 200
+
+        after = self._rows(translation.id)
+        assert len(after) == len(before) + 1
+        # Every unchanged chunk kept its row and vector, one position down
+        assert [after[i + 1][0] for i in range(len(before) - 1)] == [before[i][0] for i in range(len(before) - 1)]
+        assert after[len(before)][1] != before[len(before) - 1][1]
+
+        result = embed_article_translation(translation.id)
+        assert result['embedded'] == 0
+
+
+class TestEmbeddingQueue:
+    """Test coalescing of embedding runs for repeated writes."""
+
+    @pytest.fixture
+    def embed_on_write(self, app):
+        app.config['EMBED_ON_WRITE'] = True
+        yield
+        app.config['EMBED_ON_WRITE'] = False
+        app.config['EMBED_QUIET_SECONDS'] = 60
+
+    @staticmethod
+    def _save(client, content_id, markdown):
+        response = client.put(
+            f'/api/contents/{content_id}/translations/en',
+            data=json.dumps({'markdown': markdown}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+
+    def test_saves_coalesce_until_quiet(self, app, client, embed_on_write):
+        """Test that a burst of saves marks the owner once and embeds it once it is quiet."""
+        from app.models import Embedding, EmbeddingDirty
+        from app.tasks.embeddings import drain_embedding_queue
+
+        translation = TestEmbeddingTasks._create_translation(client, 'First draft')
+        for draft in ('Second draft', 'Third draft', 'Final draft'):
+            self._save(client, translation.content_id, draft)
+
+        [dirty] = EmbeddingDirty.query.filter_by(owner_id=translation.id).all()
+        assert dirty.owner_type == 'article_translation'
+        assert dirty.marked_at > dirty.dirty_since
+
+        assert drain_embedding_queue()['scheduled'] == 0
+        assert Embedding.query.filter_by(owner_id=translation.id).count() == 0
+
+        app.config['EMBED_QUIET_SECONDS'] = 0
+        assert drain_embedding_queue()['scheduled'] == 1
+        assert EmbeddingDirty.query.filter_by(owner_id=translation.id).count() == 0
+        assert Embedding.query.filter_by(owner_id=translation.id).count() == 1
+        assert drain_embedding_queue()['scheduled'] == 0
+
+    def test_continuous_edits_are_embedded_after_max_delay(self, app, client, embed_on_write):
+        """Test that an owner dirty for longer than the maximum delay is drained while still busy."""
+        from datetime import datetime, timedelta
+        from app.models import EmbeddingDirty
+        from app.tasks.embeddings import drain_embedding_queue
+        from app import db
+
+        translation = TestEmbeddingTasks._create_translation(client, 'Busy document')
+        dirty = EmbeddingDirty.query.filter_by(owner_id=translation.id).one()
+        dirty.dirty_since = datetime.utcnow() - timedelta(seconds=601)
+        db.session.commit()
+        self._save(client, translation.content_id, 'Still being edited')
+
+        assert drain_embedding_queue()['scheduled'] == 1
+        assert EmbeddingDirty.query.filter_by(owner_id=translation.id).count() == 0
+
+    def test_failed_runs_stay_queued(self, app, client, embed_on_write, monkeypatch):
+        """Test that an owner whose embedding run fails is marked dirty again."""
+        from app.models import Embedding, EmbeddingDirty
+        from app.services.embeddings import EmbeddingError
+        from app.tasks import embeddings
+
+        translation = TestEmbeddingTasks._create_translation(client, 'Unlucky document')
+
+        def fail():
+            raise EmbeddingError('embedding request failed with 500')
+
+        monkeypatch.setattr(embeddings, 'get_write_providers', fail)
+        app.config['EMBED_QUIET_SECONDS'] = 0
+        assert embeddings.drain_embedding_queue()['scheduled'] == 1
+        assert EmbeddingDirty.query.filter_by(owner_id=translation.id).count() == 1
+
+        monkeypatch.undo()
+        assert embeddings.drain_embedding_queue()['scheduled'] == 1
+        assert EmbeddingDirty.query.filter_by(owner_id=translation.id).count() == 0
+        assert Embedding.query.filter_by(owner_id=translation.id).count() == 1
@@ -0,0 +1,340 @@
+"""Tests for Flask CLI commands."""
+import json
+
+import pytest
+
+
+def _create_article(client, markdown, language='en'):
+    response = client.post(
+        '/api/contents',
+        data=json.dumps({
+            'type': 'article',
+            'translation': {'language': language, 'title': 'CLI Article', 'markdown': markdown},
+        }),
+        content_type='application/json'
+    )
+    assert response.status_code == 201
+    return json.loads(response.data)['id']
+
+
+class TestBackfillListingFields:
+    """Test the backfill-listing-fields command."""
+
+    def test_backfills_missing_fields(self, app, client, runner):
+        """Test that rows without listing fields are populated."""
+        from app.models import ArticleTranslation
+        from app import db
+
+        content_id = _create_article(client, '# Heading\n\nSome body text')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        translation.excerpt = None
+        translation.word_count = None
+        translation.read_time_minutes = None
+        translation.toc_json = None
+        db.session.commit()
+        updated_at = translation.updated_at
+
+        result = runner.invoke(args=['backfill-listing-fields', '--batch-size', '1'])
+        assert result.exit_code == 0, result.output
+
+        db.session.expire_all()
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert translation.word_count == 5
+        assert translation.excerpt == 'Heading Some body text'
+        assert translation.toc_json[0]['name'] == 'Heading'
+        assert translation.updated_at == updated_at
+
+    def test_bypasses_render_cache(self, app, client, runner):
+        """Test that a backfill does not fill the rendered-HTML cache."""
+        from app.utils.render_cache import render_cache
+
+        _create_article(client, '# Uncached\n\nBackfill body')
+        render_cache.clear()
+        result = runner.invoke(args=['backfill-listing-fields', '--all'])
+        assert result.exit_code == 0, result.output
+        stats = render_cache.stats()
+        assert stats['entries'] == 0 and stats['misses'] == 0
+
+
+class TestRerender:
+    """Test the rerender command."""
+
+    def test_rerenders_stale_rows_in_both_tables(self, app, client, runner, tmp_path):
+        """Test that stale translations and versions are re-rendered."""
+        from app.models import ArticleTranslation, ArticleTranslationVersion
+        from app.utils.markdown_renderer import RENDERER_FINGERPRINT
+        from app import db
+
+        content_id = _create_article(client, '**neu**')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        translation.rendered_html = '<p>alt</p>'
+        translation.renderer_version = 'old'
+        version = ArticleTranslationVersion.query.filter_by(translation_id=translation.id).one()
+        version.rendered_html = None
+        version.renderer_version = None
+        db.session.commit()
+        updated_at = translation.updated_at
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        result = runner.invoke(args=[
+            'rerender', '--workers', '1', '--batch-size', '1', '--checkpoint', str(checkpoint)
+        ])
+        assert result.exit_code == 0, result.output
+        assert 'rows/s' in result.output
+        assert not checkpoint.exists()
+
+        db.session.expire_all()
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        version = ArticleTranslationVersion.query.filter_by(translation_id=translation.id).one()
+        assert translation.rendered_html == '<p><strong>neu</strong></p>'
+        assert translation.renderer_version == RENDERER_FINGERPRINT
+        assert translation.updated_at == updated_at
+        assert version.rendered_html == '<p><strong>neu</strong></p>'
+        assert version.renderer_version == RENDERER_FINGERPRINT
+
+    def test_resumes_after_checkpoint(self, app, client, tmp_path):
+        """Test that rows at or before the checkpoint are skipped."""
+        from app.models import ArticleTranslation
+        from app.services.rerender import rerender, save_checkpoint
+        from app import db
+
+        content_id = _create_article(client, 'text')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        translation.renderer_version = 'old'
+        db.session.commit()
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        save_checkpoint(str(checkpoint), {'article_translation': translation.id})
+        report = rerender(tables=['article_translation'], workers=1, checkpoint_path=str(checkpoint))
+
+        db.session.expire_all()
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert translation.renderer_version == 'old'
+        assert report['article_translation']['rows'] >= 0
+
+
+class TestEmbedBackfill:
+    """Test the embed-backfill command."""
+
+    def test_embeds_owners_without_embeddings(self, app, client, runner, tmp_path):
+        """Test that missing owners are embedded like the task would, and others are skipped."""
+        from app.models import ArticleTranslation, Embedding
+        from app.services.embeddings import get_embedding_provider
+        from app.tasks.embeddings import embed_article_translation
+        from app import db
+
+        done_id = _create_article(client, '# Done\n\nAlready embedded')
+        missing_id = _create_article(client, '# Missing\n\nNot embedded yet')
+        done = ArticleTranslation.query.filter_by(content_id=done_id).one()
+        missing = ArticleTranslation.query.filter_by(content_id=missing_id).one()
+        embed_article_translation(done.id)
+        done_rows = Embedding.query.filter_by(owner_id=done.id).count()
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        result = runner.invoke(args=[
+            'embed-backfill', '--owner-type', 'article_translation', '--workers', '1',
+            '--batch-size', '1', '--checkpoint', str(checkpoint),
+        ])
+        assert result.exit_code == 0, result.output
+        assert 'Done article_translation' in result.output
+        assert not checkpoint.exists()
+
+        db.session.expire_all()
+        assert Embedding.query.filter_by(owner_id=done.id).count() == done_rows
+        [row] = Embedding.query.filter_by(owner_id=missing.id).all()
+        assert row.model == get_embedding_provider().model
+
+        # The task agrees with the backfilled hashes, so it has nothing to redo
+        assert embed_article_translation(missing.id)['embedded'] == 0
+
+    def test_resumes_after_checkpoint(self, app, client, tmp_path):
+        """Test that owners at or before the checkpoint are skipped."""
+        from app.models import ArticleTranslation, Embedding
+        from app.services.embed_backfill import backfill, save_checkpoint
+        from app.services.embeddings import get_embedding_provider
+
+        content_id = _create_article(client, 'checkpointed')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        save_checkpoint(str(checkpoint), get_embedding_provider().model,
+                        {'article_translation': translation.id, 'transcript': 'z'})
+        backfill(workers=1, checkpoint_path=str(checkpoint))
+
+        assert Embedding.query.filter_by(owner_id=translation.id).count() == 0
+
+    def test_copy_payload(self):
+        """Test the binary COPY encoding of a row."""
+        import struct
+        from datetime import datetime
+        import numpy as np
+        from app.services.embed_backfill import COLUMNS, copy_payload
+
+        row = dict.fromkeys(COLUMNS, 'x')
+        row.update(dim=2, chunk_index=0, content_hash=None,
+                   vector=np.array([1.0, 0.5], dtype=np.float32),
+                   created_at=datetime(2000, 1, 1, 0, 0, 1))
+        data = copy_payload([row]).read()
+
+        assert data.startswith(b'PGCOPY\n\xff\r\n\x00')
+        assert data.endswith(struct.pack('>h', -1))
+        assert struct.pack('>i', -1) in data  # NULL content_hash
+        assert struct.pack('>ihh2f', 12, 2, 0, 1.0, 0.5) in data
+        assert data[-10:-2] == struct.pack('>q', 1000000)
+
+
+class TestVectorIndexSave:
+    """Test the numpy vector index sidecar snapshot command."""
+
+    def test_saves_sidecar_for_model(self, app, runner, tmp_path):
+        """Test that the snapshot holds the model's embeddings."""
+        import numpy as np
+        from app.models import Embedding
+        from app.services.vector_store import NumpyVectorStore
+        from app import db
+
+        db.session.add(Embedding(
+            owner_type='transcript', owner_id='t-1', language='en', model='snapshot-test',
+            dim=1536, chunk_index=0, vector=np.ones(1536, dtype=np.float32),
+        ))
+        db.session.commit()
+
+        app.config['VECTOR_INDEX_PATH'] = str(tmp_path)
+        try:
+            result = runner.invoke(args=['vector-index-save', '--model', 'snapshot-test'])
+        finally:
+            app.config['VECTOR_INDEX_PATH'] = ''
+        assert 'Saved 1 vector(s)' in result.output
+
+        store = NumpyVectorStore.load(str(tmp_path / 'snapshot-test'))
+        query = np.full(1536, 1 / np.sqrt(1536), dtype=np.float32)
+        [(_, owner_type, owner_id, _, similarity)] = store.search(query, 5)
+        assert (owner_type, owner_id) == ('transcript', 't-1')
+        assert similarity == pytest.approx(1.0, abs=1e-5)
+
+        Embedding.query.filter_by(model='snapshot-test').delete()
+        db.session.commit()
+
+    def test_reload_applies_table_changes_to_sidecar(self, app, runner, tmp_path):
+        """Test that a reload picks up rows written since the snapshot and re-saves it."""
+        import numpy as np
+        from app.models import Embedding
+        from app.services.semantic import NumpyVectorIndex
+        from app.services.vector_store import NumpyVectorStore
+        from app import db
+
+        def add(owner_id, chunk_index, axis):
+            vector = np.zeros(4, dtype=np.float32)
+            vector[axis] = 1
+            embedding = Embedding(
+                owner_type='transcript', owner_id=owner_id, language='en', model='sidecar-test',
+                dim=4, chunk_index=chunk_index, vector=vector,
+            )
+            db.session.add(embedding)
+            db.session.commit()
+            return embedding
+
+        kept, moved, dropped = add('t-1', 0, 0), add('t-2', 0, 1), add('t-3', 0, 2)
+        app.config['VECTOR_INDEX_PATH'] = str(tmp_path)
+        try:
+            runner.invoke(args=['vector-index-save', '--model', 'sidecar-test'])
+
+            # Written by another process after the snapshot
+            moved.chunk_index = 5
+            db.session.delete(dropped)
+            db.session.commit()
+            added = add('t-4', 0, 3)
+
+            index = NumpyVectorIndex()
+            assert index.refresh_sidecar('sidecar-test', str(tmp_path / 'sidecar-test')) == 3
+            store = index.load('sidecar-test')
+            assert index.refresh_sidecar('sidecar-test', str(tmp_path / 'sidecar-test')) == 0
+        finally:
+            app.config['VECTOR_INDEX_PATH'] = ''
+
+        expected = {kept.id: 0, moved.id: 5, added.id: 0}
+        assert store.chunk_indexes() == expected
+        assert NumpyVectorStore.load(str(tmp_path / 'sidecar-test')).chunk_indexes() == expected
+        [(found, *_)] = store.search(np.array([0, 0, 0, 1], dtype=np.float32), 1)
+        assert found == added.id
+
+        Embedding.query.filter_by(model='sidecar-test').delete()
+        db.session.commit()
+
+
+class TestQueryCacheWarm:
+    """Test the query-cache-warm command."""
+
+    def test_warms_top_logged_queries(self, app, client, runner):
+        """Test that logged semantic/hybrid searches are embedded, most frequent first."""
+        from app.models import SearchLog
+        from app.services.embeddings import get_embedding_provider
+        from app.services.query_cache import query_cache
+
+        for _ in range(2):
+            response = client.post('/api/search/semantic', data=json.dumps({'query': 'Warm  Cache'}),
+                                   content_type='application/json')
+            assert response.status_code == 200
+        client.get('/api/search?q=warm+keyword-only')
+        client.get('/api/search?q=warm+hybrid&mode=hybrid&page=2')  # later pages are not logged
+
+        top = SearchLog.top_queries(modes=('hybrid', 'semantic'))
+        assert top[0] == ('warm cache', 'en', 2)
+        assert 'warm keyword-only' not in [text for text, _, _ in top]
+        assert 'warm hybrid' not in [text for text, _, _ in top]
+
+        query_cache.clear()
+        result = runner.invoke(args=['query-cache-warm'])
+        assert result.exit_code == 0, result.output
+        assert 'embedded' in result.output
+
+        provider = get_embedding_provider()
+        key = query_cache.make_key('warm cache', 'en', provider.model, provider.dimensions)
+        assert query_cache.get(key, provider.dimensions) is not None
+
+
+class TestEmbeddingCutover:
+    """Test an online embedding model cut-over and embedding-prune."""
+
+    @pytest.fixture
+    def cutover(self, app):
+        # Writes move to a 64-dimension model while searches stay on the old one
+        app.config['EMBEDDING_DIMENSIONS'] = 64
+        app.config['EMBEDDING_SEARCH_DIMENSIONS'] = 1536
+        yield
+        app.config['EMBEDDING_DIMENSIONS'] = 1536
+        app.config['EMBEDDING_SEARCH_DIMENSIONS'] = 0
+
+    def test_dual_write_switch_and_prune(self, app, client, runner, cutover):
+        """Test that both models are written, searches follow the search model and the old one is pruned."""
+        from app.models import ArticleTranslation, Embedding
+        from app.services.semantic import semantic_search
+        from app.tasks.embeddings import embed_article_translation
+        from app import db
+
+        content_id = _create_article(client, 'Seagrass meadows trap sediment.')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        result = embed_article_translation(translation.id)
+        assert (result['chunks'], result['embedded']) == (1, 2)
+        rows = Embedding.query.filter_by(owner_id=translation.id).all()
+        assert sorted((row.model, row.dim) for row in rows) == [('local-hash-1536', 1536), ('local-hash-64', 64)]
+
+        [old] = semantic_search('seagrass meadows', 'en', limit=1)
+        assert old.content.id == content_id and old.hit.similarity > 0
+
+        # Once backfilled, clearing the search profile switches searches over
+        app.config['EMBEDDING_SEARCH_DIMENSIONS'] = 0
+        [new] = semantic_search('seagrass meadows', 'en', limit=1)
+        assert new.content.id == content_id and new.hit.similarity != old.hit.similarity
+
+        result = runner.invoke(args=['embedding-prune', '--model', 'local-hash-64'])
+        assert 'still written or searched' in result.output
+        result = runner.invoke(args=['embedding-models'])
+        assert 'local-hash-64 (64 dims) [write, search]: article_translation 1 chunk(s)' in result.output
+
+        result = runner.invoke(args=['embedding-prune', '--model', 'local-hash-1536', '--batch-size', '1'])
+        assert result.exit_code == 0, result.output
+        assert 'embedding(s) of local-hash-1536' in result.output
+        db.session.expire_all()
+        assert Embedding.query.filter_by(model='local-hash-1536').count() == 0
+        assert [row.model for row in Embedding.query.filter_by(owner_id=translation.id)] == ['local-hash-64']
@@ -0,0 +1,178 @@
+"""Tests for the batched embedding provider layer."""
+import base64
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services.embeddings import (
+    EmbeddingError,
+    EmbeddingProvider,
+    OpenAIEmbeddingProvider,
+    TransientEmbeddingError,
+)
+
+
+class RecordingProvider(EmbeddingProvider):
+    """Embeds text i as a one-hot vector, failing the first call of each batch when asked"""
+
+    name = 'recording'
+    model = 'recording'
+
+    def __init__(self, fail_first=0, delay=0.0, **kwargs):
+        super().__init__(4, retry_backoff=0.0, **kwargs)
+        self.batches = []
+        self.failures = fail_first
+        self.delay = delay
+        self.active = self.peak = 0
+        self._count_lock = threading.Lock()
+
+    def embed_batch(self, texts):
+        with self._count_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            failing = self.failures > 0
+            self.failures -= failing
+        try:
+            time.sleep(self.delay)
+            if failing:
+                raise TransientEmbeddingError('rate limited')
+            self.batches.append(list(texts))
+            return np.eye(4, dtype=np.float32)[[int(text) % 4 for text in texts]] * 3
+        finally:
+            with self._count_lock:
+                self.active -= 1
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        self.text = ''
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def post(self, url, json, timeout):
+        self.requests.append((url, json))
+        return self.responses.pop(0)
+
+
+class TestBatchedProvider:
+    """Test batching, concurrency and retries shared by all providers."""
+
+    def test_stream_batches_in_order(self):
+        """Test that items are embedded batch_size at a time and yielded in order."""
+        provider = RecordingProvider(batch_size=3)
+        items = [{'id': i} for i in range(8)]
+
+        results = list(provider.embed_stream(iter(items), lambda item: str(item['id'])))
+
+        assert provider.batches == [['0', '1', '2'], ['3', '4', '5'], ['6', '7']]
+        assert [item for item, _ in results] == items
+        vectors = np.stack([vector for _, vector in results])
+        assert vectors.dtype == np.float32
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0)
+        assert provider.embed([]).shape == (0, 4)
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than max_concurrency batches run at once."""
+        provider = RecordingProvider(batch_size=1, max_concurrency=2, delay=0.02)
+        vectors = provider.embed([str(i) for i in range(6)])
+
+        assert provider.peak == 2
+        np.testing.assert_array_equal(vectors.argmax(axis=1), [0, 1, 2, 3, 0, 1])
+
+    def test_transient_failures_are_retried(self):
+        """Test retry with backoff, and that exhausted retries raise."""
+        provider = RecordingProvider(fail_first=2, max_retries=2)
+        assert provider.embed(['1']).shape == (1, 4)
+
+        provider = RecordingProvider(fail_first=3, max_retries=2)
+        with pytest.raises(TransientEmbeddingError):
+            provider.embed(['1'])
+
+
+class TestOpenAIProvider:
+    """Test the OpenAI-compatible provider against a fake HTTP session."""
+
+    def _provider(self, responses, **kwargs):
+        provider = OpenAIEmbeddingProvider(
+            2, 'text-embedding-3-small', 'key', base_url='http://embed.test/v1/',
+            retry_backoff=0.0, **kwargs
+        )
+        provider._session = FakeSession(responses)
+        return provider
+
+    @staticmethod
+    def _item(index, vector):
+        return {'index': index, 'embedding': base64.b64encode(np.array(vector, dtype='<f4').tobytes()).decode()}
+
+    def test_decodes_base64_in_index_order(self):
+        """Test the request payload and decoding of out-of-order base64 results."""
+        provider = self._provider([
+            FakeResponse(200, {'data': [self._item(1, [0, 2]), self._item(0, [3, 4])]}),
+        ])
+
+        vectors = provider.embed(['a', 'b'])
+
+        url, payload = provider.session.requests[0]
+        assert url == 'http://embed.test/v1/embeddings'
+        assert payload == {'model': 'text-embedding-3-small', 'input': ['a', 'b'],
+                           'encoding_format': 'base64', 'dimensions': 2}
+        np.testing.assert_allclose(vectors, [[0.6, 0.8], [0.0, 1.0]], rtol=1e-6)
+
+    def test_rate_limits_retry_and_client_errors_raise(self):
+        """Test that 429 is retried and other 4xx responses fail immediately."""
+        provider = self._provider([
+            FakeResponse(429, headers={'Retry-After': '0'}),
+            FakeResponse(200, {'data': [self._item(0, [1, 0])]}),
+        ])
+        np.testing.assert_allclose(provider.embed(['a']), [[1.0, 0.0]])
+        assert len(provider.session.requests) == 2
+
+        provider = self._provider([FakeResponse(400)])
+        with pytest.raises(EmbeddingError):
+            provider.embed(['a'])
+        assert len(provider.session.requests) == 1
+
+    def test_selected_by_config(self, app):
+        """Test that EMBEDDING_PROVIDER=openai uses EMBEDDING_MODEL and the API settings."""
+        from app.services.embeddings import get_embedding_provider
+
+        app.config['EMBEDDING_PROVIDER'] = 'openai'
+        try:
+            provider = get_embedding_provider()
+        finally:
+            app.config['EMBEDDING_PROVIDER'] = 'local'
+
+        assert isinstance(provider, OpenAIEmbeddingProvider)
+        assert provider.model == f"{app.config['EMBEDDING_MODEL']}@{app.config['EMBEDDING_DIMENSIONS']}"
+        assert provider.max_concurrency == app.config['EMBEDDING_MAX_CONCURRENCY']
+        assert get_embedding_provider().max_concurrency == 1
+
+    def test_model_key_names_dimensions(self, app):
+        """Test that shortening a model to new dimensions is a cut-over, not the same model."""
+        from app.services.embeddings import get_write_providers
+
+        settings = {'EMBEDDING_PROVIDER': 'openai', 'EMBEDDING_SEARCH_DIMENSIONS': 256}
+        previous = {name: app.config.get(name) for name in settings}
+        app.config.update(settings)
+        try:
+            providers = get_write_providers()
+        finally:
+            app.config.update(previous)
+
+        dimensions = app.config['EMBEDDING_DIMENSIONS']
+        assert [provider.model for provider in providers] == [
+            f'text-embedding-3-small@{dimensions}', 'text-embedding-3-small@256'
+        ]
+        assert providers[1].dimensions == 256
@@ -0,0 +1,233 @@
+"""Tests for the markdown rendering utilities."""
+import threading
+
+import markdown
+import pytest
+
+from app.utils import highlight
+from app.utils.markdown_renderer import (
+    MARKDOWN_EXTENSION_CONFIGS,
+    MARKDOWN_EXTENSIONS,
+    RENDERER_FINGERPRINT,
+    build_markdown_engine,
+    get_excerpt,
+    markdown_engine,
+    render_markdown,
+)
+from app.utils.preview import render_preview, split_blocks
+from app.utils.render_cache import RenderCache, render_cache
+
+
+class TestRenderMarkdown:
+    """Test pooled markdown rendering."""
+
+    def test_empty_input(self):
+        """Test that empty markdown renders to an empty string."""
+        assert render_markdown('') == ''
+        assert render_markdown(None) == ''
+
+    def test_matches_fresh_engine(self):
+        """Test that pooled output is identical to a freshly built engine."""
+        text = '# Title\n\nSome *text* with a footnote[^1].\n\n[^1]: Note.'
+        assert render_markdown(text) == build_markdown_engine().convert(text)
+
+    def test_engine_reused_on_same_thread(self):
+        """Test that the same engine is handed out again after release."""
+        with markdown_engine() as first:
+            pass
+        with markdown_engine() as second:
+            pass
+        assert first is second
+
+    def test_nested_use_gets_separate_engine(self):
+        """Test that nested borrows on one thread do not share an engine."""
+        with markdown_engine() as outer:
+            with markdown_engine() as inner:
+                assert outer is not inner
+
+    def test_state_does_not_leak_between_renders(self):
+        """Test that footnotes and abbreviations are reset between uses."""
+        render_markdown('Text[^1]\n\n[^1]: Footnote one.\n\n*[HTML]: Hyper Text')
+        html = render_markdown('Plain HTML paragraph.')
+        assert 'footnote' not in html
+        assert '<abbr' not in html
+
+    def test_engines_are_per_thread(self):
+        """Test that each thread gets its own engine."""
+        with markdown_engine() as main_engine:
+            pass
+
+        seen = []
+
+        def worker():
+            with markdown_engine() as md:
+                seen.append(md)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert seen and seen[0] is not main_engine
+
+
+class TestRenderCache:
+    """Test the rendered-HTML cache."""
+
+    def test_repeat_render_hits_cache(self, app):
+        """Test that identical markdown is only converted once."""
+        render_cache.clear()
+        first = render_markdown('# Cached\n\nBody text.')
+        second = render_markdown('# Cached\n\nBody text.')
+
+        stats = render_cache.stats()
+        assert first == second
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+
+    def test_key_depends_on_fingerprint(self):
+        """Test that a renderer config change yields a different key."""
+        key = RenderCache.make_key('text', RENDERER_FINGERPRINT)
+        assert key != RenderCache.make_key('text', 'other-fingerprint')
+        assert key == RenderCache.make_key('text', RENDERER_FINGERPRINT)
+
+    def test_lru_evicts_to_byte_budget(self, app):
+        """Test that the least recently used entries are evicted first."""
+        cache = RenderCache(max_bytes=25)
+        cache.set('a', 'x' * 10)
+        cache.set('b', 'y' * 10)
+        assert cache.get('a') is not None  # a is now most recently used
+        cache.set('c', 'z' * 10)
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+        stats = cache.stats()
+        assert stats['evictions'] == 1
+        assert stats['bytes'] <= 25
+
+    def test_oversized_entry_not_stored(self, app):
+        """Test that a value larger than the budget is skipped."""
+        cache = RenderCache(max_bytes=5)
+        cache.set('big', 'x' * 10)
+        assert cache.get('big') is None
+        assert cache.stats()['entries'] == 0
+
+
+class TestBlockPreview:
+    """Test incremental block-level preview rendering."""
+
+    def test_split_keeps_fences_and_lists_together(self):
+        """Test that blank lines inside fences and loose lists do not split."""
+        text = '# Title\n\n- a\n\n- b\n\n```\none\n\ntwo\n```\n\nlast'
+        assert split_blocks(text) == ['# Title', '- a\n\n- b', '```\none\n\ntwo\n```', 'last']
+
+    def test_split_closes_fences_like_commonmark(self):
+        """Test that only a fence of the same character, as long or longer, with nothing after it closes a fence."""
+        inner = '````\n```python\n\n```\n~~~~\n\n```` trailing\n\n````'
+        assert split_blocks(inner + '\n\nafter') == [inner, 'after']
+        assert split_blocks('~~~\na\n\n~~~~  \n\nafter') == ['~~~\na\n\n~~~~  ', 'after']
+        # Indented four spaces it is code, not a closing fence
+        assert split_blocks('```\na\n\n    ```\n\n```\n\nafter') == ['```\na\n\n    ```\n\n```', 'after']
+
+    def test_blocks_match_full_render(self, app):
+        """Test that concatenated fragments equal the full render."""
+        text = '# Title\n\nSome **text**\n\n- a\n- b\n\n> quote'
+        result = render_preview(text)
+        assert result['mode'] == 'blocks'
+        html = '\n'.join(result['fragments'][h] for h in result['blocks'])
+        assert html == render_markdown(text)
+
+    def test_only_unknown_blocks_are_returned(self, app):
+        """Test that known block hashes are not sent again."""
+        first = render_preview('one\n\ntwo\n\nthree')
+        second = render_preview('one\n\nTWO\n\nthree', first['blocks'])
+
+        assert second['blocks'][0] == first['blocks'][0]
+        assert second['blocks'][2] == first['blocks'][2]
+        assert list(second['fragments']) == [second['blocks'][1]]
+        assert second['fragments'][second['blocks'][1]] == '<p>TWO</p>'
+
+    def test_global_definitions_fall_back_to_full(self, app):
+        """Test that footnotes force a full render."""
+        result = render_preview('Text[^1]\n\n[^1]: Note')
+        assert result['mode'] == 'full'
+        assert 'footnote' in result['rendered_html']
+
+
+def _engine(guess_mode):
+    configs = dict(MARKDOWN_EXTENSION_CONFIGS)
+    configs[highlight.__name__] = dict(configs[highlight.__name__], guess_mode=guess_mode)
+    return markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, extension_configs=configs)
+
+
+class TestCodeHighlight:
+    """Test the cached code highlighting extension."""
+
+    def test_sniff_language(self):
+        """Test the first-lines heuristic."""
+        assert highlight.sniff_language('#!/usr/bin/env python\nx = 1') == 'python'
+        assert highlight.sniff_language('from flask import Flask') == 'python'
+        assert highlight.sniff_language('SELECT * FROM content;') == 'sql'
+        assert highlight.sniff_language('$ pip install flask') == 'bash'
+        assert highlight.sniff_language('just some words') == 'text'
+
+    def test_lexer_lookup_is_cached(self):
+        """Test that fence languages resolve to cached lexer classes."""
+        assert highlight.lexer_class('python') is highlight.lexer_class('python')
+        assert highlight.lexer_class('no-such-language') is None
+
+    def test_guess_modes(self):
+        """Test that unlabelled blocks follow the configured guess mode."""
+        text = '```\nfrom flask import Flask\n```'
+        assert '<span class="kn">from</span>' in _engine('heuristic').convert(text)
+        assert '<code>from flask import Flask' in _engine('off').convert(text)
+
+    def test_invalid_guess_mode(self):
+        """Test that an unknown guess mode is rejected."""
+        with pytest.raises(ValueError):
+            _engine('sometimes')
+
+    def test_repeated_blocks_highlighted_once(self):
+        """Test that identical blocks in a document share one highlight."""
+        md = _engine('guess')
+        text = '```python\nx = 1\n```\n\ntext\n\n```python\nx = 1\n```'
+        extension = next(ext for ext in md.registeredExtensions
+                         if isinstance(ext, highlight.HighlightExtension))
+        html = md.convert(text)
+
+        assert html.count('<span class="n">x</span>') == 2
+        assert len(extension.memo) == 1
+        md.reset()
+        assert extension.memo == {}
+
+
+class TestExcerpt:
+    """Test plain text excerpts."""
+
+    def test_strips_inline_markup(self):
+        """Test that links, images, emphasis and code reduce to visible text."""
+        text = '# Title\n\nSome **bold**, _em_ and `code` with [a link](https://x.io) ![pic](a.png)'
+        assert get_excerpt(text) == 'Title Some bold, em and code with a link'
+
+    def test_strips_markup_inside_link_text(self):
+        """Test that emphasis and code inside link text are stripped too."""
+        assert get_excerpt('See [**bold link**](http://x)') == 'See bold link'
+        assert get_excerpt('A [`code` and _em_][ref] here') == 'A code and em here'
+
+    def test_keeps_intraword_underscores(self):
+        """Test that identifiers like snake_case survive."""
+        assert get_excerpt('call snake_case_name now') == 'call snake_case_name now'
+
+    def test_skips_code_fences_and_definitions(self):
+        """Test that fenced code, rules and reference definitions are dropped."""
+        text = '```python\nhidden()\n```\n\nVisible[^1]\n\n---\n\n[^1]: Note\n[ref]: https://x.io'
+        assert get_excerpt(text) == 'Visible'
+
+    def test_truncates_on_word_boundary(self):
+        """Test truncation to max_length at a word boundary."""
+        assert get_excerpt('alpha beta gamma delta', 12) == 'alpha beta...'
+
+    def test_stops_scanning_early(self):
+        """Test that a huge document does not change the result."""
+        text = 'word ' * 50 + '[unterminated ' + 'x' * 1_000_000
+        assert get_excerpt(text, 20) == get_excerpt('word ' * 50, 20)
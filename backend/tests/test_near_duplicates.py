@@ -0,0 +1,183 @@
+"""Tests for MinHash/LSH near-duplicate detection."""
+import json
+
+import numpy as np
+import pytest
+
+
+ORIGINAL = (
+    'Die Genossenschaft betreibt seit zwanzig Jahren eine Schule für Hebammen im Norden des Landes. '
+    'Jedes Jahr schließen dort vierzig Frauen ihre Ausbildung ab und kehren in ihre Dörfer zurück, '
+    'wo sie Geburten begleiten und Familien beraten. Die Finanzierung stammt aus Spenden und Beiträgen '
+    'der Gemeinden, die Lehrkräfte arbeiten zum Teil ehrenamtlich.'
+)
+EDITED = ORIGINAL.replace('vierzig Frauen', 'fünfzig Frauen')
+UNRELATED = (
+    'Im Hafen werden Container nachts entladen, während die Kräne im Schichtbetrieb laufen. '
+    'Die Reederei plant eine neue Route über den Atlantik und sucht dafür weitere Besatzungen.'
+)
+
+
+def _create(client, translations, **extra):
+    response = client.post(
+        '/api/contents',
+        data=json.dumps({'type': 'article', 'visibility': 'public', 'translations': translations, **extra}),
+        content_type='application/json'
+    )
+    return response.status_code, json.loads(response.data)
+
+
+def _indexed(content_id):
+    from app.models import NearDuplicateSignature
+
+    return {row.language for row in NearDuplicateSignature.query.filter_by(content_id=content_id)}
+
+
+class TestMinHash:
+    """Test signatures and LSH bucketing."""
+
+    def test_signature_estimates_jaccard(self, app):
+        """Test that the estimate tracks the exact shingle Jaccard similarity."""
+        from app.services.near_duplicates import shingles, similarity, text_signature
+
+        first, second = shingles(ORIGINAL), shingles(EDITED)
+        exact = len(first & second) / len(first | second)
+        estimate = similarity(text_signature(ORIGINAL)[0], text_signature(EDITED)[0])
+        assert estimate == pytest.approx(exact, abs=0.12)
+        assert similarity(text_signature(ORIGINAL)[0], text_signature(UNRELATED)[0]) < 0.1
+        # Case and punctuation are not part of the shingles
+        assert np.array_equal(text_signature(ORIGINAL)[0], text_signature(ORIGINAL.upper().replace('.', ' '))[0])
+        assert text_signature('  ...  ')[0] is None
+
+    def test_signature_independent_of_block_size(self, app, monkeypatch):
+        """Test that hashing shingles in blocks gives the same signature as one pass."""
+        from app.services import near_duplicates
+
+        shingle_set = near_duplicates.shingles(ORIGINAL)
+        whole = near_duplicates.minhash(shingle_set, 128)
+        monkeypatch.setattr(near_duplicates, '_BLOCK_SIZE', 7)
+        assert np.array_equal(near_duplicates.minhash(shingle_set, 128), whole)
+
+    def test_bands_collide_only_when_rows_match(self, app):
+        """Test that band keys are per band and equal exactly for equal rows."""
+        from app.services.near_duplicates import band_keys
+
+        signature = np.arange(16, dtype=np.uint32)
+        changed = signature.copy()
+        changed[5] += 1
+        keys, changed_keys = band_keys(signature, 4, 4), band_keys(changed, 4, 4)
+        assert [a == b for a, b in zip(keys, changed_keys)] == [True, False, True, True]
+        # Identical rows in different bands land in different buckets
+        assert len(set(band_keys(np.zeros(16, dtype=np.uint32), 4, 4))) == 4
+
+
+class TestNearDuplicateAPI:
+    """Test the duplicates endpoint and the check in create_content."""
+
+    def test_duplicates_endpoint(self, app, client):
+        """Test edited copies and untranslated translations are reported, unrelated text is not."""
+        status, original = _create(client, [
+            {'language': 'de', 'title': 'Hebammenschule', 'markdown': ORIGINAL, 'is_primary': True},
+            # "Translated" by pasting the German text
+            {'language': 'fr', 'title': 'École de sages-femmes', 'markdown': ORIGINAL},
+        ])
+        assert status == 201
+        _, copy = _create(client, [{'language': 'de', 'title': 'Hebammen', 'markdown': EDITED}])
+        _, other = _create(client, [{'language': 'de', 'title': 'Hafen', 'markdown': UNRELATED}])
+        # Indexed on write
+        assert _indexed(original['id']) == {'de', 'fr'} and _indexed(copy['id']) == {'de'}
+
+        response = client.get(f"/api/contents/{original['id']}/duplicates")
+        assert response.status_code == 200
+        items = json.loads(response.data)['items']
+        found = {(item['id'], item['match']['language']): item['similarity'] for item in items}
+        assert found[(original['id'], 'fr')] == 1.0 or found[(original['id'], 'de')] == 1.0
+        assert found[(copy['id'], 'de')] >= 0.7
+        assert other['id'] not in {item['id'] for item in items}
+
+        response = client.get(f"/api/contents/{other['id']}/duplicates")
+        assert json.loads(response.data)['items'] == []
+        assert client.get(f"/api/contents/{other['id']}/duplicates?threshold=x").status_code == 400
+
+    def test_create_reports_and_rejects_duplicates(self, app, client):
+        """Test the write-time check against indexed texts."""
+        from app.models import Content
+
+        text = ORIGINAL.replace('Norden', 'Süden')
+        _, first = _create(client, [{'language': 'de', 'title': 'Süden', 'markdown': text}])
+        assert first['near_duplicates'] == [] or all(d['id'] != first['id'] for d in first['near_duplicates'])
+
+        status, second = _create(client, [{'language': 'de', 'title': 'Süden 2', 'markdown': text + ' Ende.'}])
+        assert status == 201
+        assert first['id'] in {item['id'] for item in second['near_duplicates']}
+
+        count = Content.query.count()
+        status, rejected = _create(
+            client, [{'language': 'de', 'title': 'Süden 3', 'markdown': text}], reject_duplicates=True
+        )
+        assert status == 409
+        assert first['id'] in {item['id'] for item in rejected['near_duplicates']}
+        assert Content.query.count() == count
+
+    def test_transcripts_indexed_on_write_and_dropped_on_delete(self, app, client):
+        """Test that indexing does not depend on the embedding queue, and deleting an item clears its buckets."""
+        from app.models import NearDuplicateBucket, NearDuplicateSignature
+
+        app.config['EMBED_ON_WRITE'] = False
+        try:
+            response = client.post(
+                '/api/contents',
+                data=json.dumps({'type': 'video', 'visibility': 'public', 'media': {'object_key': 'nd/video.mp4'}}),
+                content_type='application/json'
+            )
+            video = json.loads(response.data)
+            response = client.post(
+                f"/api/media/{video['media']['id']}/transcripts",
+                data=json.dumps({'language': 'de', 'text': UNRELATED}),
+                content_type='application/json'
+            )
+            assert response.status_code == 201
+        finally:
+            app.config['EMBED_ON_WRITE'] = True
+
+        transcript_id = json.loads(response.data)['id']
+        assert _indexed(video['id']) == {'de'}
+        assert NearDuplicateBucket.query.filter_by(owner_type='transcript', owner_id=transcript_id).count() == 16
+
+        assert client.delete(f"/api/contents/{video['id']}").status_code == 204
+        assert NearDuplicateSignature.query.filter_by(content_id=video['id']).count() == 0
+        assert NearDuplicateBucket.query.filter_by(owner_type='transcript', owner_id=transcript_id).count() == 0
+
+    def test_copies_between_own_texts_name_both_owners(self, app, client):
+        """Test that a transcript pasted into the item's own translation is reported once, naming both owners."""
+        from app.models import ArticleTranslation
+        from app.services.near_duplicates import index_owner
+        from app import db
+
+        response = client.post(
+            '/api/contents',
+            data=json.dumps({'type': 'video', 'visibility': 'public', 'media': {'object_key': 'nd/own-copy.mp4'}}),
+            content_type='application/json'
+        )
+        video = json.loads(response.data)
+        response = client.post(
+            f"/api/media/{video['media']['id']}/transcripts",
+            data=json.dumps({'language': 'de', 'text': EDITED}),
+            content_type='application/json'
+        )
+        transcript_id = json.loads(response.data)['id']
+        translation = ArticleTranslation(
+            content_id=video['id'], language='de', title='Hebammen', slug='hebammen-own-copy', markdown=EDITED,
+        )
+        db.session.add(translation)
+        db.session.flush()
+        index_owner('article_translation', translation.id)
+        db.session.commit()
+
+        response = client.get(f"/api/contents/{video['id']}/duplicates")
+        matches = [item['match'] for item in json.loads(response.data)['items'] if item['id'] == video['id']]
+        assert len(matches) == 1
+        assert {
+            (matches[0]['owner_type'], matches[0]['owner_id']),
+            (matches[0]['matched_owner_type'], matches[0]['matched_owner_id']),
+        } == {('transcript', transcript_id), ('article_translation', translation.id)}
@@ -325,3 +325,143 @@ class TestPublicationDetail:
             ArticleTranslation.query.filter_by(content_id=content_id).delete()
             Content.query.filter_by(id=content_id).delete()
             db.session.commit()
+
+
+class TestStoredRenderedHtml:
+    """Test that public detail pages serve stored HTML."""
+
+    def _create_article(self, client, markdown):
+        import json
+        response = client.post(
+            '/api/contents',
+            data=json.dumps({
+                'type': 'article',
+                'visibility': 'public',
+                'translations': [{'language': 'de', 'title': 'Gespeichertes HTML', 'markdown': markdown}],
+            }),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        return json.loads(response.data)['id']
+
+    def test_write_stores_html_and_renderer_version(self, client, app):
+        """Test that creating an article stores rendered HTML."""
+        from app.models import ArticleTranslation
+        from app.utils.markdown_renderer import RENDERER_FINGERPRINT
+
+        content_id = self._create_article(client, '**fett**')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert '<strong>fett</strong>' in translation.rendered_html
+        assert translation.renderer_version == RENDERER_FINGERPRINT
+
+    def test_missing_html_is_backfilled(self, client, app):
+        """Test lazy backfill of NULL rendered_html without bumping updated_at."""
+        from app.models import ArticleTranslation
+        from app import db
+
+        content_id = self._create_article(client, '*kursiv*')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        translation.rendered_html = None
+        translation.renderer_version = None
+        db.session.commit()
+        updated_at = translation.updated_at
+
+        response = client.get(f'/contents/article/{content_id}')
+        assert response.status_code == 200
+
+        db.session.expire_all()
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert '<em>kursiv</em>' in translation.rendered_html
+        assert translation.updated_at == updated_at
+
+    def test_stale_html_is_rerendered_in_background(self, client, app):
+        """Test that HTML from an old renderer is served, then regenerated."""
+        from app.models import ArticleTranslation
+        from app.utils.markdown_renderer import RENDERER_FINGERPRINT
+        from app import db
+
+        content_id = self._create_article(client, 'neu')
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        translation.rendered_html = '<p>alt</p>'
+        translation.renderer_version = 'old-renderer'
+        db.session.commit()
+
+        response = client.get(f'/contents/article/{content_id}')
+        assert response.status_code == 200
+
+        # Celery runs eagerly in tests, so the re-render has already happened
+        db.session.expire_all()
+        translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+        assert translation.renderer_version == RENDERER_FINGERPRINT
+        assert translation.rendered_html == '<p>neu</p>'
+
+
+class TestSearchFacets:
+    """Test faceted counts on the public search page."""
+
+    def _create(self, client, content_type, translations, tags=()):
+        import json
+        from app.models import Content
+        from app import db
+
+        # The API only stores translations for articles; retype afterwards
+        response = client.post(
+            '/api/contents',
+            data=json.dumps({
+                'type': 'article',
+                'visibility': 'public',
+                'translations': translations,
+                'tags': list(tags),
+            }),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        content_id = json.loads(response.data)['id']
+        db.session.get(Content, content_id).type = content_type
+        db.session.commit()
+        return content_id
+
+    def test_type_tag_and_language_counts(self, client, app):
+        """Test facet counts for a query across types, tags and languages."""
+        from app.models import Content, ArticleTranslation
+        from app.services.search import apply_text_search, search_facets
+        from app import db
+
+        self._create(client, 'article', [
+            {'language': 'de', 'title': 'Flamingo Farben', 'markdown': 'Rosa'},
+            {'language': 'en', 'title': 'Flamingo colours', 'markdown': 'Pink'},
+        ], tags=['birds'])
+        self._create(client, 'article', [{'language': 'de', 'title': 'Flamingo Nester', 'markdown': 'Schlamm'}],
+                     tags=['birds', 'nests'])
+        self._create(client, 'publication', [{'language': 'de', 'title': 'Flamingo Atlas', 'markdown': 'Karten'}])
+
+        matches, _ = apply_text_search(
+            db.session.query(Content.id, Content.type, ArticleTranslation.language)
+            .join(ArticleTranslation).filter(Content.visibility == 'public'),
+            'flamingo', None
+        )
+
+        statements = []
+        engine = db.engine
+        listener = lambda *args: statements.append(args[2])
+        db.event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            facets = search_facets(matches, 'de')
+        finally:
+            db.event.remove(engine, 'before_cursor_execute', listener)
+
+        assert len(statements) == 1
+        assert facets['type'] == {'article': 2, 'publication': 1}
+        assert facets['tag'][0] == {'key': 'birds', 'label': 'birds', 'count': 2}
+        assert facets['language'] == {'de': 3, 'en': 1}
+
+    def test_search_page_uses_facets(self, client, app):
+        """Test that the page total and category counts come from the facets."""
+        self._create(client, 'article', [{'language': 'de', 'title': 'Pelikan Schnabel', 'markdown': 'Fisch'}])
+        self._create(client, 'video', [{'language': 'de', 'title': 'Pelikan Flug', 'markdown': 'Wind'}])
+
+        response = client.get('/search?q=pelikan&lang=de&type=video')
+        assert response.status_code == 200
+        assert '1 Ergebnis für'.encode() in response.data
+        assert b'Pelikan Flug' in response.data
+        assert b'Pelikan Schnabel' not in response.data
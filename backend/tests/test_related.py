@@ -0,0 +1,97 @@
+"""Tests for precomputed related content."""
+import json
+
+import pytest
+
+
+def _create_article(client, title, markdown, tags=(), visibility='public', language='sv'):
+    response = client.post(
+        '/api/contents',
+        data=json.dumps({
+            'type': 'article',
+            'visibility': visibility,
+            'tags': list(tags),
+            'translation': {'language': language, 'title': title, 'markdown': markdown},
+        }),
+        content_type='application/json'
+    )
+    assert response.status_code == 201
+    return json.loads(response.data)['id']
+
+
+def _related(client, content_id, language='sv'):
+    response = client.get(f'/api/contents/{content_id}/related?lang={language}')
+    assert response.status_code == 200
+    return [(item['id'], item['method']) for item in json.loads(response.data)['items']]
+
+
+def _embed(content_id):
+    from app.models import ArticleTranslation
+    from app.tasks.embeddings import embed_article_translation
+
+    translation = ArticleTranslation.query.filter_by(content_id=content_id).one()
+    assert embed_article_translation(translation.id)['status'] == 'success'
+
+
+class TestRelatedContents:
+    """Test neighbor lists, their incremental refresh and where they are shown."""
+
+    def test_neighbors_from_embeddings(self, app, client):
+        """Test that items with embeddings are related by their chunk vectors."""
+        from app.tasks.related import refresh_related_contents
+
+        forest = _create_article(client, 'Skog', 'Granskog och tallskog växer i norr. Skogen binder kol.')
+        woods = _create_article(client, 'Skogar', 'Tallskog och granskog i norr binder kol i skogen.')
+        harbor = _create_article(client, 'Hamn', 'Fartyg lastar containrar vid kajen om natten.')
+        hidden = _create_article(client, 'Dold skog', 'Granskog och tallskog växer i norr. Skogen binder kol.',
+                                 visibility='private')
+        for content_id in (forest, woods, harbor, hidden):
+            _embed(content_id)
+
+        report = refresh_related_contents()
+        assert report['status'] == 'success' and report['embedding'] >= 4
+
+        related = _related(client, forest)
+        assert related[0] == (woods, 'embedding')
+        assert {woods, harbor} <= {content_id for content_id, _ in related}
+        # Private items are listed but not shown to anonymous callers
+        assert hidden not in {content_id for content_id, _ in related}
+
+    def test_tag_fallback_and_incremental_refresh(self, app, client):
+        """Test Jaccard neighbors without embeddings, and that a tag change refreshes only affected lists."""
+        from app.models import ContentNeighbor, ContentNeighborDirty
+        from app.tasks.related import refresh_related_contents
+
+        a = _create_article(client, 'A', 'Utan vektorer', tags=['rel-x', 'rel-y', 'rel-z'])
+        b = _create_article(client, 'B', 'Utan vektorer', tags=['rel-x', 'rel-y'])
+        c = _create_article(client, 'C', 'Utan vektorer', tags=['rel-z', 'rel-w'])
+        d = _create_article(client, 'D', 'Utan vektorer', tags=['rel-other'])
+        refresh_related_contents()
+        assert ContentNeighborDirty.query.count() == 0
+
+        assert _related(client, a) == [(b, 'tags'), (c, 'tags')]
+        scores = {row.neighbor_id: row.score for row in ContentNeighbor.query.filter_by(content_id=a)}
+        assert scores == {b: pytest.approx(2 / 3), c: pytest.approx(1 / 4)}
+        assert _related(client, d) == []
+
+        # D now shares a tag with C; C's list changes although only D was edited
+        response = client.put(f'/api/contents/{d}', data=json.dumps({'tags': ['rel-w']}),
+                              content_type='application/json')
+        assert response.status_code == 200
+        report = refresh_related_contents()
+        assert report['changed'] == 1 and report['contents'] == 2
+        assert _related(client, d) == [(c, 'tags')]
+        assert _related(client, c) == [(d, 'tags'), (a, 'tags')]
+
+    def test_article_page_shows_related(self, app, client):
+        """Test the related block on the public article page."""
+        from app.tasks.related import refresh_related_contents
+
+        first = _create_article(client, 'Sidan ett', 'Text', tags=['rel-page'])
+        _create_article(client, 'Sidan två', 'Text', tags=['rel-page'])
+        refresh_related_contents()
+
+        response = client.get(f'/contents/article/{first}?lang=sv')
+        assert response.status_code == 200
+        page = response.get_data(as_text=True)
+        assert 'Ähnliche Inhalte' in page and 'Sidan två' in page